@@ -0,0 +1,114 @@
+"""
+Times linear_commute_and_merge against commute_and_merge on random circuits, and compares the number of gates they leave.\n
+The circuits are made of the gates that reach IterativeCommuteAndMerge after CliffordTDecomposition, on a few wires.
+commute_and_merge is quadratic in the number of gates, so it is skipped on circuits that are larger than --reference-limit.
+
+usage : python benchmarks/commute_and_merge_benchmark.py [--gates N [N ...]] [--wires W] [--repeat R] [--reference-limit N]
+"""
+
+import argparse
+import statistics
+import time
+import numpy as np
+import pennylane as qml
+from pennylane.tape import QuantumTape
+from pennylane_calculquebec.processing.optimization_methods.iterative_commute_and_merge import (
+    commute_and_merge,
+)
+from pennylane_calculquebec.processing.optimization_methods.linear_commute_and_merge import (
+    linear_commute_and_merge,
+)
+
+
+def random_circuit(gates: int, wires: int, seed: int) -> QuantumTape:
+    """
+    Args:
+        gates (int) : the number of gates in the circuit
+        wires (int) : the number of wires in the circuit
+        seed (int) : the seed of the random gates
+
+    Returns:
+        QuantumTape : a circuit of Clifford + T gates, rotations, CNOTs and CZs
+    """
+    rng = np.random.default_rng(seed)
+    single_qubit = [
+        qml.Hadamard,
+        qml.PauliX,
+        qml.PauliZ,
+        qml.S,
+        qml.T,
+        lambda wire: qml.adjoint(qml.S(wire)),
+        lambda wire: qml.adjoint(qml.T(wire)),
+        lambda wire: qml.RZ(rng.choice([np.pi / 2, np.pi, rng.uniform(-7, 7)]), wire),
+        lambda wire: qml.RX(
+            rng.choice([np.pi / 2, -np.pi / 2, rng.uniform(-7, 7)]), wire
+        ),
+    ]
+    operations = []
+    for _ in range(gates):
+        if rng.random() < 0.3:
+            control, target = (
+                int(wire) for wire in rng.choice(wires, 2, replace=False)
+            )
+            gate = qml.CNOT if rng.random() < 0.5 else qml.CZ
+            operations.append(gate([control, target]))
+        else:
+            gate = single_qubit[rng.integers(len(single_qubit))]
+            operations.append(gate(int(rng.integers(wires))))
+    return QuantumTape(operations, [qml.counts(wires=range(wires))], shots=1000)
+
+
+def time_optimizer(
+    optimizer, tape: QuantumTape, repeat: int
+) -> tuple[list[float], int]:
+    """
+    Args:
+        optimizer (Callable[[QuantumTape], QuantumTape]) : the optimizer to time
+        tape (QuantumTape) : the circuit to optimize
+        repeat (int) : how many times the optimizer is run
+
+    Returns:
+        tuple[list[float], int] : the duration of each run in seconds, and the number of gates left
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = optimizer(tape)
+        durations.append(time.perf_counter() - start)
+    return durations, len(result.operations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--gates", type=int, nargs="+", default=[1000, 5000, 10000, 50000]
+    )
+    parser.add_argument("--wires", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--reference-limit",
+        type=int,
+        default=5000,
+        help="the largest circuit commute_and_merge is timed on",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'optimizer':<26}{'gates':>8}{'left':>8}{'median (ms)':>14}{'min (ms)':>12}"
+    )
+    for gates in args.gates:
+        tape = random_circuit(gates, args.wires, seed=gates)
+        optimizers = [linear_commute_and_merge]
+        if gates <= args.reference_limit:
+            optimizers.append(commute_and_merge)
+        for optimizer in optimizers:
+            durations, left = time_optimizer(optimizer, tape, args.repeat)
+            print(
+                f"{optimizer.__name__:<26}{gates:>8}{left:>8}"
+                f"{statistics.median(durations) * 1000:>14.2f}"
+                f"{min(durations) * 1000:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
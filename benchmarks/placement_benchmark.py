@@ -0,0 +1,84 @@
+"""
+Times the placement steps on yamaska's offline connectivity, so that changes to the graph utilities can be compared.\n
+No connection to Thunderhead is needed : benchmarks are not used, and the offline connectivity is read from monarq_data.
+
+usage : python benchmarks/placement_benchmark.py [--repeat N] [--wires W [W ...]] [--cold]
+"""
+
+import argparse
+import statistics
+import time
+import pennylane as qml
+from pennylane.tape import QuantumTape
+from pennylane_calculquebec.monarq_data import Cache, cache
+from pennylane_calculquebec.processing.steps.placement import ASTAR, ISMAGS, VF2
+import pennylane_calculquebec.utility.graph as graph_util
+
+
+def offline_connectivity(machine_name, use_benchmark=True):
+    return cache["yamaska"][Cache.OFFLINE_CONNECTIVITY]
+
+
+def ring(wires: int) -> QuantumTape:
+    """
+    a circuit whose two qubits gates form a ring, which can't be embedded directly in yamaska's grid
+
+    Args:
+        wires (int) : the number of wires in the circuit
+
+    Returns:
+        QuantumTape : the circuit
+    """
+    operations = [qml.CZ([i, (i + 1) % wires]) for i in range(wires)]
+    return QuantumTape(operations, [qml.counts(wires=range(wires))], shots=1000)
+
+
+def time_step(step, tape: QuantumTape, repeat: int, cold: bool) -> list[float]:
+    """
+    Args:
+        step (PreProcStep) : the placement step to time
+        tape (QuantumTape) : the circuit to place
+        repeat (int) : how many times the step is run
+        cold (bool) : should the cached shortest paths be dropped before each run?
+
+    Returns:
+        list[float] : the duration of each run, in seconds
+    """
+    durations = []
+    for _ in range(repeat):
+        if cold:
+            graph_util._path_tables.clear()
+        start = time.perf_counter()
+        step.execute(tape)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--wires", type=int, nargs="+", default=[4, 8, 12])
+    parser.add_argument(
+        "--cold", action="store_true", help="don't reuse shortest paths between runs"
+    )
+    args = parser.parse_args()
+
+    graph_util.get_connectivity = offline_connectivity
+
+    print(f"{'step':<8}{'wires':>6}{'median (ms)':>14}{'min (ms)':>12}")
+    for step_type in [ASTAR, ISMAGS, VF2]:
+        step = step_type("yamaska", use_benchmark=False)
+        for wires in args.wires:
+            if step_type is VF2 and wires > 8:
+                # VF2 tries every combination of the circuit's edges
+                continue
+            durations = time_step(step, ring(wires), args.repeat, args.cold)
+            print(
+                f"{step_type.__name__:<8}{wires:>6}"
+                f"{statistics.median(durations) * 1000:>14.2f}"
+                f"{min(durations) * 1000:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
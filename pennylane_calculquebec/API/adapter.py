@@ -1,11 +1,24 @@
-"""Contains the ApiAdapter singleton class, which wraps every API call necessary for communicating with MonarQ"""
+"""Contains the ApiAdapter class, which wraps every API call necessary for communicating with MonarQ"""
 
 from pennylane_calculquebec.utility.api import ApiUtility, routes, keys, queries
 import requests
+from requests.adapters import HTTPAdapter
+import contextlib
+import contextvars
+import functools
+import hashlib
 import json
+import threading
 from pennylane_calculquebec.API.client import ApiClient
+from pennylane_calculquebec.API.disk_cache import DiskCache
 from datetime import datetime, timedelta
 from pennylane_calculquebec.API.retry_decorator import retry
+from pennylane_calculquebec.logger import logger
+from typing import Callable
+
+# the time between two background refreshes of a machine's benchmark. It doubles after each failed refresh, up to REFRESH_MAX_DELAY
+REFRESH_DELAY = timedelta(minutes=1)
+REFRESH_MAX_DELAY = timedelta(hours=1)
 
 
 class ApiException(Exception):
@@ -73,96 +86,279 @@ class NoProjectFoundException(ProjectException):
         super().__init__(message)
 
 
-class ApiAdapter(object):
-    _qubits_and_couplers = None
-    _machine = None
-    _benchmark = None
-    _last_update = None
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    an HTTPAdapter which keeps a pool of connections alive, and applies a default timeout to every request
+
+    Args:
+        - timeout (float) : the number of seconds to wait for the server before giving up on a request
+        - pool_size (int) : the maximum number of connections kept alive per host
+    """
+
+    def __init__(self, timeout: float, pool_size: int):
+        self.timeout = timeout
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
 
+class adaptermethod:
+    """
+    a method decorator for ApiAdapter. The method is bound to the instance it is called on,
+    or to the current instance (ApiAdapter.instance()) when it is called on the class
+    """
+
+    def __init__(self, func):
+        self.func = func
+        functools.update_wrapper(self, func)
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            obj = cls.instance()
+        return functools.partial(self.func, obj)
+
+
+class ApiAdapter(object):
     """
     a wrapper around Thunderhead. Provide a host, user, access token and realm, and you can :
     - create jobs with circuit dict, circuit name, project id, machine name and shots count
     - get benchmark by machine name
     - get machine id by name
 
+    Each instance has its own client, session and caches, and can be shared between threads.
+    Cached machines and benchmarks are kept per machine, so one instance can drive many machines.\n
+    Methods can also be called on the class, in which case they use the current instance (see initialize, use and instance)
 
+    Args :
+        client (ApiClient) : The client to initialize the adapter with
+        pool_size (int) : The maximum number of connections kept alive. Defaults to 10
+        timeout (float) : The number of seconds to wait for Thunderhead before giving up on a request. Defaults to 30
+        disk_cache (DiskCache) : Where machines, benchmarks and connectivities are persisted between processes. Defaults to DiskCache.from_environment() (disabled unless PLCQ_CACHE_PATH is set)
     """
 
-    def __init__(self):
-        raise Exception(
-            "Call ApiAdapter.initialize(ApiClient) and ApiAdapter.instance() instead"
-        )
-
     client: ApiClient
     headers: dict[str, str]
+    session: requests.Session
     _instance: "ApiAdapter" = None
+    # the instance bound by use, which takes precedence over the default instance in its context
+    _current: contextvars.ContextVar = contextvars.ContextVar(
+        "ApiAdapter current instance", default=None
+    )
+
+    def __init__(
+        self,
+        client: ApiClient,
+        pool_size: int = 10,
+        timeout: float = 30,
+        disk_cache: DiskCache = None,
+    ):
+        self.disk_cache = (
+            disk_cache if disk_cache is not None else DiskCache.from_environment()
+        )
+        self._lock = threading.RLock()
+        self._machines: dict[str, dict] = {}
+        self._benchmarks: dict[str, dict] = {}
+        self._last_updates: dict[str, datetime] = {}
+        self._validated: dict[str, tuple[dict, dict]] = {}
+        self._refreshes: dict[str, threading.Thread] = {}
+        # the time of the last refresh of each machine, successful or not, and the number of refreshes that failed since the last success
+        self._refresh_attempts: dict[str, tuple[datetime, int]] = {}
+        self._machine_locks: dict[str, threading.Lock] = {}
+        self._loading: dict[tuple[str, str], threading.Event] = {}
+        # called with the machine name whenever a background refresh brings a new benchmark
+        self.refresh_listeners: list[Callable[[str], None]] = []
+
+        self.session = ApiAdapter.create_session(pool_size, timeout)
+        self.headers = ApiUtility.headers(
+            client.user, client.access_token, client.realm
+        )
+        self.client = client
+        if client.project_name != "":
+            self.client.project_id = self.get_project_id_by_name(client.project_name)
 
-    @staticmethod
-    def clean_cache():
-        """
-        Cleans all cache values
-        """
+    @adaptermethod
+    def clean_cache(self):
         """
         Cleans all cache values
         """
-        ApiAdapter._qubits_and_couplers = None
-        ApiAdapter._machine = None
-        ApiAdapter._benchmark = None
-        ApiAdapter._last_update = None
+        if self is None:
+            return
+
+        with self._lock:
+            self._machines.clear()
+            self._benchmarks.clear()
+            self._last_updates.clear()
+            self._validated.clear()
+            self._refresh_attempts.clear()
 
     @classmethod
     def instance(cls):
         """
-        unique ApiAdapter instance
+        current ApiAdapter instance : the one bound by use in this context, or the default one
         """
-        return cls._instance
+        current = cls._current.get()
+        return current if current is not None else cls._instance
 
     @classmethod
-    def initialize(cls, client: ApiClient):
+    @contextlib.contextmanager
+    def use(cls, adapter: "ApiAdapter"):
         """
-        Create a unique ApiAdapter instance
+        makes calls on the class go through an adapter within a context, so that a device's processing
+        reads the calibration of its own client. Threads started within the context don't inherit it
 
         Args :
-            client (ApiClient) : The client to initialize ApiAdapter with
-        Create a unique ApiAdapter instance
+            adapter (ApiAdapter) : the adapter to use. None keeps the current instance
+        """
+        if adapter is None:
+            yield
+            return
+
+        token = cls._current.set(adapter)
+        try:
+            yield
+        finally:
+            cls._current.reset(token)
+
+    @classmethod
+    def initialize(
+        cls,
+        client: ApiClient,
+        pool_size: int = 10,
+        timeout: float = 30,
+        disk_cache: DiskCache = None,
+    ) -> "ApiAdapter":
+        """
+        Create an ApiAdapter instance for a client, and make it the default instance.
+        Its requests go through a single session, which keeps connections to Thunderhead alive
 
         Args :
             client (ApiClient) : The client to initialize ApiAdapter with
-        """
-        cls._instance = cls.__new__(cls)
-        cls._instance.headers = ApiUtility.headers(
-            client.user, client.access_token, client.realm
-        )
-        cls._instance.client = client
-        if client.project_name != "":
-            cls._instance.client.project_id = ApiAdapter.get_project_id_by_name(
-                client.project_name
-            )
+            pool_size (int) : The maximum number of connections kept alive. Defaults to 10
+            timeout (float) : The number of seconds to wait for Thunderhead before giving up on a request. Defaults to 30
+            disk_cache (DiskCache) : Where payloads are persisted between processes. Defaults to DiskCache.from_environment()
 
-        cls._qubits_and_couplers: dict = None
-        cls._machine: dict = None
-        cls._benchmark: dict = None
-        cls._last_update: datetime = None
+        Returns :
+            ApiAdapter : the new instance
+        """
+        cls._instance = cls(client, pool_size, timeout, disk_cache)
+        return cls._instance
 
     @staticmethod
-    def is_last_update_expired():
+    def create_session(pool_size: int = 10, timeout: float = 30) -> requests.Session:
         """
-        Checks if the last update has been done more than 24 h ago
+        Create a session with a pool of kept-alive connections and a default timeout
+
+        Args:
+            pool_size (int) : The maximum number of connections kept alive. Defaults to 10
+            timeout (float) : The number of seconds to wait for the server before giving up on a request. Defaults to 30
 
         Returns:
-            bool : Was the last update more than 24 h ago?
+            Session : the session
+        """
+        session = requests.Session()
+        http_adapter = TimeoutHTTPAdapter(timeout, pool_size)
+        session.mount("https://", http_adapter)
+        session.mount("http://", http_adapter)
+        return session
+
+    @adaptermethod
+    def _through_disk_cache(
+        self, kind: str, machine_name: str, fetch
+    ) -> tuple[dict, datetime]:
         """
+        Reads a payload from the disk cache, or fetches it and writes it to the disk cache.
+        The disk cache is locked meanwhile, so that only one process fetches a missing payload
+
+        Args:
+            kind (str) : the kind of payload (machine, benchmark or connectivity)
+            machine_name (str) : the machine the payload is about
+            fetch (Callable[[], dict]) : fetches the payload from Thunderhead
+
+        Returns:
+            tuple[dict, datetime] : the payload, and the time it was fetched
+        """
+        if self.disk_cache is None:
+            return fetch(), datetime.now()
+
+        # payloads from different Thunderhead hosts must not be mixed
+        host = hashlib.sha1(self.client.host.encode("utf-8")).hexdigest()[:8]
+        key = f"{kind}-{machine_name}-{host}"
+        with self.disk_cache.lock(key):
+            entry = self.disk_cache.get(key)
+            if entry is not None:
+                return entry
+
+            value = fetch()
+            self.disk_cache.set(key, value)
+            return value, datetime.now()
+
+    @adaptermethod
+    def _conditional_get(self, route: str) -> dict:
+        """
+        Gets a json payload. If the payload was fetched before with an ETag or a Last-Modified header,
+        the request is conditional, and the previous payload is reused when the server answers 304 (not modified)
+
+        Args:
+            route (str) : the route of the payload
+
+        Returns:
+            dict : the payload
+        """
+        # single dict operations are atomic, so no lock is taken : this runs while the disk cache is locked
+        validated = self._validated.get(route)
+
+        headers = dict(self.headers)
+        if validated is not None:
+            body, validators = validated
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        res = self.session.get(route, headers=headers)
+        if res.status_code == 304 and validated is not None:
+            return body
+        if res.status_code != 200:
+            ApiAdapter.raise_exception(res)
+
+        body = json.loads(res.text)
+        response_headers = getattr(res, "headers", None) or {}
+        validators = {
+            name: response_headers.get(name)
+            for name in ["ETag", "Last-Modified"]
+            if isinstance(response_headers.get(name), str)
+        }
+        if len(validators) > 0:
+            self._validated[route] = (body, validators)
+        return body
+
+    @adaptermethod
+    def is_last_update_expired(self, machine_name: str = None) -> bool:
         """
         Checks if the last update has been done more than 24 h ago
 
+        Args:
+            machine_name (str) : The machine to check. Defaults to None (checks every machine)
+
         Returns:
-            bool : Was the last update more than 24 h ago?
+            bool : Was the last update more than 24 h ago? True if there was no update
         """
-        return datetime.now() - ApiAdapter._last_update > timedelta(hours=24)
+        with self._lock:
+            if machine_name is not None:
+                last_updates = [self._last_updates.get(machine_name)]
+            else:
+                last_updates = list(self._last_updates.values())
 
-    @staticmethod
+        if len(last_updates) <= 0 or None in last_updates:
+            return True
+        return datetime.now() - min(last_updates) > timedelta(hours=24)
+
+    @adaptermethod
     @retry(3)
-    def get_project_id_by_name(project_name: str = "default") -> str:
+    def get_project_id_by_name(self, project_name: str = "default") -> str:
         """
         Get the id of a project by using the project's name stored in the client
 
@@ -172,13 +368,9 @@ class ApiAdapter(object):
         Returns:
             project_id (str) : The id of the project
         """
-        res = requests.get(
-            ApiAdapter.instance().client.host
-            + routes.PROJECTS
-            + queries.NAME
-            + "="
-            + project_name,
-            headers=ApiAdapter.instance().headers,
+        res = self.session.get(
+            self.client.host + routes.PROJECTS + queries.NAME + "=" + project_name,
+            headers=self.headers,
         )
 
         if res.status_code != 200:
@@ -199,9 +391,9 @@ class ApiAdapter(object):
 
         raise NoProjectFoundException(project_name)
 
-    @staticmethod
+    @adaptermethod
     @retry(3)
-    def get_machine_by_name(machine_name: str) -> dict:
+    def get_machine_by_name(self, machine_name: str) -> dict:
         """
         Get the id of a machine by using the machine's name stored in the client
 
@@ -211,27 +403,87 @@ class ApiAdapter(object):
         Returns:
             dict : The machine information in a dictionary
         """
-        # put machine in cache
-        if ApiAdapter._machine is None:
-            route = (
-                ApiAdapter.instance().client.host
-                + routes.MACHINES
-                + queries.MACHINE_NAME
-                + "="
-                + machine_name
-            )
+        return self._load_once(
+            "machine",
+            machine_name,
+            self._machines,
+            lambda: self._through_disk_cache(
+                "machine", machine_name, lambda: self._fetch_machine(machine_name)
+            ),
+        )
 
-            res = requests.get(route, headers=ApiAdapter.instance().headers)
+    @adaptermethod
+    def _machine_lock(self, machine_name: str) -> threading.Lock:
+        """
+        Args:
+            machine_name (str) : the name of a machine
 
-            if res.status_code != 200:
-                ApiAdapter.raise_exception(res)
-            ApiAdapter._machine = json.loads(res.text)
+        Returns:
+            Lock : the lock that guards the cached payloads of the machine
+        """
+        # setdefault is atomic, so creating the lock of a machine doesn't need another lock
+        return self._machine_locks.setdefault(machine_name, threading.Lock())
 
-        return ApiAdapter._machine
+    @adaptermethod
+    def _load_once(
+        self, kind: str, machine_name: str, cache: dict, load, last_updates=None
+    ) -> dict:
+        """
+        Returns the cached payload of a machine, or loads it and caches it.
+        Concurrent calls for the same payload wait for the first one instead of loading it again,
+        while calls for different machines don't wait on each other. No lock is held while loading
 
-    @staticmethod
+        Args:
+            kind (str) : the kind of payload (machine or benchmark)
+            machine_name (str) : the machine the payload is about
+            cache (dict) : where the payload is cached, by machine name
+            load (Callable[[], tuple[dict, datetime]]) : loads the payload, and returns it with the time it was fetched
+            last_updates (dict) : where the time the payload was fetched is kept, by machine name. Defaults to None (not kept)
+
+        Returns:
+            dict : the payload
+        """
+        key = (kind, machine_name)
+        lock = self._machine_lock(machine_name)
+        while True:
+            with lock:
+                value = cache.get(machine_name)
+                if value is not None:
+                    return value
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # another thread is loading the payload. If it fails, this thread tries in turn
+            loading.wait()
+
+        try:
+            value, last_update = load()
+            with lock:
+                cache[machine_name] = value
+                if last_updates is not None:
+                    last_updates[machine_name] = last_update
+            return value
+        finally:
+            with lock:
+                del self._loading[key]
+            loading.set()
+
+    @adaptermethod
+    def _fetch_machine(self, machine_name: str) -> dict:
+        route = (
+            self.client.host
+            + routes.MACHINES
+            + queries.MACHINE_NAME
+            + "="
+            + machine_name
+        )
+
+        return self._conditional_get(route)
+
+    @adaptermethod
     @retry(3)
-    def get_qubits_and_couplers(machine_name: str) -> dict:
+    def get_qubits_and_couplers(self, machine_name: str) -> dict:
         """
         Get qubits and couplers informations from latest benchmark for given machine
 
@@ -242,15 +494,16 @@ class ApiAdapter(object):
             dict : A dictionary with fidelity values (T1, T2, Q1 fidelities, Q2 fidelities, readout 1, readout 0)
         """
 
-        benchmark = ApiAdapter.get_benchmark(machine_name)
+        benchmark = self.get_benchmark(machine_name)
         return benchmark[keys.RESULTS_PER_DEVICE]
 
-    @staticmethod
-    @retry(3)
+    @adaptermethod
     @retry(3)
-    def get_benchmark(machine_name):
+    def get_benchmark(self, machine_name: str) -> dict:
         """
-        get latest benchmark for a given machine
+        get latest benchmark for a given machine.\n
+        The first call fetches the benchmark. Once it is more than 24 h old, the cached benchmark is still returned
+        while a newer one is fetched in the background
 
         Args:
             machine_name (str) : the name of the machine you want to fetch
@@ -258,30 +511,117 @@ class ApiAdapter(object):
         Return :
             dict : a dictionary all benchmark information for the machine
         """
+        benchmark = self._benchmarks.get(machine_name)
+        if benchmark is None:
+            return self._load_once(
+                "benchmark",
+                machine_name,
+                self._benchmarks,
+                lambda: self._through_disk_cache(
+                    "benchmark",
+                    machine_name,
+                    lambda: self._fetch_benchmark(machine_name),
+                ),
+                self._last_updates,
+            )
+
+        if self.is_last_update_expired(machine_name):
+            self._start_refresh(machine_name)
+        return benchmark
+
+    @adaptermethod
+    def _fetch_benchmark(self, machine_name: str) -> dict:
+        machine = self.get_machine_by_name(machine_name)
+        machine_id = machine[keys.ITEMS][0][keys.ID]
+
+        route = (
+            self.client.host + routes.MACHINES + "/" + machine_id + routes.BENCHMARKING
+        )
+        return self._conditional_get(route)
 
-        # put benchmark in cache
-        if ApiAdapter._benchmark is None or ApiAdapter.is_last_update_expired():
-            machine = ApiAdapter.get_machine_by_name(machine_name)
-            machine_id = machine[keys.ITEMS][0][keys.ID]
+    @adaptermethod
+    def _start_refresh(self, machine_name: str):
+        """
+        starts fetching the benchmark of a machine in the background, unless it is already being fetched,
+        or the last refresh was too recent (see REFRESH_DELAY)
 
-            route = (
-                ApiAdapter.instance().client.host
-                + routes.MACHINES
-                + "/"
-                + machine_id
-                + routes.BENCHMARKING
+        Args:
+            machine_name (str) : the name of the machine
+        """
+        with self._lock:
+            refresh = self._refreshes.get(machine_name)
+            if refresh is not None and refresh.is_alive():
+                return
+
+            attempt = self._refresh_attempts.get(machine_name)
+            if attempt is not None:
+                last_attempt, failures = attempt
+                delay = min(REFRESH_DELAY * 2**failures, REFRESH_MAX_DELAY)
+                if datetime.now() - last_attempt < delay:
+                    return
+
+            refresh = threading.Thread(
+                target=self._refresh,
+                args=(machine_name,),
+                name=f"ApiAdapter refresh {machine_name}",
+                daemon=True,
             )
-            res = requests.get(route, headers=ApiAdapter.instance().headers)
-            if res.status_code != 200:
-                ApiAdapter.raise_exception(res)
-            ApiAdapter._benchmark = json.loads(res.text)
-            ApiAdapter._last_update = datetime.now()
+            self._refreshes[machine_name] = refresh
+            refresh.start()
 
-        return ApiAdapter._benchmark
+    @adaptermethod
+    def _refresh(self, machine_name: str):
+        """
+        fetches the benchmark of a machine, and replaces the cached one. The cached benchmark is kept if the fetch fails
 
-    @staticmethod
+        Args:
+            machine_name (str) : the name of the machine
+        """
+        try:
+            benchmark, last_update = self._through_disk_cache(
+                "benchmark", machine_name, lambda: self._fetch_benchmark(machine_name)
+            )
+        except Exception as e:
+            logger.error(
+                "Error %s in _refresh located in ApiAdapter: %s",
+                type(e).__name__,
+                e,
+            )
+            with self._lock:
+                _, failures = self._refresh_attempts.get(machine_name, (None, 0))
+                self._refresh_attempts[machine_name] = (datetime.now(), failures + 1)
+            return
+
+        with self._lock:
+            self._refresh_attempts[machine_name] = (datetime.now(), 0)
+        with self._machine_lock(machine_name):
+            # an unchanged benchmark keeps its identity, so that whatever was derived from it stays valid
+            changed = benchmark != self._benchmarks.get(machine_name)
+            if changed:
+                self._benchmarks[machine_name] = benchmark
+            self._last_updates[machine_name] = last_update
+
+        if changed:
+            for listener in list(self.refresh_listeners):
+                listener(machine_name)
+
+    @adaptermethod
+    def wait_for_refreshes(self, timeout: float = None):
+        """
+        waits for the background refreshes that are in progress
+
+        Args:
+            timeout (float) : the maximum number of seconds to wait for each refresh. Defaults to None (no limit)
+        """
+        with self._lock:
+            refreshes = list(self._refreshes.values())
+        for refresh in refreshes:
+            refresh.join(timeout)
+
+    @adaptermethod
     @retry(3)
     def post_job(
+        self,
         circuit: dict,
         shot_count: int = 1,
     ) -> requests.Response:
@@ -295,45 +635,117 @@ class ApiAdapter(object):
         Returns:
             Response : The response of the /job post request
         """
-        project_id = ApiAdapter.instance().client.project_id
-        circuit_name = ApiAdapter.instance().client.circuit_name
-        machine_name = ApiAdapter.instance().client.machine_name
         body = ApiUtility.job_body(
-            circuit, circuit_name, project_id, machine_name, shot_count
+            circuit,
+            self.client.circuit_name,
+            self.client.project_id,
+            self.client.machine_name,
+            shot_count,
         )
-        res = requests.post(
-            ApiAdapter.instance().client.host + routes.JOBS,
+        res = self.session.post(
+            self.client.host + routes.JOBS,
             data=json.dumps(body),
-            headers=ApiAdapter.instance().headers,
+            headers=self.headers,
         )
         if res.status_code != 200:
             ApiAdapter.raise_exception(res)
         return res
 
-    @staticmethod
+    @adaptermethod
     @retry(3)
     @retry(3)
-    def list_jobs() -> requests.Response:
+    def list_jobs(self, page: int = None, page_size: int = None) -> requests.Response:
         """
         get all jobs for a given user (user stored in client)
 
-        Returns:
-            Response : the response of the /jobs get request
+        Args:
+            page (int) : the index of the page to fetch. Defaults to None (no pagination)
+            page_size (int) : the number of jobs per page. Only used if a page is given. Defaults to 100
 
         Returns:
             Response : the response of the /jobs get request
         """
-        res = requests.get(
-            ApiAdapter.instance().client.host + routes.JOBS,
-            headers=ApiAdapter.instance().headers,
-        )
+        route = self.client.host + routes.JOBS
+        if page is not None:
+            route += (
+                queries.PAGE
+                + "="
+                + str(page)
+                + queries.PAGE_SIZE
+                + "="
+                + str(page_size if page_size is not None else 100)
+            )
+
+        res = self.session.get(route, headers=self.headers)
         if res.status_code != 200:
             ApiAdapter.raise_exception(res)
         return res
 
-    @staticmethod
+    @adaptermethod
+    def jobs_by_ids(
+        self, job_ids: list[str], page_size: int = 100, max_pages: int = 3
+    ) -> dict[str, dict]:
+        """
+        Get many jobs at once, by going through the pages of the job list and filtering them on the client side.
+        This takes one request per page instead of one request per job.
+        Jobs that are not in the first max_pages pages are fetched one by one, instead of walking the whole history
+
+        Args:
+            job_ids (list[str]) : the ids of the jobs you want to get
+            page_size (int) : the number of jobs per page. Defaults to 100
+            max_pages (int) : the number of pages to go through before fetching the remaining jobs by id. Defaults to 3
+
+        Returns:
+            dict[str, dict] : the jobs that were found, by id. Each job has the same shape as the body of a job_by_id response.
+            Jobs that could not be found are left out
+        """
+        wanted = set(job_ids)
+        found = {}
+        seen = set()
+        page = 0
+        while len(wanted) > 0:
+            if page >= max_pages:
+                for job_id in [job_id for job_id in job_ids if job_id in wanted]:
+                    try:
+                        found[job_id] = json.loads(self.job_by_id(job_id).text)
+                    except Exception as e:
+                        logger.error(
+                            "Error %s in jobs_by_ids located in ApiAdapter: %s",
+                            type(e).__name__,
+                            e,
+                        )
+                break
+
+            res = self.list_jobs(page, page_size)
+            content = json.loads(res.text)
+            items = (
+                content.get(keys.ITEMS, []) if isinstance(content, dict) else content
+            )
+
+            new_items = 0
+            for item in items:
+                # items are either bare jobs or wrapped like job_by_id responses
+                job = item.get(keys.JOB, item)
+                job_id = job.get(keys.ID)
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+                new_items += 1
+
+                if job_id in wanted:
+                    found[job_id] = item if keys.JOB in item else {keys.JOB: job}
+                    wanted.remove(job_id)
+
+            # stop on the last page, or if the server does not paginate
+            if len(items) < page_size or new_items == 0:
+                break
+            page += 1
+
+        return found
+
+    @adaptermethod
     @retry(3)
-    def job_by_id(id: str) -> requests.Response:
+    def job_by_id(self, id: str) -> requests.Response:
         """
         Get a job for a given user by providing its id (user stored in client)
 
@@ -343,17 +755,17 @@ class ApiAdapter(object):
         Returns:
             Response : The response of the /job/id get request
         """
-        res = requests.get(
-            ApiAdapter.instance().client.host + routes.JOBS + f"/{id}",
-            headers=ApiAdapter.instance().headers,
+        res = self.session.get(
+            self.client.host + routes.JOBS + f"/{id}",
+            headers=self.headers,
         )
         if res.status_code != 200:
             ApiAdapter.raise_exception(res)
         return res
 
-    @staticmethod
+    @adaptermethod
     @retry(3)
-    def list_machines(online_only: bool = False) -> list[dict]:
+    def list_machines(self, online_only: bool = False) -> list[dict]:
         """
         Get a list of available machines
 
@@ -363,9 +775,9 @@ class ApiAdapter(object):
         Returns:
             list[dict] : The list of dictionaries representing machines
         """
-        res = requests.get(
-            ApiAdapter.instance().client.host + routes.MACHINES,
-            headers=ApiAdapter.instance().headers,
+        res = self.session.get(
+            self.client.host + routes.MACHINES,
+            headers=self.headers,
         )
         if res.status_code != 200:
             ApiAdapter.raise_exception(res)
@@ -375,7 +787,8 @@ class ApiAdapter(object):
             if not online_only or m[keys.STATUS] == keys.ONLINE
         ]
 
-    def get_connectivity_for_machine(machine_name: str) -> dict:
+    @adaptermethod
+    def get_connectivity_for_machine(self, machine_name: str) -> dict:
         """
         Get connectivity of a machine (given its name)
 
@@ -385,7 +798,16 @@ class ApiAdapter(object):
         Returns:
             dict : dictionary that represents the connectivity of the machine
         """
-        machines = ApiAdapter.list_machines()
+        connectivity, _ = self._through_disk_cache(
+            "connectivity",
+            machine_name,
+            lambda: self._fetch_connectivity(machine_name),
+        )
+        return connectivity
+
+    @adaptermethod
+    def _fetch_connectivity(self, machine_name: str) -> dict:
+        machines = self.list_machines()
         target = [m for m in machines if m[keys.NAME] == machine_name]
         if len(target) < 1:
             raise ApiException(f"No machine available with name {machine_name}")
@@ -0,0 +1,180 @@
+"""
+Contains a persistent cache for Thunderhead payloads, shared by every process on a machine
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+import os
+import re
+import tempfile
+import time
+from pennylane_calculquebec.logger import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+CACHE_PATH_VARIABLE = "PLCQ_CACHE_PATH"
+CACHE_TTL_VARIABLE = "PLCQ_CACHE_TTL"
+
+
+def default_cache_directory() -> str:
+    """
+    Returns:
+        str : $XDG_CACHE_HOME/pennylane_calculquebec, or ~/.cache/pennylane_calculquebec if XDG_CACHE_HOME is not set
+    """
+    root = os.environ.get("XDG_CACHE_HOME", os.path.join("~", ".cache"))
+    return os.path.join(os.path.expanduser(root), "pennylane_calculquebec")
+
+
+class DiskCache:
+    """
+    a cache of json payloads, stored as files so that it outlives the process and is shared between processes.\n
+    Writes are atomic, and lock() lets processes agree on which one fetches a missing entry.
+    Entries older than the ttl are ignored.
+
+    Args:
+        directory (str) : where the entries are stored. Defaults to ~/.cache/pennylane_calculquebec
+        ttl (timedelta) : how long an entry stays valid. Defaults to 24 h
+    """
+
+    def __init__(self, directory: str = None, ttl: timedelta = timedelta(hours=24)):
+        self.directory = (
+            directory if directory is not None else default_cache_directory()
+        )
+        self.ttl = ttl
+
+    @staticmethod
+    def from_environment() -> "DiskCache":
+        """
+        builds a disk cache from the PLCQ_CACHE_PATH (directory) and PLCQ_CACHE_TTL (seconds) environment variables
+
+        Returns:
+            DiskCache : the disk cache, or None if PLCQ_CACHE_PATH is not set
+        """
+        directory = os.environ.get(CACHE_PATH_VARIABLE)
+        if directory is None:
+            return None
+
+        ttl = os.environ.get(CACHE_TTL_VARIABLE)
+        if ttl is None:
+            return DiskCache(directory or None)
+        return DiskCache(directory or None, timedelta(seconds=float(ttl)))
+
+    def _path(self, key: str, extension: str = ".json") -> str:
+        return os.path.join(
+            self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + extension
+        )
+
+    def get(self, key: str) -> tuple[any, datetime]:
+        """
+        reads an entry
+
+        Args:
+            key (str) : the key of the entry
+
+        Returns:
+            tuple[any, datetime] : the value of the entry and the time it was written. None if the entry is missing, unreadable or expired
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            saved_at = datetime.fromtimestamp(entry["saved_at"])
+            value = entry["value"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(
+                "Error %s in get located in DiskCache: %s",
+                type(e).__name__,
+                e,
+            )
+            return None
+
+        if datetime.now() - saved_at > self.ttl:
+            return None
+        return value, saved_at
+
+    def set(self, key: str, value: any):
+        """
+        writes an entry atomically. Readers see either the previous entry or the new one, never a partial write
+
+        Args:
+            key (str) : the key of the entry
+            value (any) : a json serializable value
+        """
+        temp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.directory, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as file:
+                temp_path = file.name
+                json.dump({"saved_at": time.time(), "value": value}, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self._path(key))
+        except Exception as e:
+            logger.error(
+                "Error %s in set located in DiskCache: %s",
+                type(e).__name__,
+                e,
+            )
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        holds an exclusive lock on an entry, across processes. Use it around a read, fetch and write sequence
+        so that only one process fetches a missing entry
+
+        Args:
+            key (str) : the key of the entry
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            file = open(self._path(key, ".lock"), "a+b")
+        except Exception as e:
+            # the cache is an optimization, so an unusable directory must not stop the caller
+            logger.error(
+                "Error %s in lock located in DiskCache: %s",
+                type(e).__name__,
+                e,
+            )
+            yield
+            return
+
+        with file:
+            DiskCache._lock_file(file)
+            try:
+                yield
+            finally:
+                DiskCache._unlock_file(file)
+
+    @staticmethod
+    def _lock_file(file):
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            return
+
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    @staticmethod
+    def _unlock_file(file):
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            return
+
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -6,9 +6,17 @@ from pennylane.tape import QuantumTape
 import json
 import time
 from pennylane_calculquebec.API.adapter import ApiAdapter
+from pennylane_calculquebec.API.polling import (
+    PollingStrategy,
+    AdaptivePolling,
+    retry_after,
+)
 from pennylane_calculquebec.utility.api import ApiUtility, JobStatus
 from typing import Callable
 
+# what 2 ^ 15 status checks took at the original fixed interval of 0.2 seconds
+DEFAULT_TIMEOUT = 2**15 * 0.2
+
 
 class JobException(Exception):
     def __init__(self, message: str):
@@ -30,23 +38,36 @@ class Job:
 
     Args:
         circuit (QuantumTape) : the circuit you want to execute
+        polling_strategy (PollingStrategy) : decides how long to wait between two status checks. Defaults to AdaptivePolling
+        adapter (ApiAdapter) : the adapter used to reach Thunderhead. Defaults to the default ApiAdapter instance
     """
 
     started: Callable[[int], None]
     status_changed: Callable[[int, str], None]
     completed: Callable[[int], None]
+    polling_strategy: PollingStrategy
+    request_count: int
+    adapter: ApiAdapter
 
     def __init__(
         self,
         circuit: QuantumTape,
+        polling_strategy: PollingStrategy = None,
+        adapter: ApiAdapter = None,
     ):
         self.started = None
         self.status_changed = None
         self.completed = None
+        self.polling_strategy = (
+            polling_strategy if polling_strategy is not None else AdaptivePolling()
+        )
+        self.request_count = 0
+        # calls made on the class go to the default instance
+        self.adapter = adapter if adapter is not None else ApiAdapter
         self.circuit_dict = ApiUtility.convert_circuit(circuit)
         self.shots = circuit.shots.total_shots
 
-    def run(self, max_tries: int = 2**15) -> dict:
+    def run(self, max_tries: int = 2**15, timeout: float = DEFAULT_TIMEOUT) -> dict:
         """
         converts a quantum tape into a dictionary, readable by thunderhead
         creates a job on thunderhead
@@ -54,52 +75,104 @@ class Job:
 
         Args:
             max_tries (int) : the number of tries before dropping a circuit. Defaults to 2 ^ 15
+            timeout (float) : the number of seconds before dropping a circuit, whatever the polling strategy. Defaults to DEFAULT_TIMEOUT (None for no limit)
+        """
+        job_id = self.post()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        current_status = ""
+        delay = self.polling_strategy.initial_delay()
+        for i in range(max_tries):
+            time.sleep(delay)
+            content, hint = self.poll(job_id)
+
+            current_status, histogram = self.update(job_id, current_status, content)
+            if histogram is not None:
+                return histogram
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            delay = self.polling_strategy.next_delay(current_status, delay, hint)
+            if deadline is not None:
+                # the last check happens at the deadline, not after it
+                delay = max(0.0, min(delay, deadline - time.monotonic()))
+
+        raise JobException(
+            "Couldn't finish job. Stuck on status : " + str(current_status)
+        )
+
+    def post(self) -> str:
+        """
+        creates the job on thunderhead and notifies the started callback
 
-        Args:
-            max_tries (int) : the number of tries before dropping a circuit. Defaults to 2 ^ 15
+        Raises:
+            - JobException
+
+        Returns:
+            str : the id of the created job
         """
+        response = self.adapter.post_job(
+            self.circuit_dict,
+            self.shots,
+        )
+        self.request_count += 1
+        if response.status_code != 200:
+            self.raise_api_error(response)
 
-        response = None
-        try:
-            response = ApiAdapter.post_job(
-                self.circuit_dict,
-                self.shots,
-            )
-        except:
-            raise
-        if response.status_code == 200:
-
-            current_status = ""
-            job_id = json.loads(response.text)["job"]["id"]
-            if self.started is not None:
-                self.started(job_id)
-            for i in range(max_tries):
-                time.sleep(0.2)
-                response = ApiAdapter.job_by_id(job_id)
-
-                if response.status_code != 200:
-                    self.raise_api_error(response)
-
-                content = json.loads(response.text)
-                status = content["job"]["status"]["type"]
-                if current_status != status:
-
-                    current_status = status
-                    if self.status_changed is not None:
-                        self.status_changed(job_id, status)
-
-                if status != JobStatus.SUCCEEDED.value:
-                    continue
-                if self.completed is not None:
-                    self.completed(job_id)
-
-                return content["result"]["histogram"]
-            raise JobException(
-                "Couldn't finish job. Stuck on status : " + str(current_status)
-            )
-        else:
+        job_id = json.loads(response.text)["job"]["id"]
+        if self.started is not None:
+            self.started(job_id)
+        return job_id
+
+    def poll(self, job_id: str) -> tuple[dict, float]:
+        """
+        fetches the current state of the job on thunderhead
+
+        Args:
+            job_id (str) : the id of the job
+
+        Raises:
+            - JobException
+
+        Returns:
+            tuple[dict, float] : the deserialized body of the job_by_id response, and the server's retry hint (None if there is none)
+        """
+        response = self.adapter.job_by_id(job_id)
+        self.request_count += 1
+        if response.status_code != 200:
             self.raise_api_error(response)
 
+        return json.loads(response.text), retry_after(response)
+
+    def update(
+        self, job_id: str, current_status: str, content: dict
+    ) -> tuple[str, dict]:
+        """
+        handles the content of a job_by_id response, notifying the status_changed and completed callbacks
+
+        Args:
+            job_id (str) : the id of the job
+            current_status (str) : the last status that was observed for this job
+            content (dict) : the deserialized body of the job_by_id response
+
+        Raises:
+            - JobException : the job failed or was cancelled
+
+        Returns:
+            tuple[str, dict] : the new status of the job, and its histogram if it succeeded (None otherwise)
+        """
+        status = content["job"]["status"]["type"]
+        if current_status != status and self.status_changed is not None:
+            self.status_changed(job_id, status)
+
+        if status in [JobStatus.FAILED.value, JobStatus.CANCELLED.value]:
+            raise JobException(f"Job {job_id} ended with status : {status}")
+
+        if status != JobStatus.SUCCEEDED.value:
+            return status, None
+
+        if self.completed is not None:
+            self.completed(job_id)
+        return status, content["result"]["histogram"]
+
     def raise_api_error(self, response):
         """
         this raises an error by parsing the json body of the response, and using the response text as message
@@ -0,0 +1,319 @@
+"""
+Contains an event-driven engine for running many MonarQ jobs at the same time
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from pennylane_calculquebec.API.adapter import ApiAdapter
+from pennylane_calculquebec.API.job import Job, JobException, DEFAULT_TIMEOUT
+from pennylane_calculquebec.utility.api import JobStatus, keys
+from pennylane_calculquebec.logger import logger
+
+
+class AsyncJob:
+    """
+    a handle on a job that has been posted on Thunderhead and whose completion is tracked by a JobManager.
+    It can be waited on with result(), or awaited from a coroutine.
+
+    Args:
+        job (Job) : the job that was posted
+        job_id (str) : the id Thunderhead gave to the job
+    """
+
+    def __init__(self, job: Job, job_id: str):
+        self.job = job
+        self.job_id = job_id
+        self.status = ""
+        self.tries = 0
+        self.submitted = time.monotonic()
+        self.delay = job.polling_strategy.initial_delay()
+        self.next_check = time.monotonic() + self.delay
+        self.future = Future()
+
+    def done(self) -> bool:
+        """
+        Returns:
+            bool : has the job succeeded, failed or been dropped?
+        """
+        return self.future.done()
+
+    def result(self, timeout: float = None) -> dict:
+        """
+        waits for the job to complete
+
+        Args:
+            timeout (float) : the maximum number of seconds to wait. Defaults to None (no limit)
+
+        Raises:
+            - JobException : the job failed, or was dropped
+
+        Returns:
+            dict : the histogram of the job
+        """
+        return self.future.result(timeout)
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+
+class JobManager:
+    """
+    posts jobs on Thunderhead and tracks their completion with a single polling thread.\n
+    The poller only runs while there are outstanding jobs, and resolves the future of each job
+    when it succeeds, fails or runs past its maximum number of tries or its timeout.\n
+    Each job is checked on its own schedule, given by the polling strategy of the job.
+    When many jobs are due at the same time, their statuses are refreshed with a single bulk request.
+
+    Args:
+        max_tries (int) : the number of status checks before dropping a job. Defaults to 2 ^ 15
+        timeout (float) : the number of seconds after its submission before dropping a job, whatever its polling strategy. Defaults to DEFAULT_TIMEOUT (None for no limit)
+        max_in_flight (int) : the maximum number of outstanding jobs. submit blocks while it is reached. Defaults to None (no limit)
+        batch_window (float) : jobs that are due within this many seconds of each other are checked together. Defaults to 0.05
+    """
+
+    def __init__(
+        self,
+        max_tries: int = 2**15,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_in_flight: int = None,
+        batch_window: float = 0.05,
+    ):
+        self.max_tries = max_tries
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self._slots = (
+            threading.BoundedSemaphore(max_in_flight)
+            if max_in_flight is not None
+            else None
+        )
+        self._jobs: dict[str, AsyncJob] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._poller: threading.Thread = None
+
+    @property
+    def outstanding(self) -> int:
+        """
+        the number of jobs that are currently tracked
+        """
+        with self._lock:
+            return len(self._jobs)
+
+    def submit(self, job: Job) -> AsyncJob:
+        """
+        posts a job and starts tracking it
+
+        Args:
+            job (Job) : the job to post
+
+        Raises:
+            - JobException : the job could not be created
+
+        Returns:
+            AsyncJob : a handle on the job's completion
+        """
+        if self._slots is not None:
+            self._slots.acquire()
+
+        try:
+            job_id = job.post()
+            async_job = AsyncJob(job, job_id)
+        except Exception:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+
+        with self._lock:
+            self._jobs[job_id] = async_job
+            self._wake.set()
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll, name="JobManager poller", daemon=True
+                )
+                self._poller.start()
+        return async_job
+
+    def drop(self, async_job: AsyncJob):
+        """
+        stops tracking a job. If it was still outstanding, its future is resolved with a JobException
+
+        Args:
+            async_job (AsyncJob) : the job to drop
+        """
+        self._resolve(
+            async_job.job_id,
+            exception=JobException(f"Job {async_job.job_id} was dropped"),
+        )
+
+    def close(self):
+        """
+        stops tracking every outstanding job. Their futures are resolved with a JobException
+        """
+        with self._lock:
+            async_jobs = list(self._jobs.values())
+        for async_job in async_jobs:
+            self.drop(async_job)
+
+    def _resolve(self, job_id: str, result: dict = None, exception: Exception = None):
+        """
+        stops tracking a job and sets the outcome of its future
+
+        Args:
+            job_id (str) : the id of the job
+            result (dict) : the histogram of the job, if it succeeded
+            exception (Exception) : the reason why the job did not succeed
+        """
+        with self._lock:
+            async_job = self._jobs.pop(job_id, None)
+        if async_job is None:
+            return
+
+        if self._slots is not None:
+            self._slots.release()
+
+        if exception is not None:
+            async_job.future.set_exception(exception)
+        else:
+            async_job.future.set_result(result)
+
+    def _poll(self):
+        """
+        the polling loop. Sleeps until the next job is due, checks every due job, and exits when there are none left.\n
+        If the loop itself fails, the outstanding jobs are resolved with the error, so that no one waits on them forever
+        """
+        error = None
+        try:
+            self._poll_loop()
+        except Exception as e:
+            logger.error(
+                "Error %s in _poll located in JobManager: %s", type(e).__name__, e
+            )
+            error = e
+        finally:
+            # once the poller is reset, the next submit starts a new one
+            with self._lock:
+                if self._poller is threading.current_thread():
+                    self._poller = None
+                job_ids = list(self._jobs) if error is not None else []
+            for job_id in job_ids:
+                self._resolve(job_id, exception=error)
+
+    def _poll_loop(self):
+        """
+        sleeps until the next job is due and checks every due job, until there are none left
+        """
+        while True:
+            with self._lock:
+                if len(self._jobs) <= 0:
+                    self._poller = None
+                    return
+                self._wake.clear()
+                next_check = min(job.next_check for job in self._jobs.values())
+
+            wait = next_check - time.monotonic()
+            # a newly submitted job may be due sooner than the ones we know of
+            if wait > 0 and self._wake.wait(wait):
+                continue
+
+            # jobs that are almost due are checked early, so they can share a bulk request
+            horizon = time.monotonic() + self.batch_window
+            with self._lock:
+                due = [job for job in self._jobs.values() if job.next_check <= horizon]
+            if len(due) > 1:
+                self._check_many(due)
+            else:
+                for async_job in due:
+                    self._check(async_job)
+
+    def _check_many(self, async_jobs: list[AsyncJob]):
+        """
+        refreshes the status of many jobs with a single bulk request, and resolves those that are over.\n
+        Jobs that succeeded without their results, or that the bulk request did not return, are checked one by one
+
+        Args:
+            async_jobs (list[AsyncJob]) : the jobs to check
+        """
+        # jobs that were posted through different adapters are refreshed separately
+        by_adapter: dict[ApiAdapter, list[AsyncJob]] = {}
+        for async_job in async_jobs:
+            by_adapter.setdefault(async_job.job.adapter, []).append(async_job)
+
+        contents = {}
+        for adapter, group in by_adapter.items():
+            try:
+                contents.update(adapter.jobs_by_ids([job.job_id for job in group]))
+                for async_job in group:
+                    async_job.job.request_count += 1
+            except Exception as e:
+                logger.error(
+                    "Error %s in _check_many located in JobManager: %s",
+                    type(e).__name__,
+                    e,
+                )
+
+        for async_job in async_jobs:
+            content = contents.get(async_job.job_id)
+            if content is None or JobManager._needs_result(content):
+                self._check(async_job)
+            else:
+                self._check(async_job, content)
+
+    @staticmethod
+    def _needs_result(content: dict) -> bool:
+        """
+        Args:
+            content (dict) : a job, as returned by the bulk request
+
+        Returns:
+            bool : did the job succeed without its histogram being part of the content?
+        """
+        status = content.get(keys.JOB, {}).get(keys.STATUS, {}).get(keys.TYPE)
+        if status != JobStatus.SUCCEEDED.value:
+            return status is None
+
+        result = content.get(keys.RESULT)
+        return not isinstance(result, dict) or result.get(keys.HISTOGRAM) is None
+
+    def _check(self, async_job: AsyncJob, content: dict = None):
+        """
+        fetches the status of a job and resolves it if it is over
+
+        Args:
+            async_job (AsyncJob) : the job to check
+            content (dict) : the state of the job, if it was already fetched. Defaults to None (fetch it)
+        """
+        try:
+            async_job.tries += 1
+            hint = None
+            if content is None:
+                content, hint = async_job.job.poll(async_job.job_id)
+            async_job.status, histogram = async_job.job.update(
+                async_job.job_id, async_job.status, content
+            )
+
+            deadline = (
+                async_job.submitted + self.timeout
+                if self.timeout is not None
+                else float("inf")
+            )
+            if histogram is not None:
+                self._resolve(async_job.job_id, result=histogram)
+            elif async_job.tries >= self.max_tries or time.monotonic() >= deadline:
+                self._resolve(
+                    async_job.job_id,
+                    exception=JobException(
+                        "Couldn't finish job. Stuck on status : "
+                        + str(async_job.status)
+                    ),
+                )
+            else:
+                # the polling strategy can be user-defined : if it fails, the job fails instead of the poller
+                async_job.delay = async_job.job.polling_strategy.next_delay(
+                    async_job.status, async_job.delay, hint
+                )
+                # the last check happens at the deadline, not after it
+                async_job.next_check = min(time.monotonic() + async_job.delay, deadline)
+        except Exception as e:
+            self._resolve(async_job.job_id, exception=e)
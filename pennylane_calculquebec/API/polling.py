@@ -0,0 +1,105 @@
+"""
+Contains polling strategies, which decide how long to wait between two status checks of a job
+"""
+
+from pennylane_calculquebec.utility.api import JobStatus
+
+
+def retry_after(response) -> float:
+    """
+    reads the Retry-After hint of a response, if the server sent one
+
+    Args:
+        response (Response) : a response from Thunderhead
+
+    Returns:
+        float : the number of seconds the server asks us to wait. None if there is no usable hint
+    """
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
+class PollingStrategy:
+    """
+    a base class for polling strategies. It decides how long a job waits before each status check
+    """
+
+    def initial_delay(self) -> float:
+        """
+        Returns:
+            float : the number of seconds to wait before the first status check
+        """
+        return 0.2
+
+    def next_delay(self, status: str, delay: float, hint: float = None) -> float:
+        """
+        Args:
+            status (str) : the status that was returned by the last status check
+            delay (float) : the delay that was used before the last status check
+            hint (float) : the number of seconds the server asked us to wait, if any
+
+        Returns:
+            float : the number of seconds to wait before the next status check
+        """
+        return delay if hint is None else max(delay, hint)
+
+
+class FixedPolling(PollingStrategy):
+    """
+    checks the status of a job at a fixed interval
+
+    Args:
+        interval (float) : the number of seconds between two status checks. Defaults to 0.2
+    """
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+
+    def initial_delay(self) -> float:
+        return self.interval
+
+    def next_delay(self, status: str, delay: float, hint: float = None) -> float:
+        return self.interval if hint is None else max(self.interval, hint)
+
+
+class AdaptivePolling(PollingStrategy):
+    """
+    backs off exponentially while a job is queued, and checks it tightly while it is running.
+    Server retry hints are always respected.
+
+    Args:
+        initial (float) : the number of seconds to wait before the first status check. Defaults to 0.2
+        backoff_factor (float) : the factor by which the delay grows after each check on a queued job. Defaults to 2.0
+        max_delay (float) : the longest delay between two checks on a queued job. Defaults to 5.0
+        running_delay (float) : the delay between two checks on a running job. Defaults to 0.1
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.2,
+        backoff_factor: float = 2.0,
+        max_delay: float = 5.0,
+        running_delay: float = 0.1,
+    ):
+        self.initial = initial
+        self.backoff_factor = backoff_factor
+        self.max_delay = max_delay
+        self.running_delay = running_delay
+
+    def initial_delay(self) -> float:
+        return self.initial
+
+    def next_delay(self, status: str, delay: float, hint: float = None) -> float:
+        if status == JobStatus.QUEUED.value:
+            delay = min(delay * self.backoff_factor, self.max_delay)
+        elif status == JobStatus.RUNNING.value:
+            delay = self.running_delay
+
+        return delay if hint is None else max(delay, hint)
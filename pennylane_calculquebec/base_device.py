@@ -3,6 +3,7 @@ Contains the Device implementation of monarq.default
 """
 
 from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
 from pennylane.devices import Device
 from pennylane.transforms import transform
 from pennylane.transforms.core import TransformProgram
@@ -10,6 +11,8 @@ from pennylane.tape import QuantumScript, QuantumTape
 from pennylane.devices import ExecutionConfig
 from pennylane_calculquebec.API.adapter import ApiAdapter
 from pennylane_calculquebec.processing import PreProcessor, PostProcessor
+from pennylane_calculquebec.processing.compiled_template import TEMPLATE_CACHE_SIZE
+from pennylane_calculquebec.utility.cache import LRUCache
 from pennylane_calculquebec.processing.config import (
     ProcessingConfig,
     MonarqDefaultConfig,
@@ -35,22 +38,63 @@ class BaseDevice(Device):
     }
 
     _client: ApiClient
+    _adapter: ApiAdapter
     _processing_config: ProcessingConfig
+    _max_concurrent_jobs: int
 
     @property
     def processing_config(self):
         return self._processing_config
 
-    def __init__(self, wires=None, shots=None, client=None, processing_config=None):
+    @property
+    def max_concurrent_jobs(self):
+        """
+        the maximum number of circuits from a batch that can be in flight at the same time
+        """
+        return self._max_concurrent_jobs
+
+    @property
+    def transpile_cache(self) -> LRUCache:
+        """
+        the transpiled circuits of this device, and the number of hits and misses (see LRUCache.stats). None if transpilation is not cached
+        """
+        return self._transpile_cache
+
+    def __init__(
+        self,
+        wires=None,
+        shots=None,
+        client=None,
+        processing_config=None,
+        max_concurrent_jobs: int = 1,
+        compile_templates: bool = False,
+        cache_transpilation: bool = False,
+    ):
         super().__init__(wires, shots)
         self._circuit_name = None
         self._project_name = None
         self._processing_config = processing_config
 
+        if not isinstance(max_concurrent_jobs, int) or max_concurrent_jobs < 1:
+            raise DeviceException(
+                "The maximum number of concurrent jobs must be a positive integer"
+            )
+        self._max_concurrent_jobs = max_concurrent_jobs
+        # circuits that only differ by their trainable parameters share a compiled template
+        self._templates = LRUCache(TEMPLATE_CACHE_SIZE) if compile_templates else None
+        # identical circuits (e.g. duplicates in a batch) are transpiled once
+        self._transpile_cache = (
+            PreProcessor.transpile_cache() if cache_transpilation else None
+        )
+
+        self._adapter = None
         if client is not None:
             self._client = client
             self._client.machine_name = self.machine_name
-            ApiAdapter.initialize(self._client)
+            # keep a connection alive for each job that can be in flight
+            self._adapter = ApiAdapter.initialize(
+                self._client, pool_size=max(10, self._max_concurrent_jobs)
+            )
 
     def preprocess(
         self,
@@ -70,7 +114,13 @@ class BaseDevice(Device):
         config = execution_config
 
         transform_program = TransformProgram()
-        processor = PreProcessor.get_processor(self._processing_config, self.wires)
+        processor = PreProcessor.get_processor(
+            self._processing_config,
+            self.wires,
+            self._templates,
+            self._transpile_cache,
+            self._adapter,
+        )
         transform_program.add_transform(transform=transform(processor))
         return transform_program, config
 
@@ -99,9 +149,31 @@ class BaseDevice(Device):
             # Fallback or default behavior if execution_config is not an instance of ExecutionConfig
             interface = None
 
-        results = [self._measure(tape) for tape in circuits]
+        results = self._measure_batch(circuits)
         return results if not is_single_circuit else results[0]
 
+    def _measure_batch(self, circuits: list[QuantumTape]) -> list:
+        """
+        measures every circuit of a batch. If the device allows more than one job in flight,
+        the circuits are submitted concurrently and the results are gathered as they complete.
+
+        Args :
+            circuits (list[QuantumTape]) : the tapes to measure
+
+        Returns :
+            list : the results of each tape, in the same order as the circuits
+        """
+        max_workers = min(self._max_concurrent_jobs, len(circuits))
+        if max_workers <= 1:
+            return [self._measure(tape) for tape in circuits]
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            return list(executor.map(self._measure, circuits))
+        finally:
+            # if a job fails, the circuits that were not submitted yet are dropped
+            executor.shutdown(cancel_futures=True)
+
     @property
     def machine_name(self):
         raise NotImplementedError()
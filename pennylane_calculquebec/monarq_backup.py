@@ -18,7 +18,7 @@ class MonarqBackup(MonarqDevice):
     """Backup device for interfacing with Anyon's quantum Hardware.
 
     * Extends the PennyLane :class:`~.pennylane.Device` class.
-    * Batching is not supported yet.
+    * Batches of circuits are submitted concurrently, up to ``max_concurrent_jobs`` jobs at a time.
 
     Args:
         wires (int, Iterable[Number, str]): Number of wires present on the device, or iterable that
@@ -28,13 +28,30 @@ class MonarqBackup(MonarqDevice):
             to use in executions involving this device.
         client (Client) : client information for connecting to MonarQ
         behaviour_config (Config) : behaviour changes to apply to the transpiler
+        max_concurrent_jobs (int) : the maximum number of jobs from a batch that can be in flight at the same time. Defaults to 8
+        polling_strategy (PollingStrategy) : decides how long to wait between two status checks of a job. Defaults to AdaptivePolling
     """
 
     name = "MonarqBackup"
     short_name = "monarq.backup"
 
-    def __init__(self, wires=None, shots=None, client=None, processing_config=None):
-        super().__init__(wires, shots, client, processing_config)
+    def __init__(
+        self,
+        wires=None,
+        shots=None,
+        client=None,
+        processing_config=None,
+        max_concurrent_jobs=8,
+        polling_strategy=None,
+    ):
+        super().__init__(
+            wires,
+            shots,
+            client,
+            processing_config,
+            max_concurrent_jobs,
+            polling_strategy,
+        )
 
     @property
     def machine_name(self):
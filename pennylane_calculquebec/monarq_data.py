@@ -10,6 +10,12 @@ from pennylane_calculquebec.utility.noise import (
     amplitude_damping,
 )
 import numpy as np
+import functools
+import hashlib
+import json
+import threading
+import types
+import weakref
 from pennylane_calculquebec.logger import logger
 
 """
@@ -30,16 +36,196 @@ from pennylane_calculquebec.logger import logger
 
 
 class Cache:
-    READOUT1_CZ = "readout1_cz"
-    RELAXATION = "relaxation"
-    DECOHERENCE = "decoherence"
-    QUBIT_NOISE = "qubit_noise"
-    COUPLER_NOISE = "coupler_noise"
-    READOUT_NOISE = "readout_noise"
+    BENCHMARK = "benchmark"
+    CALIBRATION = "calibration"
     CONNECTIVITY = "connectivity"
     OFFLINE_CONNECTIVITY = "offline_connectivity"
 
 
+class CalibrationSnapshot:
+    """
+    an immutable, indexed view of the benchmark of a machine. It is built once per benchmark,
+    and every value that is derived from the benchmark is computed up front.
+
+    Per-qubit values are read-only numpy arrays indexed by qubit id (nan for missing values),
+    and per-coupler values are indexed by coupler id. coupler_index maps a pair of qubits (in either order) to its coupler.
+    Mappings are read-only views and sequences are tuples, so the values served to callers can't be changed.
+
+    Args:
+        qubits_and_couplers (dict) : the benchmark of the machine (see ApiAdapter.get_qubits_and_couplers)
+        connectivity (dict[str, list[int]]) : the qubits linked by each coupler. Couplers missing from it are left out
+    """
+
+    TIME_STEP = 1e-6  # microsecond
+
+    def __init__(self, qubits_and_couplers: dict, connectivity: dict):
+        qubits = qubits_and_couplers[keys.QUBITS]
+        couplers = qubits_and_couplers.get(keys.COUPLERS, {})
+
+        self._set("version", CalibrationSnapshot.version_of(qubits_and_couplers))
+
+        # qubits, in benchmark order
+        qubit_ids = [int(qubit_id) for qubit_id in qubits]
+        size = max(qubit_ids) + 1 if len(qubit_ids) > 0 else 0
+
+        def per_qubit(key):
+            values = np.full(size, np.nan)
+            for qubit_id in qubits:
+                values[int(qubit_id)] = qubits[qubit_id].get(key, np.nan)
+            return CalibrationSnapshot._frozen(values)
+
+        self._set("qubit_ids", CalibrationSnapshot._frozen(np.array(qubit_ids, int)))
+        self._set("readout0", per_qubit(keys.READOUT_STATE_0_FIDELITY))
+        self._set("readout1", per_qubit(keys.READOUT_STATE_1_FIDELITY))
+        self._set("single_qubit_fidelity", per_qubit(keys.SINGLE_QUBIT_GATE_FIDELITY))
+        self._set("t1", per_qubit(keys.T1))
+        self._set("t2", per_qubit(keys.T2_RAMSEY))
+
+        # couplers that are in the connectivity, in benchmark order
+        coupler_ids = [
+            int(coupler_id) for coupler_id in couplers if coupler_id in connectivity
+        ]
+        wires = np.array(
+            [connectivity[str(coupler_id)][:2] for coupler_id in coupler_ids], int
+        ).reshape(-1, 2)
+        cz_fidelity = np.full(max(coupler_ids) + 1 if coupler_ids else 0, np.nan)
+        for coupler_id in coupler_ids:
+            cz_fidelity[coupler_id] = couplers[str(coupler_id)].get(
+                keys.CZ_GATE_FIDELITY, np.nan
+            )
+
+        coupler_index = {}
+        for coupler_id, (a, b) in zip(coupler_ids, wires.tolist()):
+            coupler_index[(a, b)] = coupler_id
+            coupler_index[(b, a)] = coupler_id
+
+        self._set(
+            "coupler_ids", CalibrationSnapshot._frozen(np.array(coupler_ids, int))
+        )
+        self._set("coupler_wires", CalibrationSnapshot._frozen(wires))
+        self._set("cz_fidelity", CalibrationSnapshot._frozen(cz_fidelity))
+        self._set("coupler_index", types.MappingProxyType(coupler_index))
+
+        # [[f0, 1 - f1], [1 - f0, f1]] for each qubit
+        readout_matrices = np.empty((size, 2, 2))
+        readout_matrices[:, 0, 0] = self.readout0
+        readout_matrices[:, 0, 1] = 1 - self.readout1
+        readout_matrices[:, 1, 0] = 1 - self.readout0
+        readout_matrices[:, 1, 1] = self.readout1
+        self._set("readout_matrices", CalibrationSnapshot._frozen(readout_matrices))
+
+        # the values served by monarq_data's getters
+        self._set(
+            "readout1_and_cz_fidelities",
+            types.MappingProxyType(
+                {
+                    keys.READOUT_STATE_1_FIDELITY: types.MappingProxyType(
+                        {
+                            str(qubit_id): float(self.readout1[qubit_id])
+                            for qubit_id in qubit_ids
+                        }
+                    ),
+                    keys.CZ_GATE_FIDELITY: types.MappingProxyType(
+                        {
+                            (a, b): float(cz_fidelity[coupler_id])
+                            for coupler_id, (a, b) in zip(coupler_ids, wires.tolist())
+                        }
+                    ),
+                }
+            ),
+        )
+        self._set(
+            "qubit_noise",
+            tuple(
+                depolarizing_noise(fidelity) if fidelity > 0 else None
+                for fidelity in self.single_qubit_fidelity[: len(qubit_ids)]
+            ),
+        )
+        self._set(
+            "coupler_noise",
+            types.MappingProxyType(
+                {
+                    (a, b): (
+                        depolarizing_noise(cz_fidelity[coupler_id])
+                        if cz_fidelity[coupler_id] > 0
+                        else None
+                    )
+                    for coupler_id, (a, b) in zip(coupler_ids, wires.tolist())
+                }
+            ),
+        )
+        self._set(
+            "relaxation",
+            tuple(
+                amplitude_damping(CalibrationSnapshot.TIME_STEP, t1)
+                for t1 in self.t1[: len(qubit_ids)]
+            ),
+        )
+        self._set(
+            "decoherence",
+            tuple(
+                phase_damping(CalibrationSnapshot.TIME_STEP, t2)
+                for t2 in self.t2[: len(qubit_ids)]
+            ),
+        )
+        # the matrices are views of readout_matrices, so they are read-only too
+        self._set("readout_noise", tuple(self.readout_matrices[: len(qubit_ids)]))
+
+    @staticmethod
+    def version_of(qubits_and_couplers: dict) -> str:
+        """
+        Args:
+            qubits_and_couplers (dict) : the benchmark of a machine
+
+        Returns:
+            str : a hash of the benchmark, which only changes when its values change
+        """
+        return hashlib.sha1(
+            json.dumps(qubits_and_couplers, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _frozen(array: np.ndarray) -> np.ndarray:
+        array.setflags(write=False)
+        return array
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CalibrationSnapshot is immutable")
+
+    def cz(self, a: int, b: int) -> float:
+        """
+        Args:
+            a (int) : a qubit
+            b (int) : another qubit
+
+        Returns:
+            float : the cz fidelity of the coupler between a and b. nan if they are not coupled
+        """
+        coupler_id = self.coupler_index.get((a, b))
+        return np.nan if coupler_id is None else float(self.cz_fidelity[coupler_id])
+
+    def broken_qubits_and_couplers(
+        self, q1_acceptance: float, q2_acceptance: float
+    ) -> dict:
+        """
+        Args:
+            q1_acceptance (float) : the lowest acceptable readout 1 fidelity
+            q2_acceptance (float) : the lowest acceptable cz fidelity
+
+        Returns:
+            dict : the qubits (keys.QUBITS) and couplers (keys.COUPLERS, as pairs of qubits) whose fidelities are too low or unknown
+        """
+        broken_couplers = ~(self.cz_fidelity[self.coupler_ids] >= q2_acceptance)
+        broken_qubits = ~(self.readout1[self.qubit_ids] >= q1_acceptance)
+        return {
+            keys.QUBITS: self.qubit_ids[broken_qubits].tolist(),
+            keys.COUPLERS: self.coupler_wires[broken_couplers].tolist(),
+        }
+
+
 cache = {
     "yamaska": {
         Cache.OFFLINE_CONNECTIVITY: {
@@ -92,13 +278,64 @@ cache = {
 }
 
 
+# the benchmark, calibration snapshot and connectivity of each machine, for each adapter, so that devices
+# on different clients don't read each other's calibration
+_derived: "weakref.WeakKeyDictionary[ApiAdapter, dict[str, dict]]" = (
+    weakref.WeakKeyDictionary()
+)
+_derived_lock = threading.Lock()
+
+
+def _resolve(adapter: ApiAdapter = None) -> ApiAdapter:
+    """
+    Args:
+        adapter (ApiAdapter) : an adapter, or None for the current one (see ApiAdapter.instance)
+
+    Returns:
+        ApiAdapter : the adapter. The class stands for the current instance when there is none yet
+    """
+    if adapter is not None:
+        return adapter
+    current = ApiAdapter.instance()
+    return current if current is not None else ApiAdapter
+
+
+def _machine_cache(machine_name: str, adapter: ApiAdapter) -> dict:
+    """
+    Args:
+        machine_name (str) : the name of the machine
+        adapter (ApiAdapter) : the adapter the machine's benchmark comes from
+
+    Returns:
+        dict : the elements derived from the benchmark of the machine, for this adapter
+    """
+    with _derived_lock:
+        machines = _derived.get(adapter)
+        if machines is None:
+            machines = _derived[adapter] = {}
+            # benchmarks are refreshed in the background by each adapter
+            listeners = getattr(adapter, "refresh_listeners", None)
+            if isinstance(listeners, list):
+                listeners.append(functools.partial(forget_benchmark, adapter=adapter))
+        return machines.setdefault(machine_name, {})
+
+
+def forget_benchmark(machine_name: str, adapter: ApiAdapter = None):
+    """
+    drops the calibration snapshot and the connectivity of a machine, so that they are rebuilt from the newest benchmark
+
+    Args:
+        machine_name (str) : the name of the machine
+        adapter (ApiAdapter) : the adapter whose benchmark changed. Defaults to None (the current one)
+    """
+    with _derived_lock:
+        _derived.get(_resolve(adapter), {}).pop(machine_name, None)
+
+
 def is_cache_out_of_date(machine_name: str, cache_element: str):
+    # elements that depend on the benchmark are dropped when a background refresh brings a new one (see forget_benchmark)
     try:
-        return (
-            ApiAdapter.is_last_update_expired()
-            or machine_name not in cache
-            or cache_element not in cache[machine_name]
-        )
+        return machine_name not in cache or cache_element not in cache[machine_name]
     except Exception as e:
         logger.error(
             "Error %s in is_cache_out_of_date located in monarq_data: %s",
@@ -136,16 +373,18 @@ def monarq_native_gates():
         return []
 
 
-def get_connectivity(machine_name, use_benchmark=True):
+def get_connectivity(machine_name, use_benchmark=True, adapter: ApiAdapter = None):
     try:
         if not use_benchmark:
             return cache[machine_name][Cache.OFFLINE_CONNECTIVITY]
 
-        if is_cache_out_of_date(machine_name, Cache.CONNECTIVITY):
-            cache[machine_name][Cache.CONNECTIVITY] = (
-                ApiAdapter.get_connectivity_for_machine(machine_name)
-            )
-        return cache[machine_name][Cache.CONNECTIVITY]
+        adapter = _resolve(adapter)
+        machine_cache = _machine_cache(machine_name, adapter)
+        connectivity = machine_cache.get(Cache.CONNECTIVITY)
+        if connectivity is None:
+            connectivity = adapter.get_connectivity_for_machine(machine_name)
+            machine_cache[Cache.CONNECTIVITY] = connectivity
+        return connectivity
     except Exception as e:
         logger.error(
             "Error %s in get_connectivity located in monarq_data: %s",
@@ -155,25 +394,13 @@ def get_connectivity(machine_name, use_benchmark=True):
         return {}
 
 
-def get_broken_qubits_and_couplers(q1Acceptance, q2Acceptance, machine_name):
+def get_broken_qubits_and_couplers(
+    q1Acceptance, q2Acceptance, machine_name, adapter: ApiAdapter = None
+):
     try:
-        val = (q1Acceptance, q2Acceptance)
-        qubits_and_couplers = ApiAdapter.get_qubits_and_couplers(machine_name)
-        broken_qubits_and_couplers = {keys.QUBITS: [], keys.COUPLERS: []}
-
-        for coupler_id in qubits_and_couplers[keys.COUPLERS]:
-            benchmark_coupler = qubits_and_couplers[keys.COUPLERS][coupler_id]
-            conn_coupler = get_connectivity(machine_name)[coupler_id]
-            if benchmark_coupler[keys.CZ_GATE_FIDELITY] >= val[1]:
-                continue
-            broken_qubits_and_couplers[keys.COUPLERS].append(conn_coupler)
-
-        for qubit_id in qubits_and_couplers[keys.QUBITS]:
-            benchmark_qubit = qubits_and_couplers[keys.QUBITS][qubit_id]
-            if benchmark_qubit[keys.READOUT_STATE_1_FIDELITY] >= val[0]:
-                continue
-            broken_qubits_and_couplers[keys.QUBITS].append(int(qubit_id))
-        return broken_qubits_and_couplers
+        return get_calibration(machine_name, adapter).broken_qubits_and_couplers(
+            q1Acceptance, q2Acceptance
+        )
     except Exception as e:
         logger.error(
             "Error %s in get_broken_qubits_and_couplers located in monarq_data: %s",
@@ -183,24 +410,92 @@ def get_broken_qubits_and_couplers(q1Acceptance, q2Acceptance, machine_name):
         return {keys.QUBITS: [], keys.COUPLERS: []}
 
 
-def get_readout1_and_cz_fidelities(machine_name):
+def get_calibration(machine_name, adapter: ApiAdapter = None) -> CalibrationSnapshot:
+    """
+    the calibration snapshot of a machine. Once the benchmark is out of date, it is only rebuilt if the adapter
+    brings a benchmark with different values
+
+    Args:
+        machine_name (str) : the name of the machine
+        adapter (ApiAdapter) : the adapter to get the benchmark from. Defaults to None (the current one)
+
+    Returns:
+        CalibrationSnapshot : the calibration of the machine
+    """
+    adapter = _resolve(adapter)
+    machine_cache = _machine_cache(machine_name, adapter)
+    snapshot = machine_cache.get(Cache.CALIBRATION)
+    if snapshot is not None and not adapter.is_last_update_expired(machine_name):
+        return snapshot
+
+    # the adapter keeps serving the same benchmark object until a refresh replaces it
+    benchmark = adapter.get_qubits_and_couplers(machine_name)
+    if snapshot is not None and machine_cache.get(Cache.BENCHMARK) is benchmark:
+        return snapshot
+
+    if snapshot is None or snapshot.version != CalibrationSnapshot.version_of(
+        benchmark
+    ):
+        snapshot = CalibrationSnapshot(
+            benchmark, get_connectivity(machine_name, adapter=adapter)
+        )
+        machine_cache[Cache.CALIBRATION] = snapshot
+    machine_cache[Cache.BENCHMARK] = benchmark
+    return snapshot
+
+
+def get_calibration_version(machine_name, adapter: ApiAdapter = None) -> str:
+    """
+    Args:
+        machine_name (str) : the name of the machine
+        adapter (ApiAdapter) : the adapter to get the benchmark from. Defaults to None (the current one)
+
+    Returns:
+        str : the version of the machine's calibration (see CalibrationSnapshot). None if it can't be fetched
+    """
     try:
-        if is_cache_out_of_date(machine_name, Cache.READOUT1_CZ):
-            cache[machine_name][Cache.READOUT1_CZ] = {
-                keys.READOUT_STATE_1_FIDELITY: {},
-                keys.CZ_GATE_FIDELITY: {},
-            }
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            for key in benchmark[keys.QUBITS]:
-                cache[machine_name][Cache.READOUT1_CZ][keys.READOUT_STATE_1_FIDELITY][
-                    key
-                ] = benchmark[keys.QUBITS][key][keys.READOUT_STATE_1_FIDELITY]
-            for key in benchmark[keys.COUPLERS]:
-                link = get_connectivity(machine_name)[key]
-                cache[machine_name][Cache.READOUT1_CZ][keys.CZ_GATE_FIDELITY][
-                    (link[0], link[1])
-                ] = benchmark[keys.COUPLERS][key][keys.CZ_GATE_FIDELITY]
-        return cache[machine_name][Cache.READOUT1_CZ]
+        return get_calibration(machine_name, adapter).version
+    except Exception as e:
+        logger.error(
+            "Error %s in get_calibration_version located in monarq_data: %s",
+            type(e).__name__,
+            e,
+        )
+        return None
+
+
+def get_cached_calibration_version(machine_name, adapter: ApiAdapter = None) -> str:
+    """
+    the version of the machine's calibration as it was last fetched. Unlike get_calibration_version, it never fetches the benchmark
+
+    Args:
+        machine_name (str) : the name of the machine
+        adapter (ApiAdapter) : the adapter the benchmark was fetched from. Defaults to None (the current one)
+
+    Returns:
+        str : the version of the machine's calibration (see CalibrationSnapshot). None if it wasn't fetched yet, or is out of date
+    """
+    try:
+        adapter = _resolve(adapter)
+        with _derived_lock:
+            snapshot = (
+                _derived.get(adapter, {}).get(machine_name, {}).get(Cache.CALIBRATION)
+            )
+        if snapshot is None or adapter.is_last_update_expired(machine_name):
+            return None
+        return snapshot.version
+    except Exception as e:
+        logger.error(
+            "Error %s in get_cached_calibration_version located in monarq_data: %s",
+            type(e).__name__,
+            e,
+        )
+        return None
+
+
+def get_readout1_and_cz_fidelities(machine_name, adapter: ApiAdapter = None):
+    try:
+        return get_calibration(machine_name, adapter).readout1_and_cz_fidelities
     except Exception as e:
         logger.error(
             "Error %s in get_readout1_and_cz_fidelities located in monarq_data: %s",
@@ -210,26 +505,9 @@ def get_readout1_and_cz_fidelities(machine_name):
         return {}
 
 
-def get_coupler_noise(machine_name) -> dict:
+def get_coupler_noise(machine_name, adapter: ApiAdapter = None) -> dict:
     try:
-        if is_cache_out_of_date(machine_name, Cache.COUPLER_NOISE):
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            cz_gate_fidelity = {}
-            num_couplers = len(benchmark[keys.COUPLERS])
-            for i in range(num_couplers):
-                cz_gate_fidelity[i] = benchmark[keys.COUPLERS][str(i)][
-                    keys.CZ_GATE_FIDELITY
-                ]
-            cz_gate_fidelity = list(cz_gate_fidelity.values())
-            coupler_noise_array = [
-                depolarizing_noise(fidelity) if fidelity > 0 else None
-                for fidelity in cz_gate_fidelity
-            ]
-            cache[machine_name][Cache.COUPLER_NOISE] = {}
-            for i, noise in enumerate(coupler_noise_array):
-                link = get_connectivity(machine_name)[str(i)]
-                cache[machine_name][Cache.COUPLER_NOISE][(link[0], link[1])] = noise
-        return cache[machine_name][Cache.COUPLER_NOISE]
+        return get_calibration(machine_name, adapter).coupler_noise
     except Exception as e:
         logger.error(
             "Error %s in get_coupler_noise located in monarq_data: %s",
@@ -239,22 +517,9 @@ def get_coupler_noise(machine_name) -> dict:
         return {}
 
 
-def get_qubit_noise(machine_name):
+def get_qubit_noise(machine_name, adapter: ApiAdapter = None):
     try:
-        if is_cache_out_of_date(machine_name, Cache.QUBIT_NOISE):
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            single_qubit_gate_fidelity = {}
-            num_qubits = len(benchmark[keys.QUBITS])
-            for i in range(num_qubits):
-                single_qubit_gate_fidelity[i] = benchmark[keys.QUBITS][str(i)][
-                    keys.SINGLE_QUBIT_GATE_FIDELITY
-                ]
-            single_qubit_gate_fidelity = list(single_qubit_gate_fidelity.values())
-            cache[machine_name][Cache.QUBIT_NOISE] = [
-                depolarizing_noise(fidelity) if fidelity > 0 else None
-                for fidelity in single_qubit_gate_fidelity
-            ]
-        return cache[machine_name][Cache.QUBIT_NOISE]
+        return get_calibration(machine_name, adapter).qubit_noise
     except Exception as e:
         logger.error(
             "Error %s in get_qubit_noise located in monarq_data: %s",
@@ -264,20 +529,9 @@ def get_qubit_noise(machine_name):
         return []
 
 
-def get_phase_damping(machine_name):
+def get_phase_damping(machine_name, adapter: ApiAdapter = None):
     try:
-        if is_cache_out_of_date(machine_name, Cache.DECOHERENCE):
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            time_step = 1e-6  # microsecond
-            num_qubits = len(benchmark[keys.QUBITS])
-            t2_values = {}
-            for i in range(num_qubits):
-                t2_values[i] = benchmark[keys.QUBITS][str(i)][keys.T2_RAMSEY]
-            t2_values = list(t2_values.values())
-            cache[machine_name][Cache.DECOHERENCE] = [
-                phase_damping(time_step, t2) for t2 in t2_values
-            ]
-        return cache[machine_name][Cache.DECOHERENCE]
+        return get_calibration(machine_name, adapter).decoherence
     except Exception as e:
         logger.error(
             "Error %s in get_phase_damping located in monarq_data: %s",
@@ -287,20 +541,9 @@ def get_phase_damping(machine_name):
         return []
 
 
-def get_amplitude_damping(machine_name):
+def get_amplitude_damping(machine_name, adapter: ApiAdapter = None):
     try:
-        if is_cache_out_of_date(machine_name, Cache.RELAXATION):
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            time_step = 1e-6  # microsecond
-            num_qubits = len(benchmark[keys.QUBITS])
-            t1_values = {}
-            for i in range(num_qubits):
-                t1_values[i] = benchmark[keys.QUBITS][str(i)][keys.T1]
-            t1_values = list(t1_values.values())
-            cache[machine_name][Cache.RELAXATION] = [
-                amplitude_damping(time_step, t1) for t1 in t1_values
-            ]
-        return cache[machine_name][Cache.RELAXATION]
+        return get_calibration(machine_name, adapter).relaxation
     except Exception as e:
         logger.error(
             "Error %s in get_amplitude_damping located in monarq_data: %s",
@@ -310,25 +553,9 @@ def get_amplitude_damping(machine_name):
         return []
 
 
-def get_readout_noise_matrices(machine_name):
+def get_readout_noise_matrices(machine_name, adapter: ApiAdapter = None):
     try:
-        if is_cache_out_of_date(machine_name, Cache.READOUT_NOISE):
-            benchmark = ApiAdapter.get_qubits_and_couplers(machine_name)
-            num_qubits = len(benchmark[keys.QUBITS])
-            readout_state_0_fidelity = []
-            readout_state_1_fidelity = []
-            for i in range(num_qubits):
-                readout_state_0_fidelity.append(
-                    benchmark[keys.QUBITS][str(i)][keys.READOUT_STATE_0_FIDELITY]
-                )
-                readout_state_1_fidelity.append(
-                    benchmark[keys.QUBITS][str(i)][keys.READOUT_STATE_1_FIDELITY]
-                )
-            cache[machine_name][Cache.READOUT_NOISE] = []
-            for f0, f1 in zip(readout_state_0_fidelity, readout_state_1_fidelity):
-                R = np.array([[f0, 1 - f1], [1 - f0, f1]])
-                cache[machine_name][Cache.READOUT_NOISE].append(R)
-        return cache[machine_name][Cache.READOUT_NOISE]
+        return get_calibration(machine_name, adapter).readout_noise
     except Exception as e:
         logger.error(
             "Error %s in get_readout_noise_matrices located in monarq_data: %s",
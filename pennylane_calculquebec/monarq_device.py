@@ -10,6 +10,8 @@ from pennylane_calculquebec.processing.config import (
 )
 from pennylane_calculquebec.API.client import ApiClient
 from pennylane_calculquebec.API.job import Job
+from pennylane_calculquebec.API.job_manager import JobManager
+from pennylane_calculquebec.API.polling import PollingStrategy
 from pennylane_calculquebec.device_exception import DeviceException
 from pennylane_calculquebec.base_device import BaseDevice
 from typing import Callable
@@ -20,7 +22,7 @@ class MonarqDevice(BaseDevice):
     """PennyLane device for interfacing with Anyon's quantum Hardware.
 
     * Extends the PennyLane :class:`~.pennylane.Device` class.
-    * Batching is not supported yet.
+    * Batches of circuits are submitted concurrently, up to ``max_concurrent_jobs`` jobs at a time.
 
     Args:
         wires (int, Iterable[Number, str]): Number of wires present on the device, or iterable that
@@ -30,6 +32,10 @@ class MonarqDevice(BaseDevice):
             to use in executions involving this device.
         client (Client) : client information for connecting to MonarQ
         behaviour_config (Config) : behaviour changes to apply to the transpiler
+        max_concurrent_jobs (int) : the maximum number of jobs from a batch that can be in flight at the same time. Defaults to 8
+        polling_strategy (PollingStrategy) : decides how long to wait between two status checks of a job. Defaults to AdaptivePolling
+        compile_templates (bool) : should circuits that only differ by their trainable parameters be transpiled once? Defaults to False
+        cache_transpilation (bool) : should circuits that were already transpiled be reused? Defaults to False
     """
 
     name = "MonarqDevice"
@@ -45,15 +51,29 @@ class MonarqDevice(BaseDevice):
         shots=None,
         client: ApiClient = None,
         processing_config: ProcessingConfig = None,
+        max_concurrent_jobs: int = 8,
+        polling_strategy: PollingStrategy = None,
+        compile_templates: bool = False,
+        cache_transpilation: bool = False,
     ) -> None:
         self.job_started = None
         self.job_status_changed = None
         self.job_completed = None
+        self.polling_strategy = polling_strategy
 
         if processing_config is None:
             processing_config = MonarqDefaultConfig(self.machine_name)
 
-        super().__init__(wires, shots, client, processing_config)
+        super().__init__(
+            wires,
+            shots,
+            client,
+            processing_config,
+            max_concurrent_jobs,
+            compile_templates,
+            cache_transpilation,
+        )
+        self._job_manager = JobManager(max_in_flight=max_concurrent_jobs)
 
         if (
             isinstance(shots, int)
@@ -102,6 +122,75 @@ class MonarqDevice(BaseDevice):
         Returns :
             a result, which format can change according to the measurement process
         """
+        measurement_method = MonarqDevice._get_measurement_method(tape)
+
+        job = Job(tape, self.polling_strategy, self._adapter)
+        job.started = self.job_started
+        job.status_changed = self.job_status_changed
+        job.completed = self.job_completed
+        results = job.run()
+
+        results = PostProcessor.get_processor(
+            self._processing_config, self.wires, self._adapter
+        )(tape, results)
+
+        return measurement_method(results)
+
+    def _measure_batch(self, circuits: list[QuantumTape]) -> list:
+        """
+        posts a job for every circuit of a batch up front, and gathers the results as the job manager completes them
+
+        Args :
+            circuits (list[QuantumTape]) : the tapes to measure
+
+        Returns :
+            list : the results of each tape, in the same order as the circuits
+        """
+        if min(self.max_concurrent_jobs, len(circuits)) <= 1:
+            return super()._measure_batch(circuits)
+
+        # validate every tape before posting anything
+        measurement_methods = [
+            MonarqDevice._get_measurement_method(tape) for tape in circuits
+        ]
+
+        async_jobs = []
+        try:
+            for tape in circuits:
+                job = Job(tape, self.polling_strategy, self._adapter)
+                job.started = self.job_started
+                job.status_changed = self.job_status_changed
+                job.completed = self.job_completed
+                async_jobs.append(self._job_manager.submit(job))
+
+            post_processor = PostProcessor.get_processor(
+                self._processing_config, self.wires, self._adapter
+            )
+            return [
+                measurement_method(post_processor(tape, async_job.result()))
+                for tape, async_job, measurement_method in zip(
+                    circuits, async_jobs, measurement_methods
+                )
+            ]
+        finally:
+            # if a job fails, the jobs that are still outstanding are dropped
+            for async_job in async_jobs:
+                self._job_manager.drop(async_job)
+
+    @staticmethod
+    def _get_measurement_method(tape: QuantumTape) -> Callable:
+        """
+        finds the function that converts counts to the measurement of a tape
+
+        Args :
+            tape (QuantumTape) : the tape to measure
+
+        Raises :
+            DeviceException : the tape has more than one measurement, or its measurement is not supported
+
+        Returns :
+            Callable : the measurement method
+        """
         if len(tape.measurements) != 1:
             raise DeviceException("Multiple measurements not supported")
         meas = type(tape.measurements[0]).__name__
@@ -112,15 +201,4 @@ class MonarqDevice(BaseDevice):
         ):
             raise DeviceException("Measurement not supported")
 
-        job = Job(tape)
-        job.started = self.job_started
-        job.status_changed = self.job_status_changed
-        job.completed = self.job_completed
-        results = job.run()
-
-        results = PostProcessor.get_processor(self._processing_config, self.wires)(
-            tape, results
-        )
-        measurement_method = MonarqDevice.measurement_methods[meas]
-
-        return measurement_method(results)
+        return MonarqDevice.measurement_methods[meas]
@@ -9,6 +9,7 @@ from pennylane_calculquebec.processing.config import MonarqDefaultConfig
 from pennylane.measurements import CountsMP
 from pennylane_calculquebec.device_exception import DeviceException
 from pennylane_calculquebec.base_device import BaseDevice
+from pennylane_calculquebec.API.adapter import ApiAdapter
 from pennylane_calculquebec.processing.steps import (
     GateNoiseSimulation,
     ReadoutNoiseSimulation,
@@ -76,21 +77,23 @@ class MonarqSim(BaseDevice):
             shots=1000,
         )
 
-        sim_tape = GateNoiseSimulation(
-            self.machine_name, self.use_benchmark_for_simulation
-        ).execute(counts_tape)
+        with ApiAdapter.use(self._adapter):
+            sim_tape = GateNoiseSimulation(
+                self.machine_name, self.use_benchmark_for_simulation
+            ).execute(counts_tape)
         results = qml.execute(
             [sim_tape],
             qml.device("default.mixed", wires=sim_tape.wires),
         )[0]
 
         # apply post processing
-        sim_results = ReadoutNoiseSimulation(
-            self.machine_name, self.use_benchmark_for_simulation
-        ).execute(counts_tape, results)
-        results = PostProcessor.get_processor(self._processing_config, self.wires)(
-            counts_tape, sim_results
-        )
+        with ApiAdapter.use(self._adapter):
+            sim_results = ReadoutNoiseSimulation(
+                self.machine_name, self.use_benchmark_for_simulation
+            ).execute(counts_tape, results)
+        results = PostProcessor.get_processor(
+            self._processing_config, self.wires, self._adapter
+        )(counts_tape, sim_results)
 
         # return desired measurement method
         measurement_method = MonarqSim.measurement_methods[meas]
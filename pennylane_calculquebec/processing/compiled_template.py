@@ -0,0 +1,303 @@
+"""
+Contains compiled templates : transpiled circuits whose parameters can be bound without transpiling them again
+"""
+
+from typing import Callable
+import warnings
+import numpy as np
+import pennylane as qml
+from pennylane.tape import QuantumTape
+from pennylane.operation import Operation, Operator
+from pennylane_calculquebec.processing.custom_gates import ParameterSlot
+
+TEMPLATE_CACHE_SIZE = 64
+
+# the rotations that are turned into slots, and the basis change around their Z rotation
+_ROTATIONS = {
+    "RZ": ([], []),
+    "PhaseShift": ([], []),
+    "RX": ([qml.Hadamard], [qml.Hadamard]),
+    "RY": ([qml.SX], [lambda wires: qml.adjoint(qml.SX(wires))]),
+}
+
+# arbitrary parameter values, used for finding how a gate's decomposition depends on its parameters
+_PROBES = np.random.default_rng(1234).uniform(0.2, 1.2, 64)
+
+
+class TemplateException(Exception):
+    pass
+
+
+def _affine_rotations(operation: Operation) -> list:
+    """decomposes a parametrized operation into constant operations and rotations whose angles are affine in the operation's parameters
+
+    Args:
+        operation (Operation): the operation to decompose
+
+    Raises:
+        TemplateException: the decomposition is not made of rotations that are affine in the operation's parameters
+
+    Returns:
+        list: constant operations, and (rotation name, wires, offset, slope of each parameter) for the rotations
+    """
+    if operation.name in _ROTATIONS and operation.num_params == 1:
+        return [(operation.name, operation.wires, 0.0, (1.0,))]
+
+    if operation.num_params > len(_PROBES):
+        raise TemplateException(f"{operation.name} has too many parameters")
+
+    def decompose(parameters):
+        try:
+            bound = qml.ops.functions.bind_new_parameters(operation, parameters)
+            return (
+                qml.tape.QuantumScript([bound])
+                .expand(
+                    depth=10,
+                    stop_at=lambda op: op.name in _ROTATIONS or op.num_params <= 0,
+                )
+                .operations
+            )
+        except Exception as e:
+            raise TemplateException(
+                f"{operation.name} can't be decomposed into rotations : {e}"
+            ) from e
+
+    probe = _PROBES[: operation.num_params]
+    base = decompose(list(probe))
+    # one decomposition for each parameter, and one for checking that the angles are affine
+    shifted = [
+        decompose(list(probe + np.eye(operation.num_params)[i]))
+        for i in range(operation.num_params)
+    ]
+    check_shift = _PROBES[::-1][: operation.num_params]
+    check = decompose(list(probe + check_shift))
+
+    structure = [(op.name, op.wires) for op in base]
+    for decomposition in shifted + [check]:
+        if [(op.name, op.wires) for op in decomposition] != structure:
+            raise TemplateException(
+                f"the decomposition of {operation.name} depends on its parameters"
+            )
+
+    result = []
+    for index, op in enumerate(base):
+        if op.num_params <= 0:
+            result.append(op)
+            continue
+
+        if op.name not in _ROTATIONS or op.num_params != 1:
+            raise TemplateException(f"{op.name} can't be part of a template")
+
+        angle = float(op.data[0])
+        # slopes are simple fractions, rounding removes the noise of the subtractions
+        slopes = tuple(
+            round(float(decomposition[index].data[0]) - angle, 9)
+            for decomposition in shifted
+        )
+        offset = round(angle - float(np.dot(slopes, probe)), 12)
+
+        expected = offset + np.dot(slopes, probe + check_shift)
+        error = (float(check[index].data[0]) - expected + np.pi) % (2 * np.pi) - np.pi
+        if abs(error) > 1e-8:
+            raise TemplateException(
+                f"the angles of {operation.name}'s decomposition are not affine in its parameters"
+            )
+
+        if all(slope == 0 for slope in slopes):
+            result.append(type(op)(offset, wires=op.wires))
+        else:
+            result.append((op.name, op.wires, offset, slopes))
+    return result
+
+
+def _around_slot(name: str, slot: int, wires) -> list[Operation]:
+    """
+    Args:
+        name (str): the name of the rotation
+        slot (int): the slot that holds the rotation's angle
+        wires (Wires): the wire of the rotation
+
+    Returns:
+        list[Operation]: a Z rotation slot, surrounded by the basis change of the rotation
+    """
+    before, after = _ROTATIONS[name]
+    return (
+        [gate(wires) for gate in before]
+        + [ParameterSlot(slot, wires)]
+        + [gate(wires) for gate in after]
+    )
+
+
+def _exact(parameter) -> tuple:
+    """
+    Args:
+        parameter (TensorLike): a parameter of an operator
+
+    Returns:
+        tuple: the parameter's type, shape and bytes, without rounding
+    """
+    value = np.asarray(qml.math.unwrap(parameter))
+    return (value.dtype.str, value.shape, value.tobytes())
+
+
+def operator_key(operator) -> tuple:
+    """
+    an exact description of an operation or a measurement, for caching what depends on it.\n
+    Pennylane computes hashes from rounded parameters, so operators whose parameters differ by less than the rounding
+    share a hash. Here parameters are kept as they are, and the hash only completes the description
+
+    Args:
+        operator (Operator | MeasurementProcess): the operation or measurement
+
+    Returns:
+        tuple: its type, wires, exact parameters, observable and hash
+    """
+    observable = getattr(operator, "obs", None)
+    return (
+        type(operator).__name__,
+        tuple(operator.wires),
+        tuple(_exact(parameter) for parameter in getattr(operator, "data", ())),
+        operator_key(observable) if isinstance(observable, Operator) else None,
+        operator.hash,
+    )
+
+
+class CompiledTemplate:
+    """
+    a transpiled circuit in which the parametrized gates of the original circuit are replaced with Z rotation slots.\n
+    Each slot's angle is an affine function of the original circuit's parameters, so new parameters are bound
+    in a single pass over the gates, without transpiling the circuit again.\n
+    Slots are never merged with other rotations, and angles that happen to be trivial are not removed,
+    so a template can be a few gates longer than a circuit transpiled with its parameters
+
+    Args:
+        operations (list[Operation]): the transpiled operations, with parameter slots
+        measurements (list[MeasurementProcess]): the transpiled measurements
+        slots (list[tuple[float, tuple]]): the offset of each slot's angle, and the (parameter index, slope) pairs it depends on
+    """
+
+    def __init__(self, operations, measurements, slots):
+        self.operations = operations
+        self.measurements = measurements
+        self.slots = slots
+
+    @staticmethod
+    def _slotted(tape: QuantumTape) -> list[bool]:
+        """
+        Args:
+            tape (QuantumTape): a quantum tape
+
+        Returns:
+            list[bool]: for each operation, does it have trainable parameters? Those are the operations that are turned into slots
+        """
+        trainable = set(tape.trainable_params)
+        slotted = []
+        position = 0
+        for operation in tape.operations:
+            slotted.append(
+                any(
+                    index in trainable
+                    for index in range(position, position + operation.num_params)
+                )
+            )
+            position += operation.num_params
+        return slotted
+
+    @staticmethod
+    def key(tape: QuantumTape, fingerprint: str) -> tuple:
+        """
+        Args:
+            tape (QuantumTape): the tape to transpile
+            fingerprint (str): the fingerprint of the steps the tape goes through (see ProcessingConfig.fingerprint)
+
+        Returns:
+            tuple: what a template depends on : the tape without its trainable parameters (the others are exact, see operator_key), and the steps
+        """
+        operations = tuple(
+            (
+                (operation.name, tuple(operation.wires), operation.num_params)
+                if slotted
+                else operator_key(operation)
+            )
+            for operation, slotted in zip(
+                tape.operations, CompiledTemplate._slotted(tape)
+            )
+        )
+        return (
+            operations,
+            tuple(operator_key(measurement) for measurement in tape.measurements),
+            fingerprint,
+        )
+
+    @staticmethod
+    def compile(
+        tape: QuantumTape, transpile: Callable[[QuantumTape], QuantumTape]
+    ) -> "CompiledTemplate":
+        """turns the trainable gates of a tape into slots, and transpiles it
+
+        Args:
+            tape (QuantumTape): the tape to compile
+            transpile (Callable[[QuantumTape], QuantumTape]): the transpilation steps
+
+        Raises:
+            TemplateException: a trainable gate can't be turned into slots
+
+        Returns:
+            CompiledTemplate: the compiled template
+        """
+        operations = []
+        slots = []
+        position = 0
+        for operation, slotted in zip(tape.operations, CompiledTemplate._slotted(tape)):
+            first_parameter = position
+            position += operation.num_params
+            if not slotted:
+                operations.append(operation)
+                continue
+
+            for rotation in _affine_rotations(operation):
+                if isinstance(rotation, Operation):
+                    operations.append(rotation)
+                    continue
+
+                name, wires, offset, slopes = rotation
+                terms = tuple(
+                    (first_parameter + index, slope)
+                    for index, slope in enumerate(slopes)
+                    if slope != 0
+                )
+                operations += _around_slot(name, len(slots), wires)
+                slots.append((offset, terms))
+
+        with warnings.catch_warnings():
+            # slots have no decomposition, which decomposition steps warn about
+            warnings.filterwarnings("ignore", message="Operator ParameterSlot")
+            compiled = transpile(
+                type(tape)(operations, tape.measurements, shots=tape.shots)
+            )
+        return CompiledTemplate(compiled.operations, compiled.measurements, slots)
+
+    def bind(self, tape: QuantumTape) -> QuantumTape:
+        """fills the slots with the parameters of a tape
+
+        Args:
+            tape (QuantumTape): a tape with the same key as the tape the template was compiled from
+
+        Returns:
+            QuantumTape: the transpiled tape
+        """
+        parameters = tape.get_parameters(trainable_only=False)
+        angles = [
+            (offset + sum(slope * float(parameters[index]) for index, slope in terms))
+            % (2 * np.pi)
+            for offset, terms in self.slots
+        ]
+        operations = [
+            (
+                qml.RZ(angles[operation.slot], operation.wires)
+                if isinstance(operation, ParameterSlot)
+                else operation
+            )
+            for operation in self.operations
+        ]
+        return type(tape)(operations, self.measurements, shots=tape.shots)
@@ -16,6 +16,7 @@ from pennylane_calculquebec.processing.steps import (
     PrintTape,
 )
 from typing import Callable
+import hashlib
 
 
 class ProcessingConfig:
@@ -60,6 +61,19 @@ class ProcessingConfig:
 
         return True
 
+    def fingerprint(self) -> str:
+        """
+        a stable hash of the steps, in order (see BaseStep.fingerprint). Configs that are equal have the same fingerprint,
+        as long as the calibration doesn't change
+
+        Returns:
+            (str) : the fingerprint of the config. None if a step has no fingerprint yet
+        """
+        fingerprints = [step.fingerprint() for step in self.steps]
+        if None in fingerprints:
+            return None
+        return hashlib.sha1(",".join(fingerprints).encode()).hexdigest()
+
     def __getitem__(self, idx: int) -> BaseStep:
         """returns step at index idx
 
@@ -481,3 +481,35 @@ class ZM90(Operation):
 
     def single_qubit_rot_angles(self):
         return [-np.pi / 2, 0, 0]
+
+
+class ParameterSlot(Operation):
+    r"""ParameterSlot(slot, wires)
+    A rotation around the Z axis whose angle is not known yet. Compiled templates use it in place of
+    parametrized gates, and replace it with a RZ once the parameters are bound (see CompiledTemplate)
+
+    **Details:**
+
+    * Number of wires: 1
+    * Number of parameters: 0
+
+    Args:
+        slot (int): the index of the slot in its template
+        wires (Sequence[int] or int): the wire the operation acts on
+    """
+
+    num_wires = 1
+    num_params = 0
+    """int: Number of trainable parameters that the operator depends on."""
+
+    basis = "Z"
+
+    batch_size = None
+
+    def __init__(self, slot: int, wires, id=None):
+        self.hyperparameters["slot"] = slot
+        super().__init__(wires=wires, id=id)
+
+    @property
+    def slot(self) -> int:
+        return self.hyperparameters["slot"]
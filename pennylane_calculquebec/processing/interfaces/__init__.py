@@ -2,3 +2,4 @@
 
 from .post_proc_step import PostProcStep
 from .pre_proc_step import PreProcStep
+from .native_step import NativeStep
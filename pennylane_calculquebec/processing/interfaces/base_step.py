@@ -3,6 +3,41 @@ This is a base class for every processing steps. \n
 This should probably not be used. Try using PreProcStep or PostProcStep.
 """
 
+import hashlib
+import numpy as np
+from pennylane_calculquebec.monarq_data import get_cached_calibration_version
+
+
+def canonical(value) -> str:
+    """
+    a deterministic text representation of a value, which doesn't depend on memory addresses or on the order of dicts and sets
+
+    Args:
+        value (any) : the value to represent
+
+    Returns:
+        str : the representation of the value
+    """
+    if isinstance(value, BaseStep):
+        return value.fingerprint()
+    if isinstance(value, dict):
+        items = sorted((canonical(key), canonical(item)) for key, item in value.items())
+        return "{" + ",".join(f"{key}:{item}" for key, item in items) + "}"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(canonical(item) for item in value)) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(canonical(item) for item in value) + "]"
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return f"ndarray({value.dtype},{value.shape},{digest})"
+    if value is None or isinstance(value, (bool, int, float, complex, str, np.generic)):
+        return repr(value)
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    if hasattr(value, "__dict__"):
+        return f"{type(value).__qualname__}({canonical(vars(value))})"
+    return type(value).__qualname__
+
 
 class BaseStep:
     """
@@ -10,4 +45,51 @@ class BaseStep:
     Adding a step to a TranspilerConfig means it will be applied in the preprocess step of MonarqDevice.
     """
 
-    pass
+    # attributes that hold results of the step rather than parameters, and are left out of the fingerprint
+    _fingerprint_exclude: tuple[str] = ()
+
+    def uses_calibration(self) -> bool:
+        """
+        Returns:
+            bool : does the step depend on the calibration of a machine?
+        """
+        return getattr(self, "machine_name", None) is not None and getattr(
+            self, "use_benchmark", True
+        )
+
+    def calibration_version(self) -> str:
+        """
+        the version of the calibration the step depends on, as it was last fetched. It is never fetched here
+
+        Returns:
+            str : the calibration version. None if the step doesn't use benchmarks, or if its calibration wasn't fetched yet
+        """
+        if not self.uses_calibration():
+            return None
+        return get_cached_calibration_version(self.machine_name)
+
+    def fingerprint(self) -> str:
+        """
+        a stable hash of the step's type, parameters and calibration version.
+        Steps that would process a circuit in the same way have the same fingerprint, in any process
+
+        Returns:
+            str : the fingerprint of the step. None if the step uses a calibration whose version isn't known yet, in which case its results can't be cached
+        """
+        calibration_version = self.calibration_version()
+        if calibration_version is None and self.uses_calibration():
+            return None
+
+        parameters = {
+            name: value
+            for name, value in vars(self).items()
+            if name not in self._fingerprint_exclude
+        }
+        description = "|".join(
+            [
+                f"{type(self).__module__}.{type(self).__qualname__}",
+                canonical(parameters),
+                canonical(calibration_version),
+            ]
+        )
+        return hashlib.sha1(description.encode()).hexdigest()
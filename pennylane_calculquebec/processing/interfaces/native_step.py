@@ -0,0 +1,37 @@
+"""
+Contains a base class for pre-processing steps that act on circuits made of native gates
+"""
+
+from pennylane.tape import QuantumTape
+from pennylane_calculquebec.processing.interfaces.pre_proc_step import PreProcStep
+from pennylane_calculquebec.processing.native_circuit import NativeCircuit
+
+
+class NativeStep(PreProcStep):
+    """a base class that represents pre-processing steps that act on circuits made of native gates (see NativeCircuit).\n
+    The pre-processor runs consecutive native steps on the same NativeCircuit, and only materializes a tape after the last one
+    """
+
+    def execute_native(self, circuit: NativeCircuit) -> NativeCircuit:
+        """
+        applies processing on a native circuit
+
+        Args:
+            circuit (NativeCircuit) : the native representation of the quantum circuit
+
+        Returns:
+            NativeCircuit : the processed circuit
+        """
+        return circuit
+
+    def execute(self, tape: QuantumTape) -> QuantumTape:
+        """
+        applies processing on a quantum circuit, through its native representation
+
+        Args:
+            tape (QuantumTape) : the tape representation of the quantum circuit
+
+        Returns:
+            QuantumTape : the processed tape
+        """
+        return self.execute_native(NativeCircuit.from_tape(tape)).to_tape(type(tape))
@@ -6,6 +6,7 @@ from copy import deepcopy
 from pennylane.tape import QuantumTape
 from pennylane_calculquebec.processing.config import ProcessingConfig
 from pennylane_calculquebec.processing.interfaces import PostProcStep
+from pennylane_calculquebec.API.adapter import ApiAdapter
 from pennylane_calculquebec.logger import logger
 
 
@@ -15,13 +16,16 @@ class PostProcessor:
     """
 
     @staticmethod
-    def get_processor(behaviour_config: ProcessingConfig, circuit_wires):
+    def get_processor(
+        behaviour_config: ProcessingConfig, circuit_wires, adapter: ApiAdapter = None
+    ):
         """
         returns a function that applies the steps contained in the supplied ProcessingConfig
 
         Args:
             behaviour_config (ProcessingConfig): a processing config to apply
             circuit_wires (list[int]): the wires in the circuit
+            adapter (ApiAdapter): the adapter the steps read calibrations through (see ApiAdapter.use). Defaults to None (the current one)
         """
 
         def process(tape: QuantumTape, results: dict[str, int]):
@@ -49,8 +53,11 @@ class PostProcessor:
                     if isinstance(step, PostProcStep)
                 ]
                 processed_results = deepcopy(results)
-                for step in postproc_steps:
-                    processed_results = step.execute(expanded_tape, processed_results)
+                with ApiAdapter.use(adapter):
+                    for step in postproc_steps:
+                        processed_results = step.execute(
+                            expanded_tape, processed_results
+                        )
                 return processed_results
             except Exception as e:
                 logger.error(
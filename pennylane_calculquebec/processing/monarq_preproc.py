@@ -3,14 +3,25 @@ Contains a processor class for pre-processing steps
 """
 
 from copy import deepcopy
+import sys
 from pennylane.tape import QuantumTape
 import pennylane as qml
 from pennylane.transforms import transform
 from pennylane_calculquebec.processing.config import ProcessingConfig
-from pennylane_calculquebec.processing.interfaces import PreProcStep
+from pennylane_calculquebec.processing.interfaces import PreProcStep, NativeStep
+from pennylane_calculquebec.processing.native_circuit import NativeCircuit
+from pennylane_calculquebec.processing.compiled_template import (
+    CompiledTemplate,
+    operator_key,
+)
+from pennylane_calculquebec.utility.cache import LRUCache
+from pennylane_calculquebec.API.adapter import ApiAdapter
 from autograd.numpy.numpy_boxes import ArrayBox
 from pennylane_calculquebec.logger import logger
 
+TRANSPILE_CACHE_SIZE = 256
+TRANSPILE_CACHE_BYTES = 64 * 2**20
+
 
 class PreProcessor:
     """
@@ -18,15 +29,90 @@ class PreProcessor:
     """
 
     @staticmethod
-    def get_processor(behaviour_config: ProcessingConfig, circuit_wires):
+    def get_processor(
+        behaviour_config: ProcessingConfig,
+        circuit_wires,
+        templates: LRUCache = None,
+        transpiled: LRUCache = None,
+        adapter: ApiAdapter = None,
+    ):
         """
         returns a transform that goes through given transpilation steps\n
         every step is optional and new steps can be added, leaving modularity to the end user\n
+        With a template cache, circuits are compiled once per structure, and their trainable parameters are bound
+        to the compiled template (see CompiledTemplate).\n
+        With a transpilation cache, a circuit that was already transpiled with the same configuration is not transpiled again,
+        even if its number of shots changed
 
         Args\n
             config (Config) : defines which transpilation steps you want to run on your code\n
-            circuit_wires (list[int]) : the wires defined in the circuit
+            circuit_wires (list[int]) : the wires defined in the circuit\n
+            templates (LRUCache) : where compiled templates are kept. Defaults to None (every circuit is transpiled)\n
+            transpiled (LRUCache) : where transpiled circuits are kept (see PreProcessor.transpile_cache). Defaults to None (no caching)\n
+            adapter (ApiAdapter) : the adapter the steps read calibrations through (see ApiAdapter.use). Defaults to None (the current one)
         """
+        prerpoc_steps = [
+            step for step in behaviour_config.steps if isinstance(step, PreProcStep)
+        ]
+        # only pre-processing steps change the transpiled circuit
+        with ApiAdapter.use(adapter):
+            fingerprint = (
+                ProcessingConfig(*prerpoc_steps).fingerprint()
+                if templates is not None or transpiled is not None
+                else None
+            )
+        # until the calibration the steps use is fetched, nothing is cached
+        if fingerprint is None:
+            templates = transpiled = None
+
+        # consecutive native steps share a native circuit, which is only materialized after the last one.
+        # A single native step is run on the tape, since it would materialize it right away
+        runs = []
+        for step in prerpoc_steps:
+            if (
+                isinstance(step, NativeStep)
+                and runs
+                and isinstance(runs[-1][-1], NativeStep)
+            ):
+                runs[-1].append(step)
+            else:
+                runs.append([step])
+
+        def run_steps(tape: QuantumTape) -> QuantumTape:
+            with qml.QueuingManager.stop_recording(), ApiAdapter.use(adapter):
+                for run in runs:
+                    if len(run) == 1:
+                        tape = run[0].execute(tape)
+                        continue
+
+                    circuit = NativeCircuit.from_tape(tape)
+                    for step in run:
+                        circuit = step.execute_native(circuit)
+                    tape = circuit.to_tape(type(tape))
+            return tape
+
+        def from_template(tape: QuantumTape) -> QuantumTape:
+            """
+            Args:
+                tape (QuantumTape) : the tape to transpile
+
+            Returns:
+                QuantumTape : the tape, bound to its compiled template. None if it can't be compiled as a template
+            """
+            try:
+                key = CompiledTemplate.key(tape, fingerprint)
+                template = templates.get(key)
+                if template is None:
+                    template = CompiledTemplate.compile(tape, run_steps)
+                    templates.put(key, template)
+                return template.bind(tape)
+            except Exception as e:
+                logger.error(
+                    "Error %s in get_processor.from_template located in PreProcessor: %s",
+                    type(e).__name__,
+                    e,
+                )
+                return None
 
         def transpile(tape: QuantumTape):
             """
@@ -44,19 +130,31 @@ class PreProcessor:
                 )
                 optimized_tape = PreProcessor.expand_full_measurements(tape, wires)
                 optimized_tape = PreProcessor.unroll_array_boxes(optimized_tape, wires)
-                with qml.QueuingManager.stop_recording():
-                    prerpoc_steps = [
-                        step
-                        for step in behaviour_config.steps
-                        if isinstance(step, PreProcStep)
-                    ]
-                    for step in prerpoc_steps:
-                        optimized_tape = step.execute(optimized_tape)
+
+                key = None
+                if transpiled is not None:
+                    key = (PreProcessor.tape_key(optimized_tape), fingerprint)
+                    cached = transpiled.get(key)
+                    if cached is not None:
+                        operations, measurements = cached
+                        new_tape = type(tape)(
+                            operations, measurements, shots=optimized_tape.shots
+                        )
+                        return [new_tape], lambda res: res[0]
+
+                bound_tape = (
+                    from_template(optimized_tape) if templates is not None else None
+                )
+                optimized_tape = (
+                    bound_tape if bound_tape is not None else run_steps(optimized_tape)
+                )
                 new_tape = type(tape)(
                     optimized_tape.operations,
                     optimized_tape.measurements,
                     shots=optimized_tape.shots,
                 )
+                if key is not None:
+                    transpiled.put(key, (new_tape.operations, new_tape.measurements))
                 return [new_tape], lambda res: res[0]
             except Exception as e:
                 logger.error(
@@ -68,6 +166,54 @@ class PreProcessor:
 
         return transpile
 
+    @staticmethod
+    def transpile_cache(
+        max_size: int = TRANSPILE_CACHE_SIZE, max_bytes: int = TRANSPILE_CACHE_BYTES
+    ) -> LRUCache:
+        """
+        a cache for transpiled circuits, to be given to get_processor. Its stats() tell how many circuits were not transpiled again
+
+        Args:
+            max_size (int) : the maximum number of transpiled circuits. Defaults to 256
+            max_bytes (int) : the maximum estimated size of the transpiled circuits, in bytes. Defaults to 64 MiB
+
+        Returns:
+            LRUCache : the cache
+        """
+        return LRUCache(max_size, max_bytes, PreProcessor.estimate_size)
+
+    @staticmethod
+    def tape_key(tape: QuantumTape) -> tuple:
+        """
+        Args:
+            tape (QuantumTape) : a tape without array boxes
+
+        Returns:
+            tuple : the operations, exact parameters, wires and measurements of the tape (see operator_key), but not its shots
+        """
+        return (
+            tuple(operator_key(operation) for operation in tape.operations),
+            tuple(operator_key(measurement) for measurement in tape.measurements),
+        )
+
+    @staticmethod
+    def estimate_size(transpiled: tuple) -> int:
+        """
+        Args:
+            transpiled (tuple) : the operations and measurements of a transpiled tape
+
+        Returns:
+            int : a rough estimate of their size in memory, in bytes
+        """
+        operations, measurements = transpiled
+        return sum(
+            sys.getsizeof(item)
+            + sys.getsizeof(vars(item))
+            + sys.getsizeof(item.wires)
+            + sum(sys.getsizeof(parameter) for parameter in getattr(item, "data", ()))
+            for item in list(operations) + list(measurements)
+        )
+
     @staticmethod
     def unroll_array_boxes(tape: QuantumTape, wires):
         """sets array boxes to the value they're currently at
@@ -80,9 +226,9 @@ class PreProcessor:
             QuantumTape: the tape without variable values in it
         """
         try:
-            tape = deepcopy(tape)
             operations = []
 
+            # operations without array boxes are kept as they are, only the others are copied
             for operation in tape.operations:
                 if operation.num_params < 0:
                     operations.append(operation)
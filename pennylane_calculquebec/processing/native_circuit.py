@@ -0,0 +1,216 @@
+"""
+Contains a compact representation of circuits made of MonarQ-native gates, for pre-processing steps that don't need pennylane operations
+"""
+
+from typing import Iterable
+import numpy as np
+import pennylane as qml
+from pennylane.tape import QuantumTape
+from pennylane.operation import Operation
+import pennylane_calculquebec.processing.custom_gates as custom
+
+# the code of a gate is its index in this tuple
+NATIVE_GATES = (
+    "T",
+    "TDagger",
+    "PauliX",
+    "PauliY",
+    "PauliZ",
+    "X90",
+    "Y90",
+    "Z90",
+    "XM90",
+    "YM90",
+    "ZM90",
+    "PhaseShift",
+    "CZ",
+    "RZ",
+    "Identity",
+    "ParameterSlot",
+)
+CODES = {name: code for code, name in enumerate(NATIVE_GATES)}
+
+_GATE_TYPES = {
+    "T": qml.T,
+    "TDagger": custom.TDagger,
+    "PauliX": qml.PauliX,
+    "PauliY": qml.PauliY,
+    "PauliZ": qml.PauliZ,
+    "X90": custom.X90,
+    "Y90": custom.Y90,
+    "Z90": custom.Z90,
+    "XM90": custom.XM90,
+    "YM90": custom.YM90,
+    "ZM90": custom.ZM90,
+    "PhaseShift": qml.PhaseShift,
+    "CZ": qml.CZ,
+    "RZ": qml.RZ,
+    "Identity": qml.Identity,
+    "ParameterSlot": custom.ParameterSlot,
+}
+
+PARAMETRIZED = frozenset(CODES[name] for name in ["PhaseShift", "RZ"])
+
+# the axis around which each single qubit gate rotates, and its angle, up to a global phase.
+# The angle of parametrized gates is None, since it is stored in the circuit
+ROTATIONS = {
+    "T": ("Z", np.pi / 4),
+    "TDagger": ("Z", -np.pi / 4),
+    "PauliZ": ("Z", np.pi),
+    "Z90": ("Z", np.pi / 2),
+    "ZM90": ("Z", -np.pi / 2),
+    "RZ": ("Z", None),
+    "PhaseShift": ("Z", None),
+    "PauliX": ("X", np.pi),
+    "X90": ("X", np.pi / 2),
+    "XM90": ("X", -np.pi / 2),
+    "PauliY": ("Y", np.pi),
+    "Y90": ("Y", np.pi / 2),
+    "YM90": ("Y", -np.pi / 2),
+}
+
+
+class NativeCircuit:
+    """
+    a circuit made of MonarQ-native gates, stored as arrays : the code of each gate (see NATIVE_GATES),
+    the wires it acts on and its angle.\n
+    Steps that act on NativeCircuits don't create pennylane operations. The tape is only materialized once they are done
+
+    Args:
+        codes (np.ndarray) : the code of each gate
+        wires (np.ndarray) : the wires of each gate, as indices in labels. The second wire of single qubit gates is -1
+        angles (np.ndarray) : the angle of each gate. 0 for gates without parameters, and the slot of parameter slots
+        labels (list) : the wires of the circuit
+        measurements (list[MeasurementProcess]) : the measurements of the circuit
+        shots (Shots) : the shots of the circuit
+    """
+
+    __slots__ = ("codes", "wires", "angles", "labels", "measurements", "shots")
+
+    def __init__(self, codes, wires, angles, labels, measurements=(), shots=None):
+        self.codes = codes
+        self.wires = wires
+        self.angles = angles
+        self.labels = labels
+        self.measurements = measurements
+        self.shots = shots
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @staticmethod
+    def from_operations(
+        operations: Iterable[Operation], measurements=(), shots=None
+    ) -> "NativeCircuit":
+        """
+        Args:
+            operations (Iterable[Operation]) : native operations
+            measurements (list[MeasurementProcess]) : the measurements of the circuit
+            shots (Shots) : the shots of the circuit
+
+        Raises:
+            ValueError: an operation is not native
+
+        Returns:
+            NativeCircuit : the circuit
+        """
+        indices = {}
+        codes = []
+        wires = []
+        angles = []
+        for operation in operations:
+            code = CODES.get(operation.name)
+            if code is None:
+                raise ValueError(f"gate {operation.name} is not native")
+
+            operation_wires = [
+                indices.setdefault(wire, len(indices)) for wire in operation.wires
+            ]
+            codes.append(code)
+            wires.append(
+                (operation_wires[0], operation_wires[1])
+                if len(operation_wires) > 1
+                else (operation_wires[0], -1)
+            )
+            if code in PARAMETRIZED:
+                angles.append(float(operation.data[0]))
+            elif operation.name == "ParameterSlot":
+                angles.append(operation.slot)
+            else:
+                angles.append(0.0)
+
+        return NativeCircuit(
+            np.array(codes, dtype=np.int8),
+            np.array(wires, dtype=np.int32).reshape(-1, 2),
+            np.array(angles, dtype=np.float64),
+            list(indices),
+            measurements,
+            shots,
+        )
+
+    @staticmethod
+    def from_tape(tape: QuantumTape) -> "NativeCircuit":
+        """
+        Args:
+            tape (QuantumTape) : a tape made of native operations
+
+        Raises:
+            ValueError: an operation is not native
+
+        Returns:
+            NativeCircuit : the circuit
+        """
+        return NativeCircuit.from_operations(
+            tape.operations, tape.measurements, tape.shots
+        )
+
+    def select(self, keep: np.ndarray) -> "NativeCircuit":
+        """
+        Args:
+            keep (np.ndarray) : which gates to keep, as a boolean mask or as indices
+
+        Returns:
+            NativeCircuit : a circuit with the kept gates, on the same wires
+        """
+        return NativeCircuit(
+            self.codes[keep],
+            self.wires[keep],
+            self.angles[keep],
+            self.labels,
+            self.measurements,
+            self.shots,
+        )
+
+    def to_operations(self) -> list[Operation]:
+        """
+        Returns:
+            list[Operation] : the pennylane operations of the circuit
+        """
+        operations = []
+        with qml.QueuingManager.stop_recording():
+            for code, (first, second), angle in zip(
+                self.codes.tolist(), self.wires.tolist(), self.angles.tolist()
+            ):
+                name = NATIVE_GATES[code]
+                wires = (
+                    [self.labels[first], self.labels[second]]
+                    if second >= 0
+                    else self.labels[first]
+                )
+                if code in PARAMETRIZED:
+                    operations.append(_GATE_TYPES[name](angle, wires=wires))
+                elif name == "ParameterSlot":
+                    operations.append(custom.ParameterSlot(int(angle), wires))
+                else:
+                    operations.append(_GATE_TYPES[name](wires=wires))
+        return operations
+
+    def to_tape(self, tape_type: type = QuantumTape) -> QuantumTape:
+        """
+        Args:
+            tape_type (type) : the type of tape to create. Defaults to QuantumTape
+
+        Returns:
+            QuantumTape : the circuit, materialized as a tape
+        """
+        return tape_type(self.to_operations(), self.measurements, shots=self.shots)
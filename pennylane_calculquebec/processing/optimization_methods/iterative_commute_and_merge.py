@@ -3,10 +3,7 @@ Contains utility classes for the iterative commute and merge optimization pre-pr
 """
 
 from pennylane.tape import QuantumTape
-from pennylane_calculquebec.utility.optimization import (
-    find_previous_gate,
-    find_next_gate,
-)
+from pennylane_calculquebec.utility.optimization import wire_bounds
 import pennylane.transforms as transforms
 import numpy as np
 from autograd.numpy.numpy_boxes import ArrayBox
@@ -28,15 +25,16 @@ def remove_root_zs(tape: QuantumTape, iterations=3) -> QuantumTape:
     try:
         new_operations = tape.operations.copy()
         for _ in range(iterations):
-            list_copy = new_operations.copy()
-            new_operations = []
-
-            for i, op in enumerate(list_copy):
-                previous = find_previous_gate(i, op.wires, list_copy)
-                if op.basis != "Z" or previous is not None:
-                    new_operations.append(op)
-
-            if new_operations == list_copy:
+            list_copy = new_operations
+            first, _ = wire_bounds(list_copy)
+            # an operation is a root if it is the first one on each of its wires
+            new_operations = [
+                op
+                for i, op in enumerate(list_copy)
+                if op.basis != "Z" or any(first[w] != i for w in op.wires)
+            ]
+
+            if len(new_operations) == len(list_copy):
                 break
         return type(tape)(new_operations, tape.measurements, tape.shots)
     except Exception as e:
@@ -62,17 +60,16 @@ def remove_leaf_zs(tape: QuantumTape, iterations=3) -> QuantumTape:
     try:
         new_operations = tape.operations.copy()
         for _ in range(iterations):
-            list_copy = new_operations.copy()
-            new_operations = []
-            for i in reversed(range(len(list_copy))):
-                op = list_copy[i]
-
-                next = find_next_gate(i, op.wires, list_copy)
-                if op.basis != "Z" or next is not None:
-                    new_operations.insert(0, op)
-                    continue
-
-            if new_operations == list_copy:
+            list_copy = new_operations
+            _, last = wire_bounds(list_copy)
+            # an operation is a leaf if it is the last one on each of its wires
+            new_operations = [
+                op
+                for i, op in enumerate(list_copy)
+                if op.basis != "Z" or any(last[w] != i for w in op.wires)
+            ]
+
+            if len(new_operations) == len(list_copy):
                 break
         return type(tape)(new_operations, tape.measurements, tape.shots)
     except Exception as e:
@@ -120,11 +117,8 @@ def _remove_trivials(tape: QuantumTape, iteration=3, epsilon=1e-8) -> QuantumTap
             op, isAdjoint = _get_adjoint_base(op)
 
             if len(op.parameters) > 0:
-                angle = op.parameters[0]
-                while angle > 2 * np.pi - epsilon:
-                    angle -= 2 * np.pi
-                while angle < 0:
-                    angle += 2 * np.pi
+                # the same as subtracting or adding 2 pi until the angle is between 0 and 2 pi, without looping on large angles
+                angle = np.mod(op.parameters[0], 2 * np.pi)
                 if abs(angle) > epsilon:
                     op = (type(op) if not isAdjoint else adjoint(type(op)))(
                         angle, wires=op.wires
@@ -0,0 +1,423 @@
+"""
+Contains a single pass optimizer that reaches the fixed point of commute_and_merge in near linear time.\n
+The circuit is kept as one doubly linked list of gates per wire. On each wire, consecutive gates that are diagonal
+in the same basis (their "axis" on this wire) form a block : they commute, so any two gates that are in the same
+blocks on all their wires can be brought next to each other, and cancelled or merged.
+When a gate is removed and its block becomes empty, the blocks around it are joined, which can make new gates meet.
+"""
+
+import numpy as np
+from pennylane.tape import QuantumTape
+from pennylane.ops.op_math.adjoint import Adjoint
+from pennylane.ops.qubit.attributes import (
+    composable_rotations,
+    self_inverses,
+    symmetric_over_all_wires,
+    symmetric_over_control_wires,
+)
+
+
+class _Block:
+    """
+    a run of consecutive gates on a wire that are diagonal in the same basis. Joined blocks point to the block they were joined with
+    """
+
+    __slots__ = ("axis", "members", "size", "parent")
+
+    def __init__(self, axis):
+        self.axis = axis
+        self.members = []
+        self.size = 0
+        self.parent = None
+
+    def find(self) -> "_Block":
+        """
+        Returns:
+            _Block: the block this block was joined with, if any. Itself otherwise
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        block = self
+        while block.parent is not None and block.parent is not root:
+            block.parent, block = root, block.parent
+        return root
+
+
+class _Node:
+    """
+    a gate of the circuit, linked to the previous and next gates on each of its wires
+    """
+
+    __slots__ = (
+        "index",
+        "op",
+        "wires",
+        "axes",
+        "key",
+        "partner",
+        "prev",
+        "next",
+        "blocks",
+        "registered",
+        "alive",
+    )
+
+    def __init__(self, index, op):
+        self.index = index
+        self.op = op
+        self.wires = tuple(op.wires)
+        controls, kind = _structure(op)
+        basis = getattr(op, "basis", None)
+        # on its control wires, a controlled gate is diagonal in the Z basis
+        self.axes = {
+            wire: "Z" if position < controls else basis
+            for position, wire in enumerate(self.wires)
+        }
+        self.key, self.partner = _keys(op, self.wires, kind)
+        self.prev = {}
+        self.next = {}
+        self.blocks = {}
+        self.registered = None
+        self.alive = True
+
+    @property
+    def commuting(self) -> bool:
+        """
+        does the gate commute with some other gates on each of its wires?
+        """
+        return all(axis is not None for axis in self.axes.values())
+
+
+def _base(op) -> tuple:
+    """
+    Args:
+        op (Operation): a quantum operation
+
+    Returns:
+        tuple[Operation, bool]: the operation without its adjoints, and whether it was an adjoint
+    """
+    is_adjoint = False
+    while isinstance(op, Adjoint):
+        op, is_adjoint = op.base, not is_adjoint
+    return op, is_adjoint
+
+
+def _is_rotation(op) -> bool:
+    """
+    Args:
+        op (Operation): a quantum operation
+
+    Returns:
+        bool: is it a rotation whose angles add up when it is repeated, and whose period is 2 pi?
+    """
+    return (
+        op in composable_rotations
+        and op.num_params == 1
+        and len(op.control_wires) == 0
+        and not isinstance(op, Adjoint)
+    )
+
+
+# gates that always act on the same number of wires have the same structure : it is computed once per type
+_structures = {}
+
+
+def _structure(op) -> tuple:
+    """
+    Args:
+        op (Operation): a quantum operation
+
+    Returns:
+        tuple[int, str]: the number of control wires of the operation, which come first,
+        and whether it is a rotation, its own inverse or the inverse of its adjoint
+    """
+    structure = _structures.get(type(op))
+    if structure is not None:
+        return structure
+
+    if _is_rotation(op):
+        kind = "rotation"
+    elif _base(op)[0] in self_inverses:
+        kind = "inverse"
+    else:
+        kind = "adjoint"
+    structure = (len(op.control_wires), kind)
+    if isinstance(type(op).num_wires, int):
+        _structures[type(op)] = structure
+    return structure
+
+
+def _keys(op, wires: tuple, kind: str) -> tuple:
+    """
+    Args:
+        op (Operation): a quantum operation
+        wires (tuple): the wires of the operation
+        kind (str): the kind of the operation (see _structure)
+
+    Returns:
+        tuple: the key of the operation, and the key of the operations it cancels or merges with. None if there are none
+    """
+    if len(wires) == 0:
+        return None, None
+
+    if kind == "rotation":
+        key = ("rotation", op.name, wires)
+        return key, key
+
+    base, is_adjoint = _base(op)
+    if kind == "inverse":
+        if base in symmetric_over_all_wires:
+            wires = frozenset(wires)
+        elif base in symmetric_over_control_wires:
+            wires = (frozenset(wires[:-1]), wires[-1])
+        key = ("inverse", base.name, wires)
+        return key, key
+
+    # gates without parameters are identified by their name and wires, which is faster than hashing them
+    identity = (base.name, wires) if base.num_params == 0 else base.hash
+    return ("adjoint", identity, is_adjoint), ("adjoint", identity, not is_adjoint)
+
+
+def _without_adjoints(op) -> list:
+    """
+    Args:
+        op (Operation): a quantum operation
+
+    Returns:
+        list[Operation]: the decomposition of the operation if it is an adjoint. The operation otherwise
+    """
+    if not isinstance(op, Adjoint) or not op.has_decomposition:
+        return [op]
+    return [
+        operation
+        for decomposed in op.decomposition()
+        for operation in _without_adjoints(decomposed)
+    ]
+
+
+def _normalize(angle, epsilon: float):
+    """
+    Args:
+        angle (float): the angle of a rotation
+        epsilon (float): how close to 0 an angle has to be to be trivial
+
+    Returns:
+        float: the angle, between 0 and 2 pi. None if the rotation is trivial
+    """
+    angle = np.mod(angle, 2 * np.pi)
+    if angle < epsilon or angle > 2 * np.pi - epsilon:
+        return None
+    return angle
+
+
+class _Circuit:
+    """
+    the gates of a tape as linked lists, with their blocks and the registry of gates that could meet a partner
+    """
+
+    def __init__(self, operations, epsilon):
+        self.epsilon = epsilon
+        self.nodes = []
+        self.heads = {}
+        self.tails = {}
+        # (key, blocks) -> gates with this key, in these blocks
+        self.registry = {}
+        self.pending = []
+
+        for op in operations:
+            if op.name == "Identity":
+                continue
+            if _structure(op)[1] == "rotation":
+                angle = _normalize(op.data[0], epsilon)
+                if angle is None:
+                    continue
+                if angle != op.data[0]:
+                    op = type(op)(angle, wires=op.wires)
+            self._append(_Node(len(self.nodes), op))
+
+        self.pending = [node for node in reversed(self.nodes) if node.key is not None]
+        self.run()
+
+    def _append(self, node: _Node):
+        """
+        adds a gate at the end of the circuit, in the last block of its wires if it has the same axis
+        """
+        self.nodes.append(node)
+        for wire in node.wires:
+            tail = self.tails.get(wire)
+            node.prev[wire] = tail
+            node.next[wire] = None
+            axis = node.axes[wire]
+            if (
+                tail is not None
+                and axis is not None
+                and tail.blocks[wire].find().axis == axis
+            ):
+                block = tail.blocks[wire].find()
+            else:
+                block = _Block(axis)
+            block.members.append(node)
+            block.size += 1
+            node.blocks[wire] = block
+
+            if tail is None:
+                self.heads[wire] = node
+            else:
+                tail.next[wire] = node
+            self.tails[wire] = node
+
+    def run(self):
+        """
+        cancels and merges gates until none can meet a partner
+        """
+        while self.pending:
+            node = self.pending.pop()
+            if node.alive and node.registered is None:
+                self._register(node)
+
+    def _blocks(self, node: _Node) -> frozenset:
+        # blocks belong to a single wire, so the order of the wires doesn't matter
+        return frozenset(id(node.blocks[wire].find()) for wire in node.wires)
+
+    def _register(self, node: _Node):
+        """
+        combines a gate with a partner it can meet. Otherwise, records it so that a later gate can find it
+        """
+        if not node.commuting:
+            # such a gate only meets the gates right next to it
+            following = node.next[node.wires[0]] if node.wires else None
+            if (
+                following is not None
+                and following.partner == node.key
+                and len(following.wires) == len(node.wires)
+                and all(node.next[wire] is following for wire in node.wires)
+            ):
+                self._combine(node, following)
+            return
+
+        blocks = self._blocks(node)
+        partners = self.registry.get((node.partner, blocks))
+        if partners:
+            self._combine(partners[-1], node)
+            return
+
+        node.registered = (node.key, blocks)
+        self.registry.setdefault(node.registered, []).append(node)
+
+    def _unregister(self, node: _Node):
+        if node.registered is not None:
+            self.registry[node.registered].remove(node)
+            node.registered = None
+
+    def _combine(self, first: _Node, second: _Node):
+        """
+        cancels two inverse gates, or merges two rotations into the earliest one
+        """
+        if first.index > second.index:
+            first, second = second, first
+
+        if first.key[0] != "rotation":
+            self._remove(first)
+            self._remove(second)
+            return
+
+        angle = _normalize(first.op.data[0] + second.op.data[0], self.epsilon)
+        self._remove(second)
+        if angle is None:
+            self._remove(first)
+        else:
+            first.op = type(first.op)(angle, wires=first.op.wires)
+
+    def _remove(self, node: _Node):
+        """
+        unlinks a gate. If its block becomes empty, the blocks around it are joined
+        """
+        node.alive = False
+        self._unregister(node)
+        for wire in node.wires:
+            before, after = node.prev[wire], node.next[wire]
+            if before is None:
+                self.heads[wire] = after
+            else:
+                before.next[wire] = after
+            if after is None:
+                self.tails[wire] = before
+            else:
+                after.prev[wire] = before
+
+            block = node.blocks[wire].find()
+            block.size -= 1
+            if block.size == 0 and before is not None and after is not None:
+                self._join(before.blocks[wire].find(), after.blocks[wire].find())
+
+            if before is not None and before.key is not None and not before.commuting:
+                self.pending.append(before)
+
+    def _join(self, first: _Block, second: _Block):
+        """
+        joins two blocks that became neighbours, if they have the same axis. The gates of the smallest block can meet new partners
+        """
+        if first is second or first.axis is None or first.axis != second.axis:
+            return
+        if len(first.members) < len(second.members):
+            first, second = second, first
+        second.parent = first
+        first.size += second.size
+        first.members += second.members
+        for node in second.members:
+            if node.alive and node.key is not None:
+                self._unregister(node)
+                self.pending.append(node)
+
+    def remove_diagonal_ends(self) -> bool:
+        """
+        removes the gates that are diagonal in the Z basis, and commute with every gate before them
+        (they act on |0>) or after them (they don't change the measured probabilities)
+
+        Returns:
+            bool: were gates removed?
+        """
+        removed = False
+        for ends, step in [(self.heads, "next"), (self.tails, "prev")]:
+            reached = {}
+            for wire, node in ends.items():
+                while node is not None and node.axes[wire] == "Z":
+                    reached[node] = reached.get(node, 0) + 1
+                    node = getattr(node, step)[wire]
+            for node, count in reached.items():
+                if node.alive and node.op.basis == "Z" and count == len(node.wires):
+                    self._remove(node)
+                    removed = True
+        return removed
+
+    def operations(self) -> list:
+        return [node.op for node in self.nodes if node.alive]
+
+
+def linear_commute_and_merge(tape: QuantumTape, epsilon=1e-8) -> QuantumTape:
+    """
+    applies commutations, rotation merges and inverses/trivial gates cancellations, in a single pass.
+    Gates are cancelled or merged whenever they can be brought next to each other by commuting them with the gates in between,
+    so the resulting circuit is as short as what commute_and_merge gives, or shorter
+
+    Args:
+        tape (QuantumTape) : the tape to act on
+        epsilon (float) : up to which precision do we wish to detect 0 rad rotations
+
+    Returns :
+        QuantumTape : the resulting quantum tape
+    """
+    circuit = _Circuit(tape.operations, epsilon)
+    if any(isinstance(op, Adjoint) for op in circuit.operations()):
+        # like merge_rotations, the adjoints that were not cancelled are decomposed, so that they can merge with rotations
+        operations = [
+            operation
+            for op in circuit.operations()
+            for operation in _without_adjoints(op)
+        ]
+        circuit = _Circuit(operations, epsilon)
+    # removing a gate at an end of the circuit can bring gates that don't commute with anything together
+    while circuit.remove_diagonal_ends() and circuit.pending:
+        circuit.run()
+    return type(tape)(circuit.operations(), tape.measurements, tape.shots)
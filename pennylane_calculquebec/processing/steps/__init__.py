@@ -4,8 +4,8 @@ this module contains every concrete pre-processing / post-processing steps curre
 
 from .base_decomposition import CliffordTDecomposition
 from .placement import ASTAR, ISMAGS, VF2
-from .routing import Swaps
-from .optimization import IterativeCommuteAndMerge
+from .routing import Swaps, Sabre, NoiseAwareSwaps
+from .optimization import IterativeCommuteAndMerge, PeepholeOptimization
 from .native_decomposition import MonarqDecomposition
 from .readout_error_mitigation import MatrixReadoutMitigation, IBUReadoutMitigation
 from .decompose_readout import DecomposeReadout
@@ -9,6 +9,7 @@ import numpy as np
 from pennylane.ops.op_math import SProd
 from pennylane_calculquebec.processing.interfaces import PreProcStep
 from pennylane_calculquebec.monarq_data import monarq_native_gates
+from pennylane_calculquebec.processing.custom_gates import ParameterSlot
 from pennylane_calculquebec.logger import logger
 
 
@@ -82,7 +83,10 @@ class MonarqDecomposition(NativeDecomposition):
                             )
                         )
                 else:
-                    if operation.name in self.native_gates():
+                    # slots are bound to RZ once the template is compiled (see CompiledTemplate)
+                    if operation.name in self.native_gates() or isinstance(
+                        operation, ParameterSlot
+                    ):
                         new_operations.append(operation)
                     else:
                         raise ValueError(
@@ -7,10 +7,19 @@ import pennylane as qml
 from pennylane.tape import QuantumTape
 from pennylane_calculquebec.utility.optimization import expand, is_single_axis_gate
 import pennylane.transforms as transforms
-from pennylane_calculquebec.processing.optimization_methods.iterative_commute_and_merge import (
-    commute_and_merge,
+from pennylane_calculquebec.processing.optimization_methods.linear_commute_and_merge import (
+    linear_commute_and_merge,
+)
+from pennylane_calculquebec.processing.interfaces import PreProcStep, NativeStep
+from pennylane_calculquebec.processing.native_circuit import (
+    NativeCircuit,
+    CODES,
+    NATIVE_GATES,
+    ROTATIONS,
+)
+from pennylane_calculquebec.processing.decompositions.native_decomp_functions import (
+    is_close_enough_to,
 )
-from pennylane_calculquebec.processing.interfaces import PreProcStep
 from pennylane_calculquebec.logger import logger
 
 
@@ -39,25 +48,25 @@ class IterativeCommuteAndMerge(Optimize):
             QuantumTape: an optimized QuantumTape
         """
         try:
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
 
             tape = expand(tape, {"SWAP": IterativeCommuteAndMerge.swap_cnot})
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
 
             tape = expand(tape, {"CNOT": IterativeCommuteAndMerge.HCZH_cnot})
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
 
             tape = expand(tape, {"Hadamard": IterativeCommuteAndMerge.ZXZ_Hadamard})
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
 
             tape = transforms.create_expand_fn(
                 depth=3,
                 stop_at=lambda operation: operation.name in ["RZ", "RX", "RY", "CZ"],
             )(tape)
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
 
             tape = IterativeCommuteAndMerge.get_rid_of_y_rotations(tape)
-            tape = commute_and_merge(tape)
+            tape = linear_commute_and_merge(tape)
             return tape
         except Exception as e:
             logger.error(
@@ -174,3 +183,331 @@ class IterativeCommuteAndMerge(Optimize):
                 e,
             )
             return tape
+
+
+_ROTATION_AXES = ("Z", "X", "Y")
+
+# the native gates that rotate around each axis, by angle. Rotations around Z that have no native gate stay RZs
+_NATIVE_ROTATIONS = {
+    "Z": [
+        (0, None),
+        (2 * np.pi, None),
+        (7 * np.pi / 4, "TDagger"),
+        (3 * np.pi / 2, "ZM90"),
+        (np.pi, "PauliZ"),
+        (np.pi / 2, "Z90"),
+        (np.pi / 4, "T"),
+    ],
+    "X": [
+        (0, None),
+        (2 * np.pi, None),
+        (3 * np.pi / 2, "XM90"),
+        (np.pi, "PauliX"),
+        (np.pi / 2, "X90"),
+    ],
+    "Y": [
+        (0, None),
+        (2 * np.pi, None),
+        (3 * np.pi / 2, "YM90"),
+        (np.pi, "PauliY"),
+        (np.pi / 2, "Y90"),
+    ],
+}
+
+# for each code, the axis of the gate (0 if it is not a rotation, its index in _ROTATION_AXES + 1 otherwise), and its angle (nan if it is parametrized)
+_CODE_AXES = np.array(
+    [
+        _ROTATION_AXES.index(ROTATIONS[name][0]) + 1 if name in ROTATIONS else 0
+        for name in NATIVE_GATES
+    ]
+)
+_CODE_ANGLES = np.array(
+    [
+        (
+            np.nan
+            if name not in ROTATIONS or ROTATIONS[name][1] is None
+            else ROTATIONS[name][1]
+        )
+        for name in NATIVE_GATES
+    ]
+)
+
+
+def _rotations(circuit: NativeCircuit) -> tuple:
+    """
+    Args:
+        circuit (NativeCircuit): a native circuit
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: the axis of each gate (see _CODE_AXES), its angle, and whether it is parametrized
+    """
+    axes = _CODE_AXES[circuit.codes]
+    fixed = _CODE_ANGLES[circuit.codes]
+    parametrized = np.isnan(fixed) & (axes > 0)
+    angles = np.where(parametrized, circuit.angles, np.nan_to_num(fixed))
+    return axes, angles, parametrized
+
+
+def _wire_runs(circuit: NativeCircuit, groups: np.ndarray) -> tuple:
+    """
+    Args:
+        circuit (NativeCircuit): a native circuit
+        groups (np.ndarray): the group of each gate. Consecutive gates of the same group on a wire form a run, except for group 0
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: every gate once for each of its wires, ordered by wire and by position in the circuit,
+        the wire of each of them, whether they start a run, and the index of their run
+    """
+    two_qubits = np.flatnonzero(circuit.wires[:, 1] >= 0)
+    gates = np.concatenate([np.arange(len(circuit)), two_qubits])
+    wires = np.concatenate([circuit.wires[:, 0], circuit.wires[two_qubits, 1]])
+    order = np.lexsort((gates, wires))
+    gates, wires = gates[order], wires[order]
+    gate_groups = groups[gates]
+
+    # a gate acting on two wires never is part of a run
+    gate_groups[circuit.wires[gates, 1] >= 0] = 0
+    starts = np.ones(len(gates), dtype=bool)
+    starts[1:] = (
+        (gate_groups[1:] == 0)
+        | (gate_groups[1:] != gate_groups[:-1])
+        | (wires[1:] != wires[:-1])
+    )
+    return gates, wires, starts, np.cumsum(starts) - 1
+
+
+def _native_rotations(axes: np.ndarray, angles: np.ndarray) -> tuple:
+    """
+    Args:
+        axes (np.ndarray): the axis of each rotation (see _CODE_AXES)
+        angles (np.ndarray): the angle of each rotation
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: the code of the native gate of each rotation, its angle, and whether the rotation is not trivial
+    """
+    angles = np.mod(angles, 2 * np.pi)
+    codes = np.full(len(angles), CODES["RZ"], dtype=np.int8)
+    kept = np.ones(len(angles), dtype=bool)
+    for index, axis in enumerate(_ROTATION_AXES):
+        on_axis = axes == index + 1
+        for angle, name in _NATIVE_ROTATIONS[axis]:
+            close = on_axis & is_close_enough_to(angles, angle)
+            if name is None:
+                kept[close] = False
+            else:
+                codes[close] = CODES[name]
+                angles[close] = 0.0
+    return codes, angles, kept
+
+
+def _rotation_matrices(axes: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        axes (np.ndarray): the axis of each rotation (see _CODE_AXES)
+        angles (np.ndarray): the angle of each rotation
+
+    Returns:
+        np.ndarray: the 2x2 matrix of each rotation, up to a global phase
+    """
+    cos, sin = np.cos(angles / 2), np.sin(angles / 2)
+    phase = np.exp(-0.5j * angles)
+    matrices = np.zeros((len(angles), 2, 2), dtype=complex)
+    z, x, y = (axes == index + 1 for index in range(len(_ROTATION_AXES)))
+    matrices[z, 0, 0], matrices[z, 1, 1] = phase[z], phase[z].conj()
+    matrices[x, 0, 0] = matrices[x, 1, 1] = cos[x]
+    matrices[x, 0, 1] = matrices[x, 1, 0] = -1j * sin[x]
+    matrices[y, 0, 0] = matrices[y, 1, 1] = cos[y]
+    matrices[y, 0, 1], matrices[y, 1, 0] = -sin[y], sin[y]
+    return matrices
+
+
+# the shortest native sequences for RZ(a) R(b) RZ(c), where R rotates around X or Y, by value of b.
+# Gates are in the order of the circuit. ("Z", angle) is the native rotation around Z of this angle, the other gates are named after the axis of R
+_EULER_TEMPLATES = [
+    (0, [("Z", lambda a, b, c: a + c)]),
+    (np.pi / 2, [("Z", lambda a, b, c: c), "{}90", ("Z", lambda a, b, c: a)]),
+    (np.pi, ["Pauli{}", ("Z", lambda a, b, c: a - c)]),
+    (3 * np.pi / 2, [("Z", lambda a, b, c: c), "{}M90", ("Z", lambda a, b, c: a)]),
+]
+
+# RZ(a) RX(b) RZ(c) for any value of b, since RX(b) = H RZ(b) H
+_GENERAL_TEMPLATE = [
+    ("Z", lambda a, b, c: c + np.pi / 2),
+    "X90",
+    ("Z", lambda a, b, c: b + np.pi),
+    "X90",
+    ("Z", lambda a, b, c: a + np.pi / 2),
+]
+
+
+class PeepholeOptimization(Optimize, NativeStep):
+    """
+    Resynthesizes each run of single qubit native gates on a wire into the shortest equivalent native sequence.\n
+    The product of each run is turned into ZXZ Euler angles RZ(a) RX(b) RZ(c), which are matched against a table of native sequences
+    (see _EULER_TEMPLATES). A run is only replaced if the sequence is shorter. Gates are equivalent up to a global phase
+    """
+
+    def execute_native(self, circuit: NativeCircuit) -> NativeCircuit:
+        """
+        replaces the runs of single qubit gates on each wire with shorter native sequences, when there are some
+
+        Args:
+            circuit (NativeCircuit): the circuit to act on
+
+        Returns:
+            NativeCircuit: the processed circuit
+        """
+        if len(circuit) == 0:
+            return circuit
+
+        axes, angles, _ = _rotations(circuit)
+        gates, wires, starts, runs = _wire_runs(circuit, (axes > 0).astype(int))
+        lengths = np.bincount(runs)
+        candidates = np.flatnonzero((axes[gates[starts]] > 0) & (lengths > 1))
+        if len(candidates) == 0:
+            return circuit
+
+        a, b, c = PeepholeOptimization._euler_angles(
+            PeepholeOptimization._products(
+                gates, starts, runs, candidates, axes, angles
+            )
+        )
+        best_lengths = lengths[candidates]
+        best_codes = np.zeros((len(candidates), len(_GENERAL_TEMPLATE)), dtype=np.int8)
+        best_angles = np.zeros(best_codes.shape)
+        best_present = np.zeros(best_codes.shape, dtype=bool)
+
+        # RZ(a) RX(b) RZ(c) = RZ(a + pi) RX(-b) RZ(c - pi) = RZ(a - pi / 2) RY(b) RZ(c + pi / 2)
+        variants = [
+            (axis, a + shift + flip, sign * b, c - shift - flip)
+            for axis, shift in [("X", 0), ("Y", -np.pi / 2)]
+            for sign, flip in [(1, 0), (-1, np.pi)]
+        ]
+        sequences = [
+            (
+                is_close_enough_to(np.mod(middle, 2 * np.pi), angle),
+                template,
+                axis,
+                left,
+                middle,
+                right,
+            )
+            for axis, left, middle, right in variants
+            for angle, template in _EULER_TEMPLATES
+        ]
+        sequences.append((np.ones(len(a), dtype=bool), _GENERAL_TEMPLATE, "X", a, b, c))
+        for valid, template, axis, left, middle, right in sequences:
+            codes, seq_angles, present = PeepholeOptimization._sequence(
+                template, axis, left, middle, right
+            )
+            better = valid & (present.sum(axis=1) < best_lengths)
+            best_lengths[better] = present[better].sum(axis=1)
+            best_codes[better, : codes.shape[1]] = codes[better]
+            best_angles[better, : codes.shape[1]] = seq_angles[better]
+            best_present[better] = False
+            best_present[better, : codes.shape[1]] = present[better]
+
+        rewritten = best_lengths < lengths[candidates]
+        if not rewritten.any():
+            return circuit
+
+        # the gates of the rewritten runs are removed, and their sequences take the place of their first gate
+        replaced = np.zeros(len(lengths), dtype=bool)
+        replaced[candidates[rewritten]] = True
+        keep = np.ones(len(circuit), dtype=bool)
+        keep[gates[replaced[runs]]] = False
+        kept = np.flatnonzero(keep)
+
+        present = best_present[rewritten]
+        run_starts = np.flatnonzero(starts)[candidates[rewritten]]
+        rows, slots = np.nonzero(present)
+        positions = np.concatenate([kept, gates[run_starts][rows]])
+        order = np.lexsort(
+            (np.concatenate([np.zeros(len(kept), dtype=int), slots]), positions)
+        )
+        new_wires = np.full((len(rows), 2), -1, dtype=circuit.wires.dtype)
+        new_wires[:, 0] = wires[run_starts][rows]
+        return NativeCircuit(
+            np.concatenate([circuit.codes[kept], best_codes[rewritten][present]])[
+                order
+            ],
+            np.concatenate([circuit.wires[kept], new_wires])[order],
+            np.concatenate([circuit.angles[kept], best_angles[rewritten][present]])[
+                order
+            ],
+            circuit.labels,
+            circuit.measurements,
+            circuit.shots,
+        )
+
+    @staticmethod
+    def _products(gates, starts, runs, candidates, axes, angles) -> np.ndarray:
+        """
+        Args:
+            gates (np.ndarray): the gates, ordered by wire (see _wire_runs)
+            starts (np.ndarray): whether each gate starts a run
+            runs (np.ndarray): the run of each gate
+            candidates (np.ndarray): the runs to multiply
+            axes (np.ndarray): the axis of each gate of the circuit
+            angles (np.ndarray): the angle of each gate of the circuit
+
+        Returns:
+            np.ndarray: the matrix of each candidate run, up to a global phase
+        """
+        is_candidate = np.zeros(runs[-1] + 1, dtype=bool)
+        is_candidate[candidates] = True
+        entries = np.flatnonzero(is_candidate[runs])
+        entry_runs = np.searchsorted(candidates, runs[entries])
+        positions = entries - np.flatnonzero(starts)[runs[entries]]
+        matrices = _rotation_matrices(axes[gates[entries]], angles[gates[entries]])
+
+        # the runs are multiplied together, one position at a time
+        order = np.argsort(positions, kind="stable")
+        bounds = np.searchsorted(positions[order], np.arange(positions.max() + 2))
+        products = np.tile(np.eye(2, dtype=complex), (len(candidates), 1, 1))
+        for position in range(positions.max() + 1):
+            at = order[bounds[position] : bounds[position + 1]]
+            products[entry_runs[at]] = matrices[at] @ products[entry_runs[at]]
+        return products
+
+    @staticmethod
+    def _euler_angles(matrices: np.ndarray) -> tuple:
+        """
+        Args:
+            matrices (np.ndarray): 2x2 unitary matrices
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: angles a, b and c such that each matrix is RZ(a) RX(b) RZ(c), up to a global phase
+        """
+        determinants = (
+            matrices[:, 0, 0] * matrices[:, 1, 1]
+            - matrices[:, 0, 1] * matrices[:, 1, 0]
+        )
+        special = matrices / np.sqrt(determinants)[:, None, None]
+        b = 2 * np.arctan2(np.abs(special[:, 1, 0]), np.abs(special[:, 0, 0]))
+        total = 2 * np.angle(special[:, 1, 1])
+        difference = 2 * np.angle(1j * special[:, 1, 0])
+        return (total + difference) / 2, b, (total - difference) / 2
+
+    @staticmethod
+    def _sequence(template: list, axis: str, a, b, c) -> tuple:
+        """
+        Args:
+            template (list): a native sequence (see _EULER_TEMPLATES)
+            axis (str): the axis of the middle rotation
+            a, b, c (np.ndarray): the Euler angles of each run
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: the code and angle of each gate of the sequence, for each run, and whether the gate is there
+        """
+        codes = np.zeros((len(a), len(template)), dtype=np.int8)
+        angles = np.zeros(codes.shape)
+        present = np.ones(codes.shape, dtype=bool)
+        for slot, gate in enumerate(template):
+            if isinstance(gate, str):
+                codes[:, slot] = CODES[gate.format(axis)]
+                continue
+            codes[:, slot], angles[:, slot], present[:, slot] = _native_rotations(
+                np.ones(len(a), dtype=int), gate[1](a, b, c)
+            )
+        return codes, angles, present
@@ -3,14 +3,25 @@ Contains placement pre-processing steps
 """
 
 from pennylane.tape import QuantumTape
+import networkx as nx
+import time
 import pennylane_calculquebec.utility.graph as graph_util
+from pennylane_calculquebec.utility.cache import LRUCache
 from pennylane_calculquebec.processing.interfaces import PreProcStep
 from pennylane_calculquebec.logger import logger
 
+PLACEMENT_CACHE_SIZE = 256
+
+# mappings found by placement steps, by step fingerprint (type, parameters and calibration version) and circuit structure
+_placements = LRUCache(PLACEMENT_CACHE_SIZE)
+
 
 class Placement(PreProcStep):
     """
-    base class for any placement algorithm.
+    base class for any placement algorithm.\n
+    With a time budget, the algorithm keeps looking for other mappings until the budget runs out,
+    and the one that needs the fewest swaps (then uses the best qubits) is kept.\n
+    Mappings are cached by circuit structure : circuits that only differ by their parameters are placed once per calibration
     """
 
     def __init__(
@@ -21,6 +32,7 @@ class Placement(PreProcStep):
         q2_acceptance=0.5,
         excluded_qubits=[],
         excluded_couplers=[],
+        time_budget: float = None,
     ):
         """constructor for placement algorithms
 
@@ -30,6 +42,7 @@ class Placement(PreProcStep):
             q2_acceptance (float, optional): what is the level of acceptance for cz fidelity? Defaults to 0.5.
             excluded_qubits (list, optional): what qubits should we exclude from the mapping? Defaults to [].
             excluded_couplers (list, optional): what couplers should we exclude from the mapping? Defaults to [].
+            time_budget (float, optional): for how many seconds should we look for better mappings? The best mapping found in that time is used. Defaults to None (the first mapping found is used).
         """
         self.use_benchmark = use_benchmark
         self.machine_name = machine_name
@@ -37,32 +50,52 @@ class Placement(PreProcStep):
         self.q2_acceptance = q2_acceptance
         self.excluded_qubits = excluded_qubits
         self.excluded_couplers = excluded_couplers
+        self.time_budget = time_budget
 
+    def execute(self, tape: QuantumTape) -> QuantumTape:
+        """places the circuit on the machine's connectivity, reusing the mapping of previous circuits with the same structure
 
-class ISMAGS(Placement):
-    """
-    finds a mapping between the circuit's wires and the machine's qubits using the ISMAGS subgraph isomorphism algorithm\n
-    ISMAGS is similar to VF2 except it also considers symmetries which can make it faster in some cases\n
-    Plus, the networkx implementation has capabilities for searching for largest common subgraphs
-    """
+        Args:
+            tape (QuantumTape): The quantum tape to act on
+
+        Raises:
+            Exception: There should be enough space on the machine to run the circuit
+
+        Returns:
+            QuantumTape: The transformed quantum tape
+        """
+        structure = graph_util.circuit_structure(tape)
+        fingerprint = self.fingerprint()
+        mapping = (
+            _placements.get((fingerprint, structure))
+            if fingerprint is not None
+            else None
+        )
+        if mapping is None:
+            mapping = self._place(tape)
+            # placing fetches the calibration, so its version is known from now on
+            fingerprint = self.fingerprint()
+            if fingerprint is not None:
+                _placements.put((fingerprint, structure), mapping)
+
+        # map wires in all operations and measurements
+        return type(tape)(
+            [operation.map_wires(mapping) for operation in tape.operations],
+            [measurement.map_wires(mapping) for measurement in tape.measurements],
+            shots=tape.shots,
+        )
 
-    def execute(self, tape):
-        """places the circuit on the machine's connectivity using ISMAGS subgraph isomorphism algorithm\n
-        If there is no perfect match, the missing nodes are mapped with qubits that minimize the subsequent routing path\n
-        1. find largest common subgraph\n
-        2. for each unmapped node\n
-            3. find the best neighbour (using cost function)\n
-            4. find machine node with shortest path from already mapped machine node\n
-        5. map wires in all operations and measurements\n
+    def _place(self, tape: QuantumTape) -> dict[int, int]:
+        """finds a mapping between the circuit's wires and the machine's qubits
 
         Args:
-            tape (QuantumTape): The tape to act on
+            tape (QuantumTape): the tape to place
 
         Raises:
             Exception: There should be enough space on the machine to run the circuit
 
         Returns:
-            QuantumTape: The transformed quantum tape
+            dict[int, int]: the mapping between the circuit's wires and the machine's qubits
         """
         circuit_topology = graph_util.circuit_graph(tape)
         machine_topology = graph_util.machine_graph(
@@ -78,14 +111,126 @@ class ISMAGS(Placement):
             graph_util.find_biggest_group(machine_topology)
         ):
             raise Exception(
-                f"There are {machine_topology.number_of_nodes} qubits on the machine but your circuit has {circuit_topology.number_of_nodes}."
+                f"There are {machine_topology.number_of_nodes()} qubits on the machine but your circuit has {circuit_topology.number_of_nodes()}."
+            )
+
+        return self._best_mapping(tape, circuit_topology, machine_topology)
+
+    def _mappings(self, tape, circuit_topology, machine_topology, deadline):
+        """yields complete mappings of the circuit on the machine. The first one is the usual answer of the algorithm
+
+        Args:
+            tape (QuantumTape): the tape to place
+            circuit_topology (Graph): the graph representation of the circuit
+            machine_topology (Graph): the graph representation of the machine
+            deadline (float): the time.monotonic() at which the search should stop. None if there is no time budget
+
+        Returns:
+            Iterator[dict[int, int]]: mappings between the circuit's wires and the machine's qubits
+        """
+        raise NotImplementedError()
+
+    def _best_mapping(self, tape, circuit_topology, machine_topology) -> dict[int, int]:
+        """looks for mappings until the time budget runs out, and keeps the one with the best score\n
+        the first mapping is always completed, so the placement can exceed a very short time budget
+
+        Args:
+            tape (QuantumTape): the tape to place
+            circuit_topology (Graph): the graph representation of the circuit
+            machine_topology (Graph): the graph representation of the machine
+
+        Returns:
+            dict[int, int]: the best mapping between the circuit's wires and the machine's qubits
+        """
+        if self.time_budget is None:
+            return next(self._mappings(tape, circuit_topology, machine_topology, None))
+
+        deadline = time.monotonic() + self.time_budget
+        best_mapping, best_score = None, None
+        for mapping in self._mappings(
+            tape, circuit_topology, machine_topology, deadline
+        ):
+            score = self.score(mapping, circuit_topology, machine_topology)
+            if best_score is None or score < best_score:
+                best_mapping, best_score = mapping, score
+            if time.monotonic() >= deadline:
+                break
+        return best_mapping
+
+    def score(self, mapping, circuit_topology, machine_topology) -> tuple[float, float]:
+        """rates a mapping. Lower is better
+
+        Args:
+            mapping (dict[int, int]): a mapping between the circuit's wires and the machine's qubits
+            circuit_topology (Graph): the graph representation of the circuit
+            machine_topology (Graph): the graph representation of the machine
+
+        Returns:
+            tuple[float, float]: the number of swaps routing will add, and the opposite of the mean score of the chosen qubits (see calculate_score)
+        """
+        swaps = 0
+        for source, destination, count in circuit_topology.edges(
+            data="weight", default=1
+        ):
+            path = graph_util.shortest_path(
+                mapping[source],
+                mapping[destination],
+                machine_topology,
+                self.machine_name,
+                use_benchmark=False,
+            )
+            if path is None:
+                return float("inf"), 0
+
+            # routing swaps each operation's qubits together, and back
+            swaps += count * 2 * (len(path) - 2)
+
+        qubit_score = sum(
+            graph_util.calculate_score(
+                qubit, machine_topology, self.machine_name, self.use_benchmark
             )
+            for qubit in mapping.values()
+        ) / max(len(mapping), 1)
+        return swaps, -qubit_score
 
-        # 1. find largest common subgraph
-        mapping = graph_util.find_largest_common_subgraph_ismags(
+
+class ISMAGS(Placement):
+    """
+    finds a mapping between the circuit's wires and the machine's qubits using the ISMAGS subgraph isomorphism algorithm\n
+    ISMAGS is similar to VF2 except it also considers symmetries which can make it faster in some cases\n
+    Plus, the networkx implementation has capabilities for searching for largest common subgraphs\n
+    If there is no perfect match, the missing nodes are mapped with qubits that minimize the subsequent routing path.\n
+    The time budget can't interrupt the search for the first largest common subgraph
+    """
+
+    def _mappings(self, tape, circuit_topology, machine_topology, deadline):
+        # 1. find largest common subgraphs
+        found = False
+        for common_mapping in graph_util.largest_common_subgraphs_ismags(
             circuit_topology, machine_topology
-        )
+        ):
+            if not common_mapping:
+                continue
+            found = True
+            yield self._complete(
+                dict(common_mapping), circuit_topology, machine_topology
+            )
+
+        # no common subgraph : every wire is mapped by the completion
+        if not found:
+            yield self._complete({}, circuit_topology, machine_topology)
 
+    def _complete(self, mapping, circuit_topology, machine_topology):
+        """maps the wires that are not part of the common subgraph
+
+        Args:
+            mapping (dict[int, int]): the mapping of the common subgraph
+            circuit_topology (Graph): the graph representation of the circuit
+            machine_topology (Graph): the graph representation of the machine
+
+        Returns:
+            dict[int, int]: a mapping of every wire in the circuit
+        """
         # 2. find all unmapped nodes
         missing = [
             node for node in circuit_topology.nodes if node not in mapping.keys()
@@ -123,64 +268,65 @@ class ISMAGS(Placement):
                     machine_topology,
                     circuit_topology,
                 )
-
-        # 5. map wires in all operations and measurements
-        new_tape = type(tape)(
-            [operation.map_wires(mapping) for operation in tape.operations],
-            [measurement.map_wires(mapping) for measurement in tape.measurements],
-            shots=tape.shots,
-        )
-
-        return new_tape
+        return mapping
 
 
 class VF2(Placement):
     """
     finds a mapping between the circuit's wires and the machine's qubits using the VF2 subgraph isomorphism algorithm\n
     the networkx implementation of VF2 doesn't allow for largest common subgraph research, so we're using a combinatorics approach and testing all possibilities from largest to smallest\n
-    this "brute force" approach makes the algorithm quite slower than other solutions in the plugin
+    this "brute force" approach makes the algorithm quite slower than other solutions in the plugin\n
+    If there is no perfect match, the missing nodes are mapped with qubits that minimize the subsequent routing path
     """
 
-    def execute(self, tape):
-        """places the circuit on the machine's connectivity using VF2 algorithm\n
-        If there is no perfect match, the missing nodes are mapped with qubits that minimize the subsequent routing path\n
-        1. find largest common subgraph\n
-        2. for each unmapped node\n
-            3. find the best neighbour (using cost function)\n
-            4. find machine node with shortest path from already mapped machine node\n
-        5. map wires in all operations and measurements\n
+    def _mappings(self, tape, circuit_topology, machine_topology, deadline):
+        # 1. find the largest common subgraph using VF2 algorithm and combinations
+        if deadline is None:
+            common_mapping = graph_util.find_largest_common_subgraph_vf2(
+                circuit_topology, machine_topology
+            )
+        else:
+            common_mapping = graph_util.find_largest_common_subgraph_vf2(
+                circuit_topology,
+                machine_topology,
+                max(deadline - time.monotonic(), 0),
+            )
+        # no common subgraph : every wire is mapped by the completion
+        common_mapping = dict(common_mapping or {})
+        yield self._complete(dict(common_mapping), circuit_topology, machine_topology)
+
+        # other placements of the same common subgraph
+        common_subgraph = nx.Graph(
+            [
+                (a, b)
+                for a, b in circuit_topology.edges
+                if a in common_mapping
+                and b in common_mapping
+                and machine_topology.has_edge(common_mapping[a], common_mapping[b])
+            ]
+        )
+        if common_subgraph.number_of_edges() <= 0:
+            return
+
+        matcher = nx.isomorphism.GraphMatcher(machine_topology, common_subgraph)
+        for monomorphism in matcher.subgraph_monomorphisms_iter():
+            yield self._complete(
+                {wire: qubit for qubit, wire in monomorphism.items()},
+                circuit_topology,
+                machine_topology,
+            )
 
-        Args:
-            tape (QuantumTape): the tape to act on
+    def _complete(self, mapping, circuit_topology, machine_topology):
+        """maps the wires that are not part of the common subgraph
 
-        Raises:
-            Exception: There should be enough space on the machine to run the circuit
+        Args:
+            mapping (dict[int, int]): the mapping of the common subgraph
+            circuit_topology (Graph): the graph representation of the circuit
+            machine_topology (Graph): the graph representation of the machine
 
         Returns:
-            QuantumTape: The transformed quantum tape
+            dict[int, int]: a mapping of every wire in the circuit
         """
-        circuit_topology = graph_util.circuit_graph(tape)
-        machine_topology = graph_util.machine_graph(
-            self.machine_name,
-            self.use_benchmark,
-            self.q1_acceptance,
-            self.q2_acceptance,
-            self.excluded_qubits,
-            self.excluded_couplers,
-        )
-
-        if len(graph_util.find_biggest_group(circuit_topology)) > len(
-            graph_util.find_biggest_group(machine_topology)
-        ):
-            raise Exception(
-                f"There are {machine_topology.number_of_nodes()} qubits on the machine but your circuit has {circuit_topology.number_of_nodes()}."
-            )
-
-        # 1. find the largest common subgraph using VF2 algorithm and combinatorics
-        mapping = graph_util.find_largest_common_subgraph_vf2(
-            circuit_topology, machine_topology
-        )
-
         # 2. find all unmapped nodes
         missing = [
             node for node in circuit_topology.nodes if node not in mapping.keys()
@@ -203,6 +349,16 @@ class VF2(Placement):
                 node, circuit_topology, self.machine_name, self.use_benchmark
             )
 
+            # 4.a if it is not mapped either, the node is placed like an isolated one
+            if most_connected_node not in mapping:
+                mapping[node] = graph_util.find_best_wire(
+                    machine_topology,
+                    self.machine_name,
+                    list(mapping.values()),
+                    self.use_benchmark,
+                )
+                continue
+
             # 5. find machine node with shortest path from already mapped machine node
             possibles = [
                 possible
@@ -218,15 +374,7 @@ class VF2(Placement):
             )
 
             mapping[node] = shortest_path_mapping
-
-        # 5. map wires in all operations and measurements
-        new_tape = type(tape)(
-            [operation.map_wires(mapping) for operation in tape.operations],
-            [measurement.map_wires(mapping) for measurement in tape.measurements],
-            shots=tape.shots,
-        )
-
-        return new_tape
+        return mapping
 
 
 class ASTAR(Placement):
@@ -283,36 +431,7 @@ class ASTAR(Placement):
                 "Error %s in _recurse located in ASTAR: %s", type(e).__name__, e
             )
 
-    def execute(self, tape: QuantumTape) -> QuantumTape:
-        """places the circuit on the machine's connectivity using astar algorithm and comparing path lengths
-
-        Args:
-            tape (QuantumTape): The quantum tape to act on
-
-        Raises:
-            Exception: There should be enough space on the machine to run the circuit
-
-        Returns:
-            QuantumTape: The transformed quantum tape
-        """
-        circuit_topology = graph_util.circuit_graph(tape)
-        machine_topology = graph_util.machine_graph(
-            self.machine_name,
-            self.use_benchmark,
-            self.q1_acceptance,
-            self.q2_acceptance,
-            self.excluded_qubits,
-            self.excluded_couplers,
-        )
-
-        if len(graph_util.find_biggest_group(circuit_topology)) > len(
-            graph_util.find_biggest_group(machine_topology)
-        ):
-            raise Exception(
-                f"There are {machine_topology.number_of_nodes} qubits on the machine but your circuit has {circuit_topology.number_of_nodes}."
-            )
-
-        mapping = {}
+    def _mappings(self, tape, circuit_topology, machine_topology, deadline):
         # sort nodes by degree descending, so that we map the most connected node first
         to_explore = list(
             reversed(
@@ -323,14 +442,56 @@ class ASTAR(Placement):
             )
         )
 
+        if len(to_explore) <= 0:
+            yield {}
+            return
+
+        first_wire = graph_util.find_best_wire(
+            machine_topology, self.machine_name, [], self.use_benchmark
+        )
+        yield self._traverse(to_explore, first_wire, machine_topology, circuit_topology)
+
+        # start the traversal from other qubits, best ones first
+        if deadline is None:
+            return
+
+        others = sorted(
+            [node for node in machine_topology.nodes if node != first_wire],
+            key=lambda node: graph_util.calculate_score(
+                node, machine_topology, self.machine_name, self.use_benchmark
+            ),
+            reverse=True,
+        )
+        for first_wire in others:
+            yield self._traverse(
+                to_explore, first_wire, machine_topology, circuit_topology
+            )
+
+    def _traverse(self, to_explore, first_wire, machine_topology, circuit_topology):
+        """maps the wires one connected group at a time, starting from the most connected wire
+
+        Args:
+            to_explore (list[int]): the wires to map, most connected first
+            first_wire (int): the qubit on which the first wire is mapped
+            machine_topology (Graph): the graph representation of the machine
+            circuit_topology (Graph): the graph representation of the circuit
+
+        Returns:
+            dict[int, int]: a mapping of every wire in the circuit
+        """
+        mapping = {}
         for source in to_explore:
             if source in mapping:
                 continue
-            mapping[source] = graph_util.find_best_wire(
-                machine_topology,
-                self.machine_name,
-                [machine_node for machine_node in mapping.values()],
-                self.use_benchmark,
+            mapping[source] = (
+                first_wire
+                if len(mapping) <= 0
+                else graph_util.find_best_wire(
+                    machine_topology,
+                    self.machine_name,
+                    [machine_node for machine_node in mapping.values()],
+                    self.use_benchmark,
+                )
             )
 
             for destination in to_explore:
@@ -345,10 +506,4 @@ class ASTAR(Placement):
                     machine_topology,
                     circuit_topology,
                 )
-
-        new_tape = type(tape)(
-            [operation.map_wires(mapping) for operation in tape.operations],
-            [measurement.map_wires(mapping) for measurement in tape.measurements],
-            shots=tape.shots,
-        )
-        return new_tape
+        return mapping
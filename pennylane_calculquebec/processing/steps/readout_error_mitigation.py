@@ -301,7 +301,7 @@ class MatrixReadoutMitigation(PostProcStep):
             # Generate the full A-matrix
             if (
                 MatrixReadoutMitigation._readout_matrix_normalized is None
-                or ApiAdapter.is_last_update_expired()
+                or ApiAdapter.is_last_update_expired(self.machine_name)
             ):
                 MatrixReadoutMitigation._readout_matrix_reduced = None
                 MatrixReadoutMitigation._readout_matrix_reduced_inverted = None
@@ -5,15 +5,28 @@ Contains routing pre-processing steps
 from pennylane.tape import QuantumTape
 from pennylane.operation import Operation
 import pennylane as qml
+import networkx as nx
+import math
+from collections import deque
 from pennylane_calculquebec.processing.interfaces import PreProcStep
 from pennylane_calculquebec.utility.graph import (
     circuit_graph,
+    circuit_structure,
     shortest_path,
     machine_graph,
     is_directly_connected,
+    coupler_tables,
 )
+from pennylane_calculquebec.monarq_data import get_readout1_and_cz_fidelities
+from pennylane_calculquebec.utility.cache import LRUCache
+from pennylane_calculquebec.utility.api import keys
 from pennylane_calculquebec.logger import logger
 
+ROUTING_CACHE_SIZE = 256
+
+# routing plans, by step fingerprint (type, parameters and calibration version) and circuit structure
+_plans = LRUCache(ROUTING_CACHE_SIZE)
+
 
 class RoutingException(Exception):
     pass
@@ -21,7 +34,10 @@ class RoutingException(Exception):
 
 class Routing(PreProcStep):
     """
-    base class for routing algorithms
+    base class for routing algorithms.\n
+    Routing algorithms produce a plan : the operations of the circuit (by index, with their new wires) and the swaps between them,
+    and the final position of each wire. Plans are cached by circuit structure, so circuits that only differ by their parameters
+    are routed once per calibration
     """
 
     def __init__(
@@ -54,13 +70,91 @@ class Routing(PreProcStep):
                 "Error %s in __init__ located in Routing: %s", type(e).__name__, e
             )
 
+    def execute(self, tape: QuantumTape) -> QuantumTape:
+        """routes the circuit, reusing the plan of previous circuits with the same structure
+
+        Args:
+            tape (QuantumTape): the tape to transform
+
+        Raises:
+            RoutingException: raised when there is no solution for the routing problem
+
+        Returns:
+            QuantumTape: the transformed tape
+        """
+        return self._apply(tape, self._cached_plan(tape))
+
+    def _cached_plan(self, tape: QuantumTape) -> tuple:
+        """the plan of a circuit, from the plan cache if a circuit with the same structure was routed before
+
+        Args:
+            tape (QuantumTape): the tape to route
+
+        Returns:
+            tuple: the routing plan (see Routing._plan)
+        """
+        structure = circuit_structure(tape)
+        fingerprint = self.fingerprint()
+        plan = _plans.get((fingerprint, structure)) if fingerprint is not None else None
+        if plan is None:
+            plan = self._plan(tape)
+            # planning fetches the calibration, so its version is known from now on
+            fingerprint = self.fingerprint()
+            if fingerprint is not None:
+                _plans.put((fingerprint, structure), plan)
+        return plan
+
+    def _apply(self, tape: QuantumTape, plan: tuple) -> QuantumTape:
+        """builds the routed circuit from a plan
+
+        Args:
+            tape (QuantumTape): the tape to transform
+            plan (tuple): the routing plan (see Routing._plan)
+
+        Returns:
+            QuantumTape: the transformed tape
+        """
+        steps, layout = plan[:2]
+        operations = tape.operations
+        new_operations: list[Operation] = []
+        for index, wires in steps:
+            if index is None:
+                new_operations.append(qml.SWAP(wires))
+            elif wires is None:
+                new_operations.append(operations[index])
+            else:
+                new_operations.append(operations[index].map_wires(wires))
+
+        measurements = (
+            tape.measurements
+            if layout is None
+            else [measurement.map_wires(layout) for measurement in tape.measurements]
+        )
+        return type(tape)(new_operations, measurements, shots=tape.shots)
+
+    def _plan(self, tape: QuantumTape) -> tuple[tuple, dict]:
+        """routes a circuit
+
+        Args:
+            tape (QuantumTape): the tape to route
+
+        Raises:
+            RoutingException: raised when there is no solution for the routing problem
+
+        Returns:
+            tuple[tuple, dict]: the steps of the routed circuit, and the final qubit of each wire (None if wires end where they started).
+            A step is (index, wire map) for an operation of the tape (wire map is None if its wires don't change), or (None, wires) for a swap.
+            Subclasses can append what they derive from the plan, so that it is cached with it
+        """
+        raise NotImplementedError()
+
 
 class Swaps(Routing):
     """
     a routing algorithm that uses swaps
     """
 
-    def execute(self, tape):
+    def _plan(self, tape):
         """uses swap to permute wires when 2 qubits operation appear which are not directly mapped to a coupler in the machine
 
         ie. cnot(0, 1), qubit 0 and 1 are not directly connected in the machine's graph.
@@ -74,7 +168,7 @@ class Swaps(Routing):
             RoutingException: raised when there is no solution for the routing problem
 
         Returns:
-            QuantumTape: the transformed tape
+            tuple[tuple, dict]: the routing plan (see Routing._plan)
         """
         circuit_topology = circuit_graph(tape)
         machine_topology = machine_graph(
@@ -85,45 +179,378 @@ class Swaps(Routing):
             self.excluded_qubits,
             self.excluded_couplers,
         )
-        new_operations: list[Operation] = []
-        list_copy = tape.operations.copy()
+        steps = []
 
-        for operation in list_copy:
+        for index, operation in enumerate(tape.operations):
             if operation.num_wires == 2 and not is_directly_connected(
                 operation, machine_topology
             ):
-                path = shortest_path(
-                    operation.wires[0],
-                    operation.wires[1],
-                    machine_topology,
-                    self.machine_name,
-                    prioritized_nodes=[n for n in circuit_topology.nodes],
-                    use_benchmark=self.use_benchmark,
-                )
+                path = self._path(operation, machine_topology, circuit_topology)
 
                 if path is None:
                     raise RoutingException(
                         "It is not possible to route the circuit given available qubits and couplers"
                     )
                 for node in reversed(range(1, len(path) - 1)):
-                    new_operations += [qml.SWAP([path[node], path[node + 1]])]
+                    steps.append((None, (path[node], path[node + 1])))
 
-                new_operations += [
-                    operation.map_wires(
+                steps.append(
+                    (
+                        index,
                         {
                             origin: target
                             for (origin, target) in zip(
                                 operation.wires, [path[0], path[1]]
                             )
-                        }
+                        },
                     )
-                ]
+                )
 
                 for node in range(1, len(path) - 1):
-                    new_operations += [qml.SWAP([path[node], path[node + 1]])]
+                    steps.append((None, (path[node], path[node + 1])))
             else:
-                new_operations += [operation]
+                steps.append((index, None))
+
+        return tuple(steps), None
+
+    def _path(self, operation, machine_topology, circuit_topology):
+        """the path along which an operation's qubits are swapped together
+
+        Args:
+            operation (Operation): a two qubits operation
+            machine_topology (Graph): the graph representation of the machine
+            circuit_topology (Graph): the graph representation of the circuit
+
+        Returns:
+            list[int]: the path from the operation's first qubit to its second one. None if there is no path
+        """
+        return shortest_path(
+            operation.wires[0],
+            operation.wires[1],
+            machine_topology,
+            self.machine_name,
+            prioritized_nodes=[n for n in circuit_topology.nodes],
+            use_benchmark=self.use_benchmark,
+        )
+
+
+class NoiseAwareSwaps(Swaps):
+    """
+    a routing algorithm that uses swaps along the paths with the highest cz fidelities.\n
+    Paths maximize the product of their couplers' cz fidelities, instead of using readout and cz errors,
+    which minimizes the expected infidelity of the inserted swaps. Paths are cached until the benchmark changes.\n
+    route returns the routed circuit with its estimated success probability, which is cached with the plan
+    """
+
+    # a swap is three cz
+    CZ_PER_SWAP = 3
+
+    def route(self, tape: QuantumTape) -> tuple[QuantumTape, float]:
+        """uses swaps to permute wires along the most reliable paths (see Swaps._plan), and estimates the success probability of the result
+
+        Args:
+            tape (QuantumTape): the tape to transform
+
+        Raises:
+            RoutingException: raised when there is no solution for the routing problem
+
+        Returns:
+            tuple[QuantumTape, float]: the transformed tape, and its estimated success probability (None without benchmarks)
+        """
+        plan = self._cached_plan(tape)
+        return self._apply(tape, plan), plan[2]
+
+    def _plan(self, tape):
+        """plans the swaps (see Swaps._plan), and estimates the success probability of the routed circuit
+
+        Args:
+            tape (QuantumTape): the tape to route
+
+        Raises:
+            RoutingException: raised when there is no solution for the routing problem
+
+        Returns:
+            tuple[tuple, dict, float]: the routing plan (see Routing._plan), and the estimated success probability (None without benchmarks)
+        """
+        plan = super()._plan(tape)
+        success_probability = (
+            self.estimate_success_probability(self._apply(tape, plan))
+            if self.use_benchmark
+            else None
+        )
+        return (*plan, success_probability)
+
+    def _path(self, operation, machine_topology, circuit_topology):
+        return shortest_path(
+            operation.wires[0],
+            operation.wires[1],
+            machine_topology,
+            self.machine_name,
+            use_benchmark=self.use_benchmark,
+            noise_aware=True,
+        )
+
+    def estimate_success_probability(self, tape) -> float:
+        """estimates the probability that a routed circuit runs without error\n
+        it is the product of the cz fidelity of each two qubits operation (three for a swap),
+        and of the state 1 readout fidelity of each measured qubit
 
-        new_tape = type(tape)(new_operations, tape.measurements, shots=tape.shots)
+        Args:
+            tape (QuantumTape): a routed tape
+
+        Returns:
+            float: the estimated success probability
+        """
+        cz_fidelities, _ = coupler_tables(self.machine_name)
+        readout1 = get_readout1_and_cz_fidelities(self.machine_name)[
+            keys.READOUT_STATE_1_FIDELITY
+        ]
+
+        log_probability = 0
+        for operation in tape.operations:
+            if operation.num_wires != 2:
+                continue
+            fidelity = cz_fidelities.get(tuple(operation.wires), 0)
+            if fidelity <= 0:
+                return 0
+            count = NoiseAwareSwaps.CZ_PER_SWAP if operation.name == "SWAP" else 1
+            log_probability += count * math.log(fidelity)
+
+        measured = set(
+            wire for measurement in tape.measurements for wire in measurement.wires
+        )
+        for wire in measured:
+            fidelity = readout1.get(str(wire), 0)
+            if fidelity <= 0:
+                return 0
+            log_probability += math.log(fidelity)
+
+        return math.exp(log_probability)
+
+
+class Sabre(Routing):
+    """
+    a routing algorithm based on SABRE (Li et al., 2019).\n
+    Gates are executed as soon as their qubits are coupled. When every gate in the front layer is blocked,
+    the swap that brings the front layer (and, to a lesser extent, the next gates) closest together is applied.
+    Swaps are never undone : the layout evolves along the circuit, and measurements are remapped at the end
+    """
+
+    def __init__(
+        self,
+        machine_name: str,
+        use_benchmark=True,
+        q1_acceptance=0.5,
+        q2_acceptance=0.5,
+        excluded_qubits=[],
+        excluded_couplers=[],
+        lookahead_size=20,
+        lookahead_weight=0.5,
+        decay=0.001,
+        decay_reset=5,
+    ):
+        """constructor for the SABRE routing algorithm
+
+        Args:
+            use_benchmark (bool, optional): should we use benchmarks during placement? Defaults to True.
+            q1_acceptance (float, optional): what is the level of acceptance for state 1 readout? Defaults to 0.5.
+            q2_acceptance (float, optional): what is the level of acceptance for cz fidelity? Defaults to 0.5.
+            excluded_qubits (list, optional): what qubits should we exclude from the mapping? Defaults to [].
+            excluded_couplers (list, optional): what couplers should we exclude from the mapping? Defaults to [].
+            lookahead_size (int, optional): how many gates past the front layer are considered when choosing a swap? Defaults to 20.
+            lookahead_weight (float, optional): the weight of those gates, relative to the front layer. Defaults to 0.5.
+            decay (float, optional): how much a qubit's swaps are penalized each time it is swapped, so that swaps are spread out. Defaults to 0.001.
+            decay_reset (int, optional): after how many swaps are the penalties reset? Defaults to 5.
+        """
+        super().__init__(
+            machine_name,
+            use_benchmark,
+            q1_acceptance,
+            q2_acceptance,
+            excluded_qubits,
+            excluded_couplers,
+        )
+        self.lookahead_size = lookahead_size
+        self.lookahead_weight = lookahead_weight
+        self.decay = decay
+        self.decay_reset = decay_reset
+
+    def _plan(self, tape):
+        """routes the circuit with swaps that permanently change the layout
+
+        ie. cnot(0, 2), cnot(0, 2), with 0, 1 and 2 in a line.
+        the new circuit will be : swap(1, 2), cnot(0, 1), cnot(0, 1), and wire 2 is measured on qubit 1
+
+        Args:
+            tape (QuantumTape): the tape to transform
+
+        Raises:
+            RoutingException: raised when there is no solution for the routing problem
+
+        Returns:
+            tuple[tuple, dict]: the routing plan (see Routing._plan)
+        """
+        machine_topology = machine_graph(
+            self.machine_name,
+            self.use_benchmark,
+            self.q1_acceptance,
+            self.q2_acceptance,
+            self.excluded_qubits,
+            self.excluded_couplers,
+        )
+        distances = dict(nx.all_pairs_shortest_path_length(machine_topology))
+
+        operations = tape.operations
+        # the operations that remain on each wire, in order
+        queues = {wire: deque() for wire in tape.wires}
+        for index, operation in enumerate(operations):
+            for wire in operation.wires:
+                queues[wire].append(index)
+
+        # wire -> qubit, and qubit -> wire
+        layout = {wire: wire for wire in tape.wires}
+        occupants = {wire: wire for wire in tape.wires}
+        decays = {}
+        swaps_since_progress = 0
+        # operations without wires (ie. global phases) are not in any queue : they come first, in order
+        steps = [
+            (index, None)
+            for index, operation in enumerate(operations)
+            if len(operation.wires) == 0
+        ]
+
+        def distance(operation):
+            a, b = (layout[wire] for wire in operation.wires)
+            if a not in distances or b not in distances[a]:
+                raise RoutingException(
+                    "It is not possible to route the circuit given available qubits and couplers"
+                )
+            return distances[a][b]
+
+        def swap(a, b):
+            wire_a, wire_b = occupants.get(a), occupants.get(b)
+            occupants[a], occupants[b] = wire_b, wire_a
+            if wire_a is not None:
+                layout[wire_a] = b
+            if wire_b is not None:
+                layout[wire_b] = a
+            steps.append((None, (a, b)))
+
+        while any(len(queue) > 0 for queue in queues.values()):
+            # the operations whose predecessors have all been executed
+            front = sorted(
+                set(
+                    queue[0]
+                    for queue in queues.values()
+                    if len(queue) > 0
+                    and all(
+                        queues[wire][0] == queue[0]
+                        for wire in operations[queue[0]].wires
+                    )
+                )
+            )
+
+            executable = [
+                index
+                for index in front
+                if operations[index].num_wires != 2 or distance(operations[index]) == 1
+            ]
+            if len(executable) > 0:
+                for index in executable:
+                    operation = operations[index]
+                    steps.append(
+                        (index, {wire: layout[wire] for wire in operation.wires})
+                    )
+                    for wire in operation.wires:
+                        queues[wire].popleft()
+                decays.clear()
+                swaps_since_progress = 0
+                continue
+
+            blocked = [operations[index] for index in front]
+
+            if swaps_since_progress > 2 * machine_topology.number_of_nodes():
+                # the heuristic is going around in circles : bring the closest gate's qubits together
+                operation = min(blocked, key=distance)
+                a, b = (layout[wire] for wire in operation.wires)
+                path = nx.shortest_path(machine_topology, a, b)
+                for node in range(len(path) - 2):
+                    swap(path[node], path[node + 1])
+                swaps_since_progress = 0
+                continue
+
+            lookahead = self._lookahead(front, queues, operations)
+
+            def cost(candidate):
+                a, b = candidate
+                wire_a, wire_b = occupants.get(a), occupants.get(b)
+                if wire_a is not None:
+                    layout[wire_a] = b
+                if wire_b is not None:
+                    layout[wire_b] = a
+
+                front_cost = sum(distance(operation) for operation in blocked) / len(
+                    blocked
+                )
+                lookahead_cost = (
+                    sum(distance(operation) for operation in lookahead) / len(lookahead)
+                    if len(lookahead) > 0
+                    else 0
+                )
+
+                if wire_a is not None:
+                    layout[wire_a] = a
+                if wire_b is not None:
+                    layout[wire_b] = b
+
+                return max(decays.get(a, 1), decays.get(b, 1)) * (
+                    front_cost + self.lookahead_weight * lookahead_cost
+                )
+
+            # swaps on the couplers that touch a blocked gate's qubits
+            candidates = sorted(
+                set(
+                    tuple(sorted((qubit, neighbour)))
+                    for operation in blocked
+                    for qubit in (layout[wire] for wire in operation.wires)
+                    for neighbour in machine_topology.neighbors(qubit)
+                )
+            )
+            a, b = min(candidates, key=cost)
+            swap(a, b)
+            swaps_since_progress += 1
+
+            decays[a] = decays.get(a, 1) + self.decay
+            decays[b] = decays.get(b, 1) + self.decay
+            if swaps_since_progress % self.decay_reset == 0:
+                decays.clear()
+
+        return tuple(steps), dict(layout)
+
+    def _lookahead(self, front, queues, operations) -> list[Operation]:
+        """the next two qubits operations after the front layer
+
+        Args:
+            front (list[int]): the indices of the operations in the front layer
+            queues (dict[int, deque[int]]): the indices of the operations that remain on each wire
+            operations (list[Operation]): the operations of the circuit
+
+        Returns:
+            list[Operation]: at most lookahead_size operations
+        """
+        indices = set()
+        depth = 1
+        while len(indices) < self.lookahead_size:
+            added = False
+            for queue in queues.values():
+                if depth >= len(queue):
+                    continue
+                added = True
+                index = queue[depth]
+                if index not in front and operations[index].num_wires == 2:
+                    indices.add(index)
+            if not added:
+                break
+            depth += 1
 
-        return new_tape
+        return [operations[index] for index in sorted(indices)[: self.lookahead_size]]
@@ -139,6 +139,8 @@ class JobStatus(Enum):
 class queries:
     MACHINE_NAME = "?machineName"
     NAME = "?name"
+    PAGE = "?page"
+    PAGE_SIZE = "&size"
 
 
 class routes:
@@ -176,6 +178,9 @@ class keys:
     RESULTS_PER_DEVICE = "resultsPerDevice"
     ITEMS = "items"
     ID = "id"
+    JOB = "job"
+    RESULT = "result"
+    HISTOGRAM = "histogram"
 
 
 instructions: dict[str, str] = {
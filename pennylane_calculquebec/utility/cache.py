@@ -0,0 +1,131 @@
+"""
+Contains in-memory caching utilities
+"""
+
+from collections import OrderedDict
+from typing import Callable
+import threading
+
+
+class LRUCache:
+    """
+    a thread safe mapping of bounded size. When it is full, the least recently used entry is evicted.\n
+    With a memory limit, the size of each entry is estimated when it is written, and entries are evicted
+    until the total fits in the limit. Hits and misses of get are counted
+
+    Args:
+        max_size (int) : the maximum number of entries. Defaults to 128
+        max_bytes (int) : the maximum total size of the entries, in bytes. Defaults to None (no limit)
+        sizeof (Callable[[any], int]) : estimates the size of a value, in bytes. Required with max_bytes
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        max_bytes: int = None,
+        sizeof: Callable[[any], int] = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size should be a positive number")
+        if max_bytes is not None and (max_bytes <= 0 or sizeof is None):
+            raise ValueError("max_bytes should be a positive number, used with sizeof")
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def bytes(self) -> int:
+        """
+        the estimated total size of the entries, in bytes. Always 0 without a memory limit
+        """
+        with self._lock:
+            return self._bytes
+
+    def get(self, key, default=None):
+        """
+        reads an entry, and marks it as the most recently used
+
+        Args:
+            key (Hashable) : the key of the entry
+            default (any) : what to return if the entry is missing. Defaults to None
+
+        Returns:
+            any : the value of the entry, or default
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """
+        writes an entry, evicting the least recently used ones if the cache is full.
+        An entry that is larger than the memory limit is not written
+
+        Args:
+            key (Hashable) : the key of the entry
+            value (any) : the value of the entry
+        """
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._entries) > self.max_size or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        """
+        removes an entry, if it exists. The lock must be held
+
+        Args:
+            key (Hashable) : the key of the entry
+        """
+        if key in self._entries:
+            del self._entries[key]
+            self._bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        """
+        removes every entry
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict : the number of hits, misses and entries, and the estimated size of the entries in bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -7,7 +7,6 @@ from pennylane.operation import Operation
 import networkx as nx
 from networkx.algorithms.isomorphism.ismags import ISMAGS
 from typing import Tuple
-from copy import deepcopy
 from itertools import combinations
 from pennylane_calculquebec.monarq_data import (
     get_connectivity,
@@ -15,10 +14,19 @@ from pennylane_calculquebec.monarq_data import (
     get_readout1_and_cz_fidelities,
 )
 from pennylane_calculquebec.utility.api import keys
+from pennylane_calculquebec.utility.cache import LRUCache
 from networkx.exception import NetworkXNoPath
+import math
 import sys
+import threading
+import time
 
 MAX_INT = sys.maxsize
+PATH_TABLE_CACHE_SIZE = 64
+
+# shortest paths per machine (None when benchmarks are not used), with the routing costs they were computed from
+_path_tables: dict[str, tuple[dict, LRUCache]] = {}
+_path_tables_lock = threading.Lock()
 
 
 class GraphException(Exception):
@@ -70,7 +78,7 @@ def circuit_graph(tape: QuantumTape) -> nx.Graph:
         tape (QuantumTape) : QuantumTape, a tape representing the quantum circuit
 
     Returns:
-        nx.Graph: a graph representing the connections between the wires in the circuit
+        nx.Graph: a graph representing the connections between the wires in the circuit. Links are weighted by their number of operations
     """
     links: list[Tuple[int, int]] = []
 
@@ -84,10 +92,31 @@ def circuit_graph(tape: QuantumTape) -> nx.Graph:
         toAdd = (operation.wires[0], operation.wires[1])
         links.append(toAdd)
     graph = nx.Graph(set(links))
+    # the weight of a link is the number of operations that use it
+    for a, b in links:
+        graph[a][b]["weight"] = graph[a][b].get("weight", 0) + 1
     graph.add_nodes_from([wire for wire in tape.wires if wire not in graph.nodes])
     return graph
 
 
+def circuit_structure(tape: QuantumTape) -> tuple:
+    """
+    the wires of each operation and measurement of a circuit, which is all that placement and routing depend on.\n
+    Circuits that only differ by their parameters (ie. variational circuits) have the same structure
+
+    Args:
+        tape (QuantumTape) : the tape representing the quantum circuit
+
+    Returns:
+        tuple : a hashable description of the circuit's structure
+    """
+    return (
+        tuple(tape.wires),
+        tuple(tuple(operation.wires) for operation in tape.operations),
+        tuple(tuple(measurement.wires) for measurement in tape.measurements),
+    )
+
+
 def machine_graph(
     machine_name,
     use_benchmark,
@@ -175,13 +204,18 @@ def _find_isomorphisms(circuit: nx.Graph, machine: nx.Graph) -> dict[int, int]:
     return None
 
 
-def find_largest_common_subgraph_vf2(circuit: nx.Graph, machine: nx.Graph):
+def find_largest_common_subgraph_vf2(
+    circuit: nx.Graph, machine: nx.Graph, time_budget: float = 1.0
+):
     """
-    Uses vf2 and combinations to find the largest common graph between two graphs
+    Uses vf2 and combinations to find the largest common graph between two graphs\n
+    Combinations of edges are tried from largest to smallest until the time budget runs out.
+    Past that point, a common subgraph is built greedily (see _greedy_common_subgraph)
 
     Args:
         circuit (Graph) : the graph of the circuit
         machine (Graph) : the graph of the machine
+        time_budget (float) : the number of seconds the combinations can be tried for. Defaults to 1. None means no limit
     Returns:
         dict[int, int] : a mapping between the circuit's wires and the machines qubits
     """
@@ -189,13 +223,56 @@ def find_largest_common_subgraph_vf2(circuit: nx.Graph, machine: nx.Graph):
     if len(edges) <= 0:
         return _find_isomorphisms(circuit, machine)
 
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    max_degree = max((degree for _, degree in machine.degree), default=0)
+
     for i in reversed(range(len(edges) + 1)):
         for comb in combinations(edges, i):
-            result = _find_isomorphisms(nx.Graph(comb), machine)
+            if deadline is not None and time.monotonic() > deadline:
+                return _greedy_common_subgraph(circuit, machine)
+
+            subgraph = nx.Graph(comb)
+            # a subgraph with more nodes or links per node than the machine can't fit in it
+            if subgraph.number_of_nodes() > machine.number_of_nodes() or any(
+                degree > max_degree for _, degree in subgraph.degree
+            ):
+                continue
+
+            result = _find_isomorphisms(subgraph, machine)
             if result:
                 return result
 
 
+def _greedy_common_subgraph(circuit: nx.Graph, machine: nx.Graph):
+    """
+    builds a common subgraph one edge at a time, keeping an edge only if the subgraph still fits in the machine.\n
+    The most used edges are tried first. The subgraph can't be extended, but it is not always the largest
+
+    Args:
+        circuit (Graph) : the graph of the circuit
+        machine (Graph) : the graph of the machine
+    Returns:
+        dict[int, int] : a mapping between the circuit's wires and the machines qubits
+    """
+    edges = sorted(
+        circuit.edges(data="weight", default=1), key=lambda edge: edge[2], reverse=True
+    )
+
+    subgraph = nx.Graph()
+    mapping = None
+    for a, b, _ in edges:
+        new_nodes = [node for node in (a, b) if node not in subgraph]
+        subgraph.add_edge(a, b)
+        result = _find_isomorphisms(subgraph, machine)
+        if result:
+            mapping = result
+            continue
+
+        subgraph.remove_edge(a, b)
+        subgraph.remove_nodes_from(new_nodes)
+    return mapping
+
+
 def find_largest_common_subgraph_ismags(circuit: nx.Graph, machine: nx.Graph):
     """
     Uses IMAGS to find the largest common graph between two graphs
@@ -206,15 +283,67 @@ def find_largest_common_subgraph_ismags(circuit: nx.Graph, machine: nx.Graph):
     Returns:
         dict[int, int] : a mapping between the circuit's wires and the machines qubits
     """
+    for mapping in largest_common_subgraphs_ismags(circuit, machine):
+        return mapping
+
+
+def largest_common_subgraphs_ismags(circuit: nx.Graph, machine: nx.Graph):
+    """
+    Uses IMAGS to find every largest common graph between two graphs, up to symmetry
+
+    Args:
+        circuit (Graph) : the graph of the circuit
+        machine (Graph) : the graph of the machine
+    Returns:
+        Iterator[dict[int, int]] : mappings between the circuit's wires and the machines qubits
+    """
     ismags = ISMAGS(machine, circuit)
     for mapping in ismags.largest_common_subgraph():
-        return (
+        yield (
             {v: k for (k, v) in mapping.items()}
             if mapping is not None and len(mapping) > 0
             else mapping
         )
 
 
+_coupler_tables: dict[str, tuple[dict, dict, dict]] = {}
+
+
+def coupler_tables(machine_name: str) -> tuple[dict, dict]:
+    """
+    the cz fidelity and routing cost of each coupler of a machine, keyed by both orderings of its qubits.\n
+    The tables are built once per calibration, and rebuilt when the machine's fidelities change
+
+    Args:
+        machine_name (str) : the quantum machine's name
+
+    Returns:
+        tuple[dict[tuple[int, int], float], dict[tuple[int, int], float]] : the cz fidelities and the routing costs
+    """
+    fidelities = get_readout1_and_cz_fidelities(machine_name)
+    cached = _coupler_tables.get(machine_name)
+    if cached is not None and cached[0] is fidelities:
+        return cached[1], cached[2]
+
+    readout1 = fidelities[keys.READOUT_STATE_1_FIDELITY]
+    cz_fidelities = {}
+    costs = {}
+    for (a, b), cz_fidelity in fidelities[keys.CZ_GATE_FIDELITY].items():
+        cz_fidelities[(a, b)] = cz_fidelities[(b, a)] = cz_fidelity
+        if str(a) not in readout1 or str(b) not in readout1:
+            continue
+
+        # the error of the coupler and of both its qubits (ie 3 - fidelities)
+        # we add one at the end so that if a node is prioritized,
+        # it doesn't become negative when it is subtracted one
+        costs[(a, b)] = costs[(b, a)] = (
+            3 - (cz_fidelity + readout1[str(a)] + readout1[str(b)]) + 1
+        )
+
+    _coupler_tables[machine_name] = (fidelities, cz_fidelities, costs)
+    return cz_fidelities, costs
+
+
 def shortest_path(
     start: int,
     end: int,
@@ -223,9 +352,11 @@ def shortest_path(
     excluding: list[int] = [],
     prioritized_nodes: list[int] = [],
     use_benchmark=True,
+    noise_aware=False,
 ):
     """
-    find the shortest path between node start and end
+    find the shortest path between node start and end.
+    Paths are read from a table of all shortest paths in the graph, which is cached (see _path_table)
 
     Args :
         start : start node
@@ -235,54 +366,96 @@ def shortest_path(
         excluding : nodes we dont want to use
         prioritized_nodes : nodes we want to use if possible
         use_benchmark : should we consider fidelities in choosing the paths?
+        noise_aware : should the path maximize the product of its cz fidelities, instead of using readout and cz errors?
         Returns:
             list[int] : the shortest path from start to end
     """
-    r1_cz_fidelities = (
-        get_readout1_and_cz_fidelities(machine_name) if use_benchmark else {}
-    )
-    g_copy = deepcopy(graph)
-    g_copy.remove_nodes_from(excluding)
+    for node in (start, end):
+        if node not in graph or node in excluding:
+            raise nx.NodeNotFound(f"Node {node} not in graph")
 
-    def weight(source_node, dest_node):
-        """
-        this function is used to determine the cost of a link
-        it is determined by the error of the source + the error of the coupler + the error of the destination
-        """
+    path = _path_table(
+        graph, machine_name, excluding, prioritized_nodes, use_benchmark, noise_aware
+    )[start].get(end)
+    return list(path) if path is not None else None
 
-        if not use_benchmark:
-            return 1  # return default value of one if we should not use benchmarks
-
-        # there should be only one cz weight from 0 to 1
-        source_dest_cz = [
-            dest_fidelity
-            for coupler, dest_fidelity in r1_cz_fidelities[
-                keys.CZ_GATE_FIDELITY
-            ].items()
-            if source_node in coupler and dest_node in coupler
-        ]
-        source_readout1 = r1_cz_fidelities[keys.READOUT_STATE_1_FIDELITY][
-            str(source_node)
-        ]
-        dest_readout1 = r1_cz_fidelities[keys.READOUT_STATE_1_FIDELITY][str(dest_node)]
 
-        # this node has no coupler. we should never chose it!
-        if len(source_dest_cz) < 1:
-            return MAX_INT
+def _path_table(
+    graph: nx.Graph,
+    machine_name: str,
+    excluding: list[int],
+    prioritized_nodes: list[int],
+    use_benchmark: bool,
+    noise_aware: bool = False,
+) -> dict[int, dict[int, list[int]]]:
+    """
+    the shortest paths between every pair of nodes in a graph.\n
+    They are computed once per graph, exclusions and prioritized nodes, and recomputed when the machine's fidelities change
 
-        # weight corresponds to the cz error (ie 1 - fidelity)
-        # we add one at the end so that if the node is prioritized,
-        # it doesn't become negative when it is subtracted one
-        w = 3 - (source_dest_cz[0] + source_readout1 + dest_readout1) + 1
+    Args:
+        graph (Graph) : the graph to find paths in
+        machine_name (str) : the quantum machine's name
+        excluding (list[int]) : nodes we dont want to use
+        prioritized_nodes (list[int]) : nodes we want to use if possible
+        use_benchmark (bool) : should we consider fidelities in choosing the paths?
+        noise_aware (bool) : should links be weighted by their cz log infidelity (-log(fidelity))? prioritized nodes are ignored if so
 
-        if source_node in prioritized_nodes or dest_node in prioritized_nodes:
-            return w - 1
-        return w
+    Returns:
+        dict[int, dict[int, list[int]]] : the shortest path from each node to each node it can reach
+    """
+    cz_fidelities, costs = (
+        coupler_tables(machine_name) if use_benchmark else (None, None)
+    )
+    owner = machine_name if use_benchmark else None
+    with _path_tables_lock:
+        cached = _path_tables.get(owner)
+        if cached is None or cached[0] is not costs:
+            cached = _path_tables[owner] = (costs, LRUCache(PATH_TABLE_CACHE_SIZE))
+    tables: LRUCache = cached[1]
+
+    key = (
+        frozenset(graph.nodes),
+        frozenset(frozenset(edge) for edge in graph.edges),
+        frozenset(excluding),
+        frozenset(prioritized_nodes) if use_benchmark and not noise_aware else None,
+        use_benchmark and noise_aware,
+    )
+    paths = tables.get(key)
+    if paths is not None:
+        return paths
 
-    try:
-        return nx.astar_path(g_copy, start, end, weight=lambda u, v, _: weight(u, v))
-    except NetworkXNoPath:
-        return None
+    excluded = set(excluding)
+    prioritized = set(prioritized_nodes)
+
+    def weight(source_node, dest_node, _):
+        """
+        the cost of a link. Links to excluded nodes are hidden (None), which saves copying the graph without them
+        """
+        if source_node in excluded or dest_node in excluded:
+            return None
+        if not use_benchmark:
+            return 1
+
+        if noise_aware:
+            # the sum of log infidelities is the log of the path's success probability
+            # the small cost per link makes shorter paths win between perfect couplers
+            fidelity = cz_fidelities.get((source_node, dest_node), 0)
+            return -math.log(fidelity) + 1e-9 if fidelity > 0 else MAX_INT
+
+        # the error of the source + the error of the coupler + the error of the destination
+        # links that are not couplers should never be chosen
+        cost = costs.get((source_node, dest_node), MAX_INT)
+        if cost != MAX_INT and (source_node in prioritized or dest_node in prioritized):
+            return cost - 1
+        return cost
+
+    paths = {
+        node: nx.single_source_dijkstra_path(graph, node, weight=weight)
+        for node in graph.nodes
+        if node not in excluded
+    }
+    tables.put(key, paths)
+    return paths
 
 
 def find_best_neighbour(
@@ -327,13 +500,10 @@ def find_best_wire(
     Returns:
         int : the wire with best score
     """
-    graph_copy = deepcopy(graph)
-    graph_copy.remove_nodes_from(excluded)
+    view = nx.restricted_view(graph, excluded, [])
     return max(
-        [node for node in graph_copy.nodes],
-        key=lambda other: calculate_score(
-            other, graph_copy, machine_name, use_benchmark
-        ),
+        [node for node in view.nodes],
+        key=lambda other: calculate_score(other, view, machine_name, use_benchmark),
     )
 
 
@@ -459,9 +629,9 @@ def calculate_score(
     if len(neighbours) <= 0:
         return source_readout1
 
-    all_cz = fidelities[keys.CZ_GATE_FIDELITY]
+    cz_fidelities, _ = coupler_tables(machine_name)
     adjacent_cz = [
-        all_cz[f] for f in all_cz if source in f and any(n in f for n in neighbours)
+        cz_fidelities[(source, n)] for n in neighbours if (source, n) in cz_fidelities
     ]
     adjacent_readout1 = [
         fidelities[keys.READOUT_STATE_1_FIDELITY][str(n)] for n in neighbours
@@ -76,6 +76,24 @@ def find_next_gate(index: int, wires: list[int], op_list: list[Operation]) -> in
     return None
 
 
+def wire_bounds(op_list: list[Operation]) -> tuple[dict, dict]:
+    """indexes the first and the last operation acting on each wire of a list, in a single pass
+
+    Args:
+        op_list (list[Operation]): the list of operation to consider
+
+    Returns:
+        tuple[dict, dict]: the index of the first and of the last operation on each wire
+    """
+    first = {}
+    last = {}
+    for i, op in enumerate(op_list):
+        for wire in op.wires:
+            first.setdefault(wire, i)
+            last[wire] = i
+    return first, last
+
+
 def is_single_axis_gate(op: Operation, axis: str):
     """check if given operation is on given basis
 
@@ -1,14 +1,20 @@
 from pennylane_calculquebec.API.adapter import (
     ApiAdapter,
+    TimeoutHTTPAdapter,
     ApiException,
     MultipleProjectsException,
     NoProjectFoundException,
+    REFRESH_DELAY,
 )
 from pennylane_calculquebec.API.client import CalculQuebecClient
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from pennylane_calculquebec.utility.api import ApiUtility, keys
 from datetime import datetime, timedelta
+import json
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from pennylane_calculquebec.API.disk_cache import DiskCache
 
 client = CalculQuebecClient("test", "test", "test", project_id="123")
 
@@ -36,13 +42,13 @@ def mock_get_project_id_by_name():
 
 @pytest.fixture
 def mock_requests_get():
-    with patch("requests.get") as requests_get:
+    with patch("requests.Session.get") as requests_get:
         yield requests_get
 
 
 @pytest.fixture
 def mock_requests_post():
-    with patch("requests.post") as request_post:
+    with patch("requests.Session.post") as request_post:
         yield request_post
 
 
@@ -77,9 +83,10 @@ def mock_job_body():
 
 
 class Res:
-    def __init__(self, status_code, text):
+    def __init__(self, status_code, text, headers=None):
         self.status_code = status_code
         self.text = text
+        self.headers = headers if headers is not None else {}
 
 
 @pytest.fixture(autouse=True)
@@ -109,11 +116,140 @@ def test_initialize():
     assert ApiAdapter.instance().headers == headers
 
 
+def test_session():
+    ApiAdapter.initialize(client, pool_size=4, timeout=12)
+    session = ApiAdapter.instance().session
+
+    # every request goes through the same pool of connections
+    http_adapter = session.get_adapter("https://thunderhead")
+    assert isinstance(http_adapter, TimeoutHTTPAdapter)
+    assert http_adapter._pool_maxsize == 4
+
+    # the default timeout is only applied when none is given
+    with patch("requests.adapters.HTTPAdapter.send") as send:
+        http_adapter.send("request")
+        assert send.call_args.kwargs["timeout"] == 12
+
+        http_adapter.send("request", timeout=3)
+        assert send.call_args.kwargs["timeout"] == 3
+
+
 def test_is_last_update_expired():
-    ApiAdapter._last_update = datetime.now() - timedelta(hours=25)
+    ApiAdapter.initialize(client)
+    assert ApiAdapter.is_last_update_expired()
+
+    ApiAdapter.instance()._last_updates["yamaska"] = datetime.now() - timedelta(
+        hours=25
+    )
     assert ApiAdapter.is_last_update_expired()
-    ApiAdapter._last_update = datetime.now() - timedelta(hours=5)
+    assert ApiAdapter.is_last_update_expired("yamaska")
+
+    ApiAdapter.instance()._last_updates["yamaska"] = datetime.now() - timedelta(hours=5)
     assert not ApiAdapter.is_last_update_expired()
+    assert not ApiAdapter.is_last_update_expired("yamaska")
+    assert ApiAdapter.is_last_update_expired("yukon")
+
+
+def test_instances(mock_requests_get):
+    other_client = CalculQuebecClient("other", "test", "test", project_id="456")
+    adapter = ApiAdapter(client)
+    other_adapter = ApiAdapter.initialize(other_client)
+
+    # calls on the class go to the default instance
+    assert ApiAdapter.instance() is other_adapter
+
+    hosts = []
+
+    def get(route, headers):
+        hosts.append(route.split("/")[0])
+        return Res(200, json.dumps({"name": route.split("=")[-1]}))
+
+    mock_requests_get.side_effect = get
+
+    # each instance has its own client, and caches machines separately
+    assert adapter.get_machine_by_name("yamaska") == {"name": "yamaska"}
+    assert adapter.get_machine_by_name("yukon") == {"name": "yukon"}
+    assert ApiAdapter.get_machine_by_name("yukon") == {"name": "yukon"}
+    assert adapter.get_machine_by_name("yamaska") == {"name": "yamaska"}
+    assert hosts == ["test", "test", "other"]
+
+    adapter.clean_cache()
+    adapter.get_machine_by_name("yamaska")
+    assert hosts == ["test", "test", "other", "test"]
+
+
+def test_concurrent_benchmarks(mock_requests_get):
+    adapter = ApiAdapter(client)
+    routes = []
+
+    def get(route, headers):
+        routes.append(route)
+        if "benchmark" in route:
+            return Res(200, json.dumps({"machine": route.split("/")[-2]}))
+        return Res(200, json.dumps({"items": [{"id": route.split("=")[-1]}]}))
+
+    mock_requests_get.side_effect = get
+
+    # threads asking for the same benchmark share a single fetch
+    with ThreadPoolExecutor(8) as executor:
+        benchmarks = list(executor.map(adapter.get_benchmark, ["yamaska", "yukon"] * 8))
+
+    assert benchmarks == [{"machine": "yamaska"}, {"machine": "yukon"}] * 8
+    assert len(routes) == 4
+
+
+def test_machines_fetched_in_parallel(mock_requests_get):
+    adapter = ApiAdapter(client)
+    both_fetching = threading.Barrier(2, timeout=5)
+
+    def get(route, headers):
+        if "benchmark" in route:
+            # each fetch waits for the other one : they would time out if they waited on each other
+            both_fetching.wait()
+            return Res(200, json.dumps({"machine": route.split("/")[-2]}))
+        return Res(200, json.dumps({"items": [{"id": route.split("=")[-1]}]}))
+
+    mock_requests_get.side_effect = get
+
+    with ThreadPoolExecutor(2) as executor:
+        benchmarks = list(executor.map(adapter.get_benchmark, ["yamaska", "yukon"]))
+    assert benchmarks == [{"machine": "yamaska"}, {"machine": "yukon"}]
+
+
+def test_no_deadlock_during_refresh(mock_requests_get, tmp_path):
+    # entries expire right away, so that the refresh fetches the benchmark
+    adapter = ApiAdapter(client, disk_cache=DiskCache(str(tmp_path), ttl=timedelta(0)))
+    refreshing = threading.Event()
+    release = threading.Event()
+
+    def get(route, headers):
+        if "benchmark" not in route and "yamaska" in route and refreshing.is_set():
+            # the refresh holds the disk lock of the benchmark while it fetches the machine
+            release.wait(10)
+        return (
+            Res(200, json.dumps({"machine": route.split("/")[-2]}))
+            if "benchmark" in route
+            else Res(200, json.dumps({"items": [{"id": route.split("=")[-1]}]}))
+        )
+
+    mock_requests_get.side_effect = get
+    adapter.get_benchmark("yamaska")
+
+    adapter.clean_cache()
+    refreshing.set()
+    refresh = threading.Thread(target=adapter._refresh, args=("yamaska",))
+    refresh.start()
+
+    # the adapter can be used while the refresh is stuck
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(
+            lambda: (adapter.clean_cache(), adapter.get_benchmark("yukon"))
+        )
+        assert future.result(timeout=5)[1] == {"machine": "yukon"}
+
+    release.set()
+    refresh.join(5)
+    assert not refresh.is_alive()
 
 
 def test_get_qubits_and_couplers(mock_get_benchmark):
@@ -157,10 +293,72 @@ def test_get_benchmark(
     benchmark = ApiAdapter.get_benchmark("yamaska")
     assert all(test_benchmark[k] == benchmark[k] for k in benchmark)
 
-    # test 400 and last_update > 24 h
+    # test 400 and last_update > 24 h : the cached benchmark is kept
     mock_is_last_update_expired.return_value = True
+    benchmark = ApiAdapter.get_benchmark("yamaska")
+    ApiAdapter.wait_for_refreshes()
+    assert ApiAdapter.get_benchmark("yamaska") == test_benchmark
+    ApiAdapter.wait_for_refreshes()
+
+    # a failed refresh is only retried after a delay
+    requests = mock_requests_get.call_count
+    ApiAdapter.get_benchmark("yamaska")
+    ApiAdapter.wait_for_refreshes()
+    assert mock_requests_get.call_count == requests
+    last_attempt, failures = ApiAdapter.instance()._refresh_attempts["yamaska"]
+    assert failures == 1
+    ApiAdapter.instance()._refresh_attempts["yamaska"] = (
+        last_attempt - 2 * REFRESH_DELAY,
+        failures,
+    )
+
+    # test 200 and last_update > 24 h : the benchmark is replaced in the background
+    mock_requests_get.side_effect = lambda route, headers: Res(200, test_benchmark_str2)
+    listener = MagicMock()
+    ApiAdapter.instance().refresh_listeners.append(listener)
+    try:
+        assert ApiAdapter.get_benchmark("yamaska") == test_benchmark
+        ApiAdapter.wait_for_refreshes()
+        assert ApiAdapter.get_benchmark("yamaska") == {"test": "im a benchmark2"}
+        listener.assert_called_once_with("yamaska")
+
+        # the benchmark is still out of date, but it was just refreshed
+        assert ApiAdapter.instance()._refresh_attempts["yamaska"][1] == 0
+        requests = mock_requests_get.call_count
+        ApiAdapter.get_benchmark("yamaska")
+        ApiAdapter.wait_for_refreshes()
+        assert mock_requests_get.call_count == requests
+    finally:
+        ApiAdapter.instance().refresh_listeners.remove(listener)
+
+    # the first fetch of a benchmark still raises
+    ApiAdapter.clean_cache()
+    mock_requests_get.side_effect = lambda route, headers: Res(400, "error")
     with pytest.raises(Exception):
-        benchmark = ApiAdapter.get_benchmark("yamaska")
+        ApiAdapter.get_benchmark("yamaska")
+
+
+def test_conditional_get(mock_requests_get):
+    ApiAdapter.initialize(client)
+    sent = []
+
+    def get(route, headers):
+        sent.append(headers)
+        if "If-None-Match" in headers:
+            return Res(304, "", {})
+        return Res(200, '{"answer" : 42}', {"ETag": '"v1"', "Last-Modified": "now"})
+
+    mock_requests_get.side_effect = get
+
+    first = ApiAdapter.instance()._conditional_get("test/machines")
+    second = ApiAdapter.instance()._conditional_get("test/machines")
+    assert first == {"answer": 42}
+    assert second is first
+
+    assert "If-None-Match" not in sent[0]
+    assert sent[1]["If-None-Match"] == '"v1"'
+    assert sent[1]["If-Modified-Since"] == "now"
+    assert sent[1]["Authorization"] == ApiAdapter.instance().headers["Authorization"]
 
 
 def test_post_job(mock_job_body, mock_get_project_id_by_name, mock_requests_post):
@@ -188,6 +386,61 @@ def test_list_jobs(mock_requests_get):
         ApiAdapter.list_jobs()
 
 
+def test_jobs_by_ids(mock_requests_get):
+    ApiAdapter.clean_cache()
+    ApiAdapter.initialize(client)
+
+    pages = {
+        "0": [{"job": {"id": "a", "status": {"type": "RUNNING"}}}, {"id": "b"}],
+        "1": [{"job": {"id": "c", "status": {"type": "SUCCEEDED"}}}, {"id": "d"}],
+        "2": [{"id": "e"}],
+    }
+    routes = []
+
+    def get(route, headers):
+        routes.append(route)
+        page = route.split("page=")[1].split("&")[0]
+        return Res(200, json.dumps({"items": pages[page]}))
+
+    mock_requests_get.side_effect = get
+
+    # stops as soon as every job was found
+    jobs = ApiAdapter.jobs_by_ids(["a", "c"], page_size=2)
+    assert jobs == {
+        "a": {"job": {"id": "a", "status": {"type": "RUNNING"}}},
+        "c": {"job": {"id": "c", "status": {"type": "SUCCEEDED"}}},
+    }
+    assert routes == ["test/jobs?page=0&size=2", "test/jobs?page=1&size=2"]
+
+    # bare jobs are wrapped, missing jobs are left out, and the last page ends the search
+    routes.clear()
+    jobs = ApiAdapter.jobs_by_ids(["e", "z"], page_size=2)
+    assert jobs == {"e": {"job": {"id": "e"}}}
+    assert len(routes) == 3
+
+    # past the last page to go through, the remaining jobs are fetched by id
+    routes.clear()
+    with patch(
+        "pennylane_calculquebec.API.adapter.ApiAdapter.job_by_id"
+    ) as mock_job_by_id:
+        mock_job_by_id.side_effect = lambda job_id: Res(
+            200, json.dumps({"job": {"id": job_id}})
+        )
+        jobs = ApiAdapter.jobs_by_ids(["e", "a"], page_size=2, max_pages=1)
+    assert jobs == {
+        "a": {"job": {"id": "a", "status": {"type": "RUNNING"}}},
+        "e": {"job": {"id": "e"}},
+    }
+    assert routes == ["test/jobs?page=0&size=2"]
+    mock_job_by_id.assert_called_once_with("e")
+
+    # a server that ignores pagination does not loop forever
+    mock_requests_get.side_effect = lambda route, headers: Res(
+        200, json.dumps([{"id": "a"}, {"id": "b"}])
+    )
+    assert ApiAdapter.jobs_by_ids(["z"], page_size=2) == {}
+
+
 def test_job_by_id(mock_requests_get):
     ApiAdapter.clean_cache()
     ApiAdapter.initialize(client)
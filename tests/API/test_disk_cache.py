@@ -0,0 +1,112 @@
+from pennylane_calculquebec.API.disk_cache import DiskCache, default_cache_directory
+from pennylane_calculquebec.API.adapter import ApiAdapter
+from pennylane_calculquebec.API.client import CalculQuebecClient
+from datetime import timedelta
+from unittest.mock import patch
+import threading
+import json
+import os
+import time
+
+client = CalculQuebecClient("test", "test", "test", project_id="123")
+
+
+class Res:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+def test_get_and_set(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"))
+    assert cache.get("benchmark-yamaska") is None
+
+    cache.set("benchmark-yamaska", {"answer": 42})
+    value, saved_at = cache.get("benchmark-yamaska")
+    assert value == {"answer": 42}
+
+    # no temporary file is left behind
+    assert os.listdir(cache.directory) == ["benchmark-yamaska.json"]
+
+    # keys are made safe to use as file names
+    cache.set("machine/../yukon", [1, 2])
+    assert cache.get("machine/../yukon")[0] == [1, 2]
+    assert sorted(os.listdir(cache.directory)) == [
+        "benchmark-yamaska.json",
+        "machine_.._yukon.json",
+    ]
+
+
+def test_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path), timedelta(seconds=-1))
+    cache.set("benchmark-yamaska", {"answer": 42})
+    assert cache.get("benchmark-yamaska") is None
+
+
+def test_unreadable_entry(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    with open(os.path.join(str(tmp_path), "benchmark-yamaska.json"), "w") as file:
+        file.write("{not json")
+
+    assert cache.get("benchmark-yamaska") is None
+
+
+def test_lock(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    events = []
+
+    def hold():
+        with cache.lock("benchmark-yamaska"):
+            events.append("start")
+            time.sleep(0.05)
+            events.append("end")
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert events == ["start", "end"] * 3
+
+
+def test_from_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("PLCQ_CACHE_PATH", raising=False)
+    assert DiskCache.from_environment() is None
+
+    monkeypatch.setenv("PLCQ_CACHE_PATH", str(tmp_path))
+    monkeypatch.setenv("PLCQ_CACHE_TTL", "60")
+    cache = DiskCache.from_environment()
+    assert cache.directory == str(tmp_path)
+    assert cache.ttl == timedelta(seconds=60)
+
+    # an empty path uses the default directory
+    monkeypatch.setenv("PLCQ_CACHE_PATH", "")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert DiskCache.from_environment().directory == os.path.join(
+        str(tmp_path), "pennylane_calculquebec"
+    )
+    assert default_cache_directory() == os.path.join(
+        str(tmp_path), "pennylane_calculquebec"
+    )
+
+
+def test_adapters_share_disk_cache(tmp_path):
+    routes = []
+
+    def get(route, headers):
+        routes.append(route)
+        if "benchmark" in route:
+            return Res(200, json.dumps({"resultsPerDevice": 42}))
+        return Res(200, json.dumps({"items": [{"id": "3"}]}))
+
+    with patch("requests.Session.get") as requests_get:
+        requests_get.side_effect = get
+
+        # the first adapter fetches, the others (e.g. in other processes) read from disk
+        for _ in range(3):
+            adapter = ApiAdapter(client, disk_cache=DiskCache(str(tmp_path)))
+            assert adapter.get_qubits_and_couplers("yamaska") == 42
+            assert not adapter.is_last_update_expired("yamaska")
+
+    assert len(routes) == 2
@@ -0,0 +1,261 @@
+from pennylane_calculquebec.API.job_manager import JobManager, AsyncJob
+from pennylane_calculquebec.API.adapter import ApiAdapter
+from pennylane_calculquebec.API.job import JobException
+from pennylane_calculquebec.API.polling import FixedPolling, PollingStrategy
+import pytest
+from unittest.mock import patch
+import asyncio
+import json
+
+
+class Response:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.text = json.dumps(content)
+
+
+class Job:
+    """a job that doesn't need a circuit or the API to be posted"""
+
+    def __init__(self, job_id, polling_strategy=None):
+        self.adapter = ApiAdapter
+        self.job_id = job_id
+        self.statuses = []
+        self.request_count = 0
+        self.polling_strategy = (
+            polling_strategy if polling_strategy is not None else FixedPolling(0.01)
+        )
+
+    def post(self):
+        return self.job_id
+
+    def poll(self, job_id):
+        response = ApiAdapter.job_by_id(job_id)
+        self.request_count += 1
+        if response.status_code != 200:
+            self.raise_api_error(response)
+        return json.loads(response.text), None
+
+    def update(self, job_id, current_status, content):
+        status = content["job"]["status"]["type"]
+        self.statuses.append(status)
+        if status == "FAILED":
+            raise JobException("failed")
+        if status != "SUCCEEDED":
+            return status, None
+        return status, content["result"]["histogram"]
+
+    def raise_api_error(self, response):
+        raise JobException(response.text)
+
+
+def job_response(status, histogram=None):
+    return Response(
+        200, {"job": {"status": {"type": status}}, "result": {"histogram": histogram}}
+    )
+
+
+@pytest.fixture
+def mock_job_by_id():
+    with patch("pennylane_calculquebec.API.adapter.ApiAdapter.job_by_id") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_jobs_by_ids():
+    # by default, the bulk request finds nothing and jobs are checked one by one
+    with patch("pennylane_calculquebec.API.adapter.ApiAdapter.jobs_by_ids") as mock:
+        mock.return_value = {}
+        yield mock
+
+
+def test_submit(mock_job_by_id):
+    ticks = {"a": 0, "b": 0}
+
+    def job_by_id(job_id):
+        ticks[job_id] += 1
+        if job_id == "a" and ticks[job_id] >= 2:
+            return job_response("SUCCEEDED", {"0": 1})
+        if job_id == "b" and ticks[job_id] >= 3:
+            return job_response("SUCCEEDED", {"1": 2})
+        return job_response("RUNNING")
+
+    mock_job_by_id.side_effect = job_by_id
+    manager = JobManager()
+
+    job_a = manager.submit(Job("a"))
+    job_b = manager.submit(Job("b"))
+    assert isinstance(job_a, AsyncJob)
+
+    assert job_a.result(timeout=5) == {"0": 1}
+    assert job_b.result(timeout=5) == {"1": 2}
+    assert ticks == {"a": 2, "b": 3}
+    assert manager.outstanding == 0
+
+
+def test_failures(mock_job_by_id):
+    manager = JobManager(max_tries=3)
+
+    # the job fails on Thunderhead
+    mock_job_by_id.side_effect = lambda job_id: job_response("FAILED")
+    with pytest.raises(JobException):
+        manager.submit(Job("a")).result(timeout=5)
+
+    # job_by_id returns an error
+    mock_job_by_id.side_effect = lambda job_id: Response(400, {"error": "error"})
+    with pytest.raises(JobException):
+        manager.submit(Job("b")).result(timeout=5)
+
+    # runs past the maximum number of tries
+    mock_job_by_id.side_effect = lambda job_id: job_response("QUEUED")
+    async_job = manager.submit(Job("c"))
+    with pytest.raises(JobException):
+        async_job.result(timeout=5)
+    assert async_job.tries == 3
+    assert manager.outstanding == 0
+
+    # runs past the timeout, however many tries are left
+    manager = JobManager(timeout=0.05)
+    async_job = manager.submit(Job("d", FixedPolling(0.02)))
+    with pytest.raises(JobException):
+        async_job.result(timeout=5)
+    assert 1 <= async_job.tries <= 4
+    assert manager.outstanding == 0
+
+
+def test_failing_polling_strategy(mock_job_by_id):
+    class FailingPolling(PollingStrategy):
+        def initial_delay(self):
+            return 0.01
+
+        def next_delay(self, status, delay, hint=None):
+            raise ValueError("no delay")
+
+    mock_job_by_id.side_effect = lambda job_id: job_response("QUEUED")
+    manager = JobManager()
+
+    # the job fails, not the poller
+    with pytest.raises(ValueError):
+        manager.submit(Job("a", FailingPolling())).result(timeout=5)
+    assert manager.outstanding == 0
+
+    mock_job_by_id.side_effect = lambda job_id: job_response("SUCCEEDED", {"0": 1})
+    assert manager.submit(Job("b")).result(timeout=5) == {"0": 1}
+
+
+def test_failing_poller(mock_job_by_id):
+    mock_job_by_id.side_effect = lambda job_id: job_response("SUCCEEDED", {"0": 1})
+    manager = JobManager()
+
+    # outstanding jobs are resolved with the error, and the next submit starts a new poller
+    with patch.object(manager, "_poll_loop", side_effect=RuntimeError("poller")):
+        with pytest.raises(RuntimeError):
+            manager.submit(Job("a")).result(timeout=5)
+    assert manager.outstanding == 0
+
+    assert manager.submit(Job("b")).result(timeout=5) == {"0": 1}
+
+
+def test_drop_and_close(mock_job_by_id):
+    mock_job_by_id.side_effect = lambda job_id: job_response("QUEUED")
+    manager = JobManager()
+
+    job_a = manager.submit(Job("a"))
+    job_b = manager.submit(Job("b"))
+
+    manager.drop(job_a)
+    with pytest.raises(JobException):
+        job_a.result(timeout=5)
+    assert manager.outstanding == 1
+
+    manager.close()
+    with pytest.raises(JobException):
+        job_b.result(timeout=5)
+    assert manager.outstanding == 0
+
+
+def test_max_in_flight(mock_job_by_id):
+    in_flight = []
+
+    def job_by_id(job_id):
+        in_flight.append(manager.outstanding)
+        return job_response("SUCCEEDED", {"0": 1})
+
+    mock_job_by_id.side_effect = job_by_id
+    manager = JobManager(max_in_flight=2)
+
+    async_jobs = [manager.submit(Job(str(i))) for i in range(5)]
+    assert all(async_job.result(timeout=5) == {"0": 1} for async_job in async_jobs)
+    assert max(in_flight) <= 2
+
+
+def test_await(mock_job_by_id):
+    mock_job_by_id.side_effect = lambda job_id: job_response("SUCCEEDED", {"0": 1})
+    manager = JobManager()
+
+    async def gather():
+        return await asyncio.gather(manager.submit(Job("a")), manager.submit(Job("b")))
+
+    assert asyncio.run(gather()) == [{"0": 1}, {"0": 1}]
+
+
+def test_schedule(mock_job_by_id):
+    checks = {"fast": 0, "slow": 0}
+
+    def job_by_id(job_id):
+        checks[job_id] += 1
+        if checks["fast"] >= 5:
+            return job_response("SUCCEEDED", {"0": 1})
+        return job_response("QUEUED")
+
+    mock_job_by_id.side_effect = job_by_id
+    manager = JobManager()
+
+    # each job is checked on the schedule of its own strategy
+    slow = manager.submit(Job("slow", FixedPolling(10)))
+    fast = manager.submit(Job("fast", FixedPolling(0.01)))
+
+    assert fast.result(timeout=5) == {"0": 1}
+    assert checks == {"fast": 5, "slow": 0}
+    assert slow.delay == 10
+    manager.close()
+
+
+def test_bulk_refresh(mock_job_by_id, mock_jobs_by_ids):
+    refreshes = []
+
+    def jobs_by_ids(job_ids):
+        refreshes.append(sorted(job_ids))
+        status = "RUNNING" if len(refreshes) < 2 else "SUCCEEDED"
+        return {
+            job_id: {"job": {"status": {"type": status}}}
+            for job_id in job_ids
+            if job_id != "c"
+        }
+
+    mock_jobs_by_ids.side_effect = jobs_by_ids
+    mock_job_by_id.side_effect = lambda job_id: job_response("SUCCEEDED", {"0": 1})
+    manager = JobManager()
+
+    # the jobs are due at the same time
+    async_jobs = [
+        manager.submit(Job(job_id, FixedPolling(0.1))) for job_id in ["a", "b", "c"]
+    ]
+    assert all(async_job.result(timeout=5) == {"0": 1} for async_job in async_jobs)
+
+    # "c" was never part of the bulk response, so it was fetched on its own
+    # the others were only fetched on their own once they succeeded
+    fetched = [call.args[0] for call in mock_job_by_id.call_args_list]
+    assert sorted(fetched) == ["a", "b", "c"]
+    assert refreshes[0] == ["a", "b", "c"]
+
+    # bulk refreshes count as requests for each job they cover
+    for async_job in async_jobs:
+        job_id = async_job.job_id
+        bulk = sum(job_id in refresh for refresh in refreshes)
+        assert async_job.job.request_count == bulk + fetched.count(job_id)
+
+    # a failing bulk request falls back to checking jobs one by one
+    mock_jobs_by_ids.side_effect = Exception("bulk request failed")
+    async_jobs = [manager.submit(Job(job_id)) for job_id in ["d", "e"]]
+    assert all(async_job.result(timeout=5) == {"0": 1} for async_job in async_jobs)
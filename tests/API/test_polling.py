@@ -0,0 +1,119 @@
+from pennylane_calculquebec.API.polling import (
+    retry_after,
+    PollingStrategy,
+    FixedPolling,
+    AdaptivePolling,
+)
+from pennylane_calculquebec.API.job import Job, JobException
+import pytest
+from unittest.mock import patch
+import json
+
+
+class Response:
+    def __init__(self, status, headers=None):
+        self.status_code = 200
+        self.headers = headers if headers is not None else {}
+        self.text = json.dumps(
+            {"job": {"status": {"type": status}}, "result": {"histogram": {"0": 1}}}
+        )
+
+
+class Circuit:
+    class Shots:
+        def __init__(self):
+            self.total_shots = 10
+
+    def __init__(self):
+        self.shots = Circuit.Shots()
+        self.operations = []
+        self.measurements = []
+        self.wires = []
+
+
+@pytest.fixture
+def mock_sleep():
+    with patch("pennylane_calculquebec.API.job.time.sleep") as sleep:
+        yield sleep
+
+
+@pytest.fixture
+def mock_post_job():
+    with patch("pennylane_calculquebec.utility.api.ApiUtility.convert_circuit"):
+        with patch("pennylane_calculquebec.API.adapter.ApiAdapter.post_job") as mock:
+            mock.return_value.status_code = 200
+            mock.return_value.text = '{"job" : {"id" : 3}}'
+            yield mock
+
+
+@pytest.fixture
+def mock_job_by_id():
+    with patch("pennylane_calculquebec.API.adapter.ApiAdapter.job_by_id") as mock:
+        yield mock
+
+
+def test_retry_after():
+    assert retry_after(Response("QUEUED")) is None
+    assert retry_after(Response("QUEUED", {"Retry-After": "3"})) == 3
+    assert retry_after(Response("QUEUED", {"Retry-After": "-1"})) is None
+    assert retry_after(Response("QUEUED", {"Retry-After": "not a number"})) is None
+    assert retry_after(object()) is None
+
+
+def test_fixed_polling():
+    strategy = FixedPolling(0.5)
+    assert strategy.initial_delay() == 0.5
+    assert strategy.next_delay("QUEUED", 0.5) == 0.5
+    assert strategy.next_delay("RUNNING", 0.5, 2) == 2
+
+    strategy = PollingStrategy()
+    assert strategy.next_delay("QUEUED", strategy.initial_delay(), 0.1) == 0.2
+
+
+def test_adaptive_polling():
+    strategy = AdaptivePolling(
+        initial=0.2, backoff_factor=2, max_delay=1, running_delay=0.1
+    )
+
+    delay = strategy.initial_delay()
+    delays = []
+    for _ in range(5):
+        delay = strategy.next_delay("QUEUED", delay)
+        delays.append(delay)
+    assert delays == [0.4, 0.8, 1, 1, 1]
+
+    # a running job is checked tightly, unless the server asks otherwise
+    assert strategy.next_delay("RUNNING", 1) == 0.1
+    assert strategy.next_delay("RUNNING", 1, 3) == 3
+
+    # unknown statuses keep the current delay
+    assert strategy.next_delay("", 0.4) == 0.4
+
+
+def test_job_run(mock_sleep, mock_post_job, mock_job_by_id):
+    statuses = ["QUEUED", "QUEUED", "QUEUED", "RUNNING", "SUCCEEDED"]
+    responses = [Response(status) for status in statuses]
+    responses[1].headers["Retry-After"] = "4"
+    mock_job_by_id.side_effect = responses
+
+    job = Job(Circuit(), AdaptivePolling(initial=0.2, max_delay=5))
+    assert job.run() == {"0": 1}
+
+    waits = [call.args[0] for call in mock_sleep.call_args_list]
+    assert waits == [0.2, 0.4, 4, 5, 0.1]
+    assert job.request_count == 6
+
+
+def test_job_run_timeout(mock_sleep, mock_post_job, mock_job_by_id):
+    mock_job_by_id.side_effect = lambda job_id: Response("QUEUED")
+
+    # the job gives up once its time is over, however many tries are left
+    with patch("pennylane_calculquebec.API.job.time.monotonic") as monotonic:
+        monotonic.side_effect = [0, 2, 2, 3]
+        with pytest.raises(JobException):
+            Job(Circuit(), FixedPolling(2)).run(timeout=3)
+
+    # the last check happens at the deadline
+    waits = [call.args[0] for call in mock_sleep.call_args_list]
+    assert waits == [2, 1]
+    assert mock_job_by_id.call_count == 2
@@ -1,3 +1,4 @@
+import pytest
 from pennylane_calculquebec.processing.config import *
 from pennylane_calculquebec.processing.steps import *
 
@@ -33,19 +34,42 @@ def test_processing_config():
     assert config.steps[0] == step
 
 
+def test_fingerprint():
+    config = MonarqDefaultConfig("yamaska", False)
+    fingerprint = config.fingerprint()
+
+    # equal configs have the same fingerprint
+    assert MonarqDefaultConfig("yamaska", False).fingerprint() == fingerprint
+
+    # configs can change, so they aren't hashable
+    with pytest.raises(TypeError):
+        hash(config)
+
+    assert MonarqDefaultConfig("yukon", False).fingerprint() != fingerprint
+    assert (
+        MonarqDefaultConfig("yamaska", False, excluded_qubits=[1]).fingerprint()
+        != fingerprint
+    )
+
+    # changing a step changes the fingerprint
+    config[1] = IterativeCommuteAndMerge()
+    assert config.fingerprint() != fingerprint
+
+
 def test_presets():
     # default config should contain only default steps
     config = MonarqDefaultConfig("yamaska")
-    test_arr = [
+    default_steps = [
         DecomposeReadout,
         CliffordTDecomposition,
         VF2,
         Swaps,
         IterativeCommuteAndMerge,
         MonarqDecomposition,
+        IterativeCommuteAndMerge,
+        MonarqDecomposition,
     ]
-    for step in config.steps:
-        assert any(type(step) == test for test in test_arr)
+    assert [type(step) for step in config.steps] == default_steps
 
     # benchmarking steps should not use benchmarks
     config = MonarqDefaultConfigNoBenchmark("yamaska")
@@ -62,6 +86,14 @@ def test_presets():
         )
     )
     assert len(place_route) == 0
+    assert [type(step) for step in config.steps] == [
+        DecomposeReadout,
+        CliffordTDecomposition,
+        IterativeCommuteAndMerge,
+        MonarqDecomposition,
+        IterativeCommuteAndMerge,
+        MonarqDecomposition,
+    ]
 
     # empty config should be empty
     config = EmptyConfig()
@@ -71,6 +103,10 @@ def test_presets():
     config = FakeMonarqConfig("yamaska")
     default = MonarqDefaultConfig("yamaska")
     assert len(config.steps) == len(default.steps) + 2
+    assert [type(step) for step in config.steps] == default_steps + [
+        GateNoiseSimulation,
+        ReadoutNoiseSimulation,
+    ]
 
     for step in default.steps:
         assert any(type(def_step) == type(step) for def_step in config.steps)
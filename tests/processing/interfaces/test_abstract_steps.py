@@ -1,4 +1,11 @@
-from pennylane_calculquebec.processing.interfaces import PreProcStep, PostProcStep
+from pennylane_calculquebec.processing.interfaces import (
+    PreProcStep,
+    PostProcStep,
+    NativeStep,
+)
+from pennylane_calculquebec.processing.interfaces.base_step import canonical
+from unittest.mock import patch
+import numpy as np
 
 
 def test_pre_proc_step():
@@ -11,3 +18,66 @@ def test_post_proc_step():
     step = PostProcStep()
     result = step.execute("this should not return", "this should return")
     assert result == "this should return"
+
+
+def test_native_step():
+    import pennylane as qml
+    from pennylane.tape import QuantumTape
+
+    class Step(NativeStep):
+        def execute_native(self, circuit):
+            return circuit.select(circuit.codes != circuit.codes[0])
+
+    tape = QuantumTape([qml.T(0), qml.CZ([0, 1]), qml.T(1)], [qml.probs()])
+    assert NativeStep().execute(tape).operations == tape.operations
+    assert Step().execute(tape).operations == [qml.CZ([0, 1])]
+
+
+def test_fingerprint():
+    class Step(PreProcStep):
+        def __init__(self, values, machine_name=None, use_benchmark=True):
+            self.values = values
+            self.machine_name = machine_name
+            self.use_benchmark = use_benchmark
+
+    fingerprint = Step({"a": [1, 2], "b": {3}}).fingerprint()
+
+    # the order of dicts and sets doesn't matter
+    assert Step({"b": {3}, "a": [1, 2]}).fingerprint() == fingerprint
+    assert Step({"a": [2, 1], "b": {3}}).fingerprint() != fingerprint
+    assert Step({"a": (1, 2), "b": {3}}).fingerprint() == fingerprint
+
+    # the type of the step matters
+    assert PreProcStep().fingerprint() != PostProcStep().fingerprint()
+
+    # so does the calibration, for steps that use benchmarks
+    with patch(
+        "pennylane_calculquebec.processing.interfaces.base_step.get_cached_calibration_version"
+    ) as get_calibration_version:
+        get_calibration_version.return_value = "1"
+        step = Step([], "yamaska")
+        fingerprint = step.fingerprint()
+        assert Step([], "yamaska", False).fingerprint() != fingerprint
+
+        get_calibration_version.return_value = "2"
+        assert step.fingerprint() != fingerprint
+        get_calibration_version.assert_called_with("yamaska")
+
+        # until the calibration is fetched, the step has no fingerprint
+        get_calibration_version.return_value = None
+        assert step.fingerprint() is None
+        assert Step([], "yamaska", False).fingerprint() is not None
+
+
+def test_canonical():
+    assert canonical({2: "a", 1: None}) == "{1:None,2:'a'}"
+    assert canonical(np.array([1.0, 2.0])) == canonical(np.array([1.0, 2.0]))
+    assert canonical(np.array([1.0, 2.0])) != canonical(np.array([1.0, 3.0]))
+
+    # objects are described by their attributes, not their address
+    class Value:
+        def __init__(self, value):
+            self.value = value
+
+    assert canonical(Value(1)) == canonical(Value(1))
+    assert canonical(Value(1)) != canonical(Value(2))
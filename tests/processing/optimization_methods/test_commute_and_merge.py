@@ -80,6 +80,12 @@ def test_remove_trivials():
     tape = iterative_commute_and_merge._remove_trivials(tape)
     assert tape.operations == [qml.PauliZ(0), qml.RY(3.14, 0), qml.PauliX(0)]
 
+    # large angles are wrapped without looping
+    tape = QuantumTape([qml.RZ(2e9 * np.pi + 0.5, 0), qml.RX(-4 * np.pi, 0)])
+    tape = iterative_commute_and_merge._remove_trivials(tape)
+    assert len(tape.operations) == 1
+    assert np.isclose(tape.operations[0].parameters[0], 0.5, atol=1e-5)
+
 
 def test_commute_and_merge():
     # test bernstein vazirani
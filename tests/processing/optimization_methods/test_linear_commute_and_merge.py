@@ -0,0 +1,171 @@
+from pennylane.tape import QuantumTape
+import pennylane as qml
+import pytest
+import numpy as np
+from pennylane_calculquebec.processing.optimization_methods.iterative_commute_and_merge import (
+    commute_and_merge,
+)
+from pennylane_calculquebec.processing.optimization_methods.linear_commute_and_merge import (
+    linear_commute_and_merge,
+)
+
+
+def probabilities(operations, wires):
+    """the probabilities of measuring each basis state, starting from |0>"""
+    operations = operations + [qml.Identity(wire) for wire in range(wires)]
+    matrix = qml.matrix(qml.tape.QuantumScript(operations), wire_order=range(wires))
+    return np.abs(matrix[:, 0]) ** 2
+
+
+def random_operations(seed, gates, wires, clifford_t=False):
+    """random operations on the given number of wires. With clifford_t, only clifford and T gates are used"""
+    rng = np.random.default_rng(seed)
+    single_qubit = [
+        qml.Hadamard,
+        qml.PauliX,
+        qml.PauliZ,
+        qml.S,
+        qml.T,
+        qml.SX,
+        lambda wire: qml.adjoint(qml.T(wire)),
+        lambda wire: qml.RZ(
+            rng.choice([np.pi / 2, -np.pi / 4, rng.uniform(-7, 7)]), wire
+        ),
+        lambda wire: qml.RX(rng.choice([np.pi / 2, rng.uniform(-7, 7)]), wire),
+        lambda wire: qml.RY(rng.uniform(-7, 7), wire),
+    ]
+    if clifford_t:
+        single_qubit = single_qubit[:7] + [lambda wire: qml.adjoint(qml.S(wire))]
+    operations = []
+    for _ in range(gates):
+        if rng.random() < 0.3:
+            control, target = (
+                int(wire) for wire in rng.choice(wires, 2, replace=False)
+            )
+            operations.append(rng.choice([qml.CNOT, qml.CZ])([control, target]))
+        else:
+            gate = single_qubit[rng.integers(len(single_qubit))]
+            operations.append(gate(int(rng.integers(wires))))
+    return operations
+
+
+@pytest.mark.parametrize(
+    "operations, expected",
+    [
+        # inverses meet through the gates they commute with
+        (
+            [
+                qml.Hadamard(0),
+                qml.Hadamard(1),
+                qml.CNOT([0, 1]),
+                qml.RZ(0.5, 0),
+                qml.CNOT([0, 1]),
+                qml.Hadamard(0),
+            ],
+            [qml.Hadamard(0), qml.Hadamard(1), qml.RZ(0.5, 0), qml.Hadamard(0)],
+        ),
+        # cancelling gates joins the rotations around them
+        (
+            [
+                qml.Hadamard(0),
+                qml.RZ(0.2, 0),
+                qml.PauliX(0),
+                qml.PauliX(0),
+                qml.RZ(0.3, 0),
+                qml.Hadamard(0),
+            ],
+            [qml.Hadamard(0), qml.RZ(0.5, 0), qml.Hadamard(0)],
+        ),
+        # symmetric gates cancel whatever the order of their wires
+        (
+            [
+                qml.Hadamard(0),
+                qml.Hadamard(1),
+                qml.CZ([0, 1]),
+                qml.CZ([1, 0]),
+                qml.Hadamard(0),
+                qml.Hadamard(1),
+            ],
+            [],
+        ),
+        # adjoints cancel, and the remaining ones are merged like rotations
+        (
+            [
+                qml.Hadamard(0),
+                qml.T(0),
+                qml.adjoint(qml.T(0)),
+                qml.adjoint(qml.S(0)),
+                qml.PhaseShift(np.pi, 0),
+                qml.Hadamard(0),
+            ],
+            [qml.Hadamard(0), qml.PhaseShift(np.pi / 2, 0), qml.Hadamard(0)],
+        ),
+        # angles are wrapped, and trivial rotations are removed
+        (
+            [
+                qml.Hadamard(0),
+                qml.RX(-np.pi / 2, 0),
+                qml.RZ(4 * np.pi, 0),
+                qml.Identity(0),
+            ],
+            [qml.Hadamard(0), qml.RX(3 * np.pi / 2, 0)],
+        ),
+        # diagonal gates are removed at the ends of the circuit
+        (
+            [
+                qml.CZ([0, 1]),
+                qml.T(0),
+                qml.Hadamard(1),
+                qml.CNOT([0, 1]),
+                qml.RZ(0.1, 0),
+            ],
+            [qml.Hadamard(1), qml.CNOT([0, 1])],
+        ),
+    ],
+)
+def test_linear_commute_and_merge(operations, expected):
+    tape = QuantumTape(operations, [qml.probs()])
+    tape = linear_commute_and_merge(tape)
+    assert tape.operations == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_same_as_commute_and_merge(seed):
+    wires = 2 + seed % 3
+    tape = QuantumTape(random_operations(seed, 40, wires), [qml.probs()])
+
+    reference = commute_and_merge(tape)
+    result = linear_commute_and_merge(tape)
+
+    assert len(result.operations) <= len(reference.operations)
+    assert np.allclose(
+        probabilities(result.operations, wires),
+        probabilities(reference.operations, wires),
+    )
+    assert np.allclose(
+        probabilities(result.operations, wires),
+        probabilities(tape.operations, wires),
+    )
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_clifford_t_same_as_commute_and_merge(seed):
+    rng = np.random.default_rng(seed)
+    wires = int(rng.integers(2, 6))
+    tape = QuantumTape(
+        random_operations(seed, int(rng.integers(20, 120)), wires, clifford_t=True),
+        [qml.probs()],
+    )
+
+    reference = commute_and_merge(tape)
+    result = linear_commute_and_merge(tape)
+
+    assert len(result.operations) <= len(reference.operations)
+    assert np.allclose(
+        probabilities(result.operations, wires),
+        probabilities(reference.operations, wires),
+    )
+    assert np.allclose(
+        probabilities(result.operations, wires),
+        probabilities(tape.operations, wires),
+    )
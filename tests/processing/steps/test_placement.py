@@ -1,4 +1,9 @@
-from pennylane_calculquebec.processing.steps.placement import ISMAGS, ASTAR, VF2
+from pennylane_calculquebec.processing.steps.placement import (
+    ISMAGS,
+    ASTAR,
+    VF2,
+    _placements,
+)
 import pytest
 from unittest.mock import patch
 from pennylane.tape import QuantumTape
@@ -6,6 +11,18 @@ import pennylane as qml
 import networkx as nx
 import numpy as np
 from pennylane_calculquebec.utility.api import keys
+import pennylane_calculquebec.utility.graph as graph_util
+
+
+@pytest.fixture(autouse=True)
+def mock_calibration_version():
+    # mappings are cached by calibration : each test starts from an empty cache
+    with patch(
+        "pennylane_calculquebec.processing.interfaces.base_step.get_cached_calibration_version"
+    ) as mock:
+        mock.return_value = "calibration"
+        _placements.clear()
+        yield mock
 
 
 @pytest.fixture
@@ -432,3 +449,121 @@ def test_astar_impossible_excluded(
     new_tape = step.execute(tape)
     wires = np.array(sorted([w for w in new_tape.wires]))
     assert np.array_equal(wires, [0, 1, 2, 4])
+
+
+# no common subgraph
+@pytest.mark.parametrize("step_type", [VF2, ISMAGS])
+def test_no_common_subgraph(
+    step_type, mock_get_readout1_and_cz_fidelities, mock_connectivity
+):
+    step = step_type("yamaska", False)
+    tape = QuantumTape(ops=[qml.CNOT([0, 1]), qml.CNOT([1, 2])])
+    circuit_topology = nx.Graph([(0, 1), (1, 2)])
+    # the machine has no couplers, so not a single edge of the circuit fits in it
+    machine_topology = nx.Graph()
+    machine_topology.add_nodes_from(range(5))
+
+    with (
+        patch(
+            "pennylane_calculquebec.utility.graph.find_largest_common_subgraph_vf2"
+        ) as vf2,
+        patch(
+            "pennylane_calculquebec.utility.graph.largest_common_subgraphs_ismags"
+        ) as ismags,
+    ):
+        vf2.return_value = None
+        ismags.return_value = iter([None])
+        mapping = next(step._mappings(tape, circuit_topology, machine_topology, None))
+
+    assert sorted(mapping) == [0, 1, 2]
+    assert len(set(mapping.values())) == 3
+    assert set(mapping.values()) <= set(machine_topology.nodes)
+
+
+# time budget
+@pytest.mark.parametrize("step_type", [VF2, ISMAGS, ASTAR])
+def test_time_budget(step_type, mock_get_readout1_and_cz_fidelities, mock_connectivity):
+    tape = QuantumTape(ops=[qml.CNOT([0, 1]), qml.CNOT([1, 2]), qml.CNOT([0, 2])])
+
+    first = step_type("yamaska", False)
+    best = step_type("yamaska", False, time_budget=1)
+    assert best.time_budget == 1
+
+    first_tape = first.execute(tape)
+    best_tape = best.execute(tape)
+    assert len(best_tape.wires) == 3
+
+    # the best mapping is at least as good as the first one
+    circuit_topology = nx.Graph([(0, 1), (1, 2), (0, 2)])
+    machine_topology = nx.Graph([(4, 0), (0, 1), (1, 2), (2, 3), (1, 4)])
+
+    def score(new_tape):
+        mapping = {
+            wire: new_tape.operations[i].wires[j]
+            for i, (a, b) in enumerate([(0, 1), (1, 2), (0, 2)])
+            for j, wire in enumerate((a, b))
+        }
+        return best.score(mapping, circuit_topology, machine_topology)
+
+    assert score(best_tape) <= score(first_tape)
+
+
+def test_score(mock_get_readout1_and_cz_fidelities):
+    step = ASTAR("yamaska", False)
+    circuit_topology = nx.Graph()
+    circuit_topology.add_edge(0, 1, weight=2)
+    circuit_topology.add_edge(1, 2, weight=1)
+    machine_topology = nx.Graph([(0, 1), (1, 2), (2, 3)])
+
+    # every operation is on a coupler
+    assert step.score({0: 0, 1: 1, 2: 2}, circuit_topology, machine_topology) == (
+        0,
+        -1,
+    )
+
+    # wires 0 and 1 are 2 couplers apart : 2 operations * 2 swaps
+    assert step.score({0: 0, 1: 2, 2: 3}, circuit_topology, machine_topology)[0] == 4
+
+    # wires that can't be connected
+    machine_topology.remove_edge(1, 2)
+    assert step.score({0: 0, 1: 1, 2: 2}, circuit_topology, machine_topology)[0] == (
+        float("inf")
+    )
+
+
+@pytest.mark.parametrize("step_type", [ISMAGS, VF2, ASTAR])
+def test_placement_cache(
+    step_type,
+    mock_connectivity,
+    mock_broken_qubit_and_couplers,
+    mock_get_readout1_and_cz_fidelities,
+    mock_calibration_version,
+):
+    def circuit(angle):
+        return QuantumTape(
+            ops=[qml.RZ(angle, 0), qml.CNOT([0, 1]), qml.CNOT([1, 2])],
+            measurements=[qml.counts(wires=[0, 1, 2])],
+        )
+
+    step = step_type("yamaska", False)
+    expected = step.execute(circuit(0.1))
+
+    with patch("pennylane_calculquebec.utility.graph.machine_graph") as machine_graph:
+        # same structure, other parameters : the mapping is reused
+        tape = step.execute(circuit(0.2))
+        assert machine_graph.call_count == 0
+        assert [op.wires for op in tape.operations] == [
+            op.wires for op in expected.operations
+        ]
+        assert tape.operations[0].parameters == [0.2]
+
+    # other calibration
+    step = step_type("yamaska")
+    step.execute(circuit(0.3))
+    mock_calibration_version.return_value = "new calibration"
+    with patch(
+        "pennylane_calculquebec.utility.graph.machine_graph",
+        wraps=graph_util.machine_graph,
+    ) as machine_graph:
+        step.execute(circuit(0.4))
+        assert machine_graph.call_count == 1
@@ -1,11 +1,29 @@
 import pytest
+import numpy as np
 from unittest.mock import patch
 import pennylane as qml
 from pennylane.tape import QuantumTape
-from pennylane_calculquebec.processing.steps.routing import Swaps, RoutingException
+from pennylane_calculquebec.processing.steps.routing import (
+    Swaps,
+    Sabre,
+    NoiseAwareSwaps,
+    RoutingException,
+    _plans,
+)
 import networkx as nx
 
 
+@pytest.fixture(autouse=True)
+def mock_calibration_version():
+    # plans are cached by calibration : each test starts from an empty cache
+    with patch(
+        "pennylane_calculquebec.processing.interfaces.base_step.get_cached_calibration_version"
+    ) as mock:
+        mock.return_value = "calibration"
+        _plans.clear()
+        yield mock
+
+
 @pytest.fixture
 def mock_circuit_graph():
     with patch("pennylane_calculquebec.processing.steps.routing.circuit_graph") as mock:
@@ -63,3 +81,172 @@ def test_inexistant_wire(mock_machine_graph, mock_r1_cz_fidelities):
     step = Swaps("yamaska")
     with pytest.raises(RoutingException):
         _ = step.execute(tape)
+
+
+def test_sabre_directly_connected(mock_machine_graph):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 2), (2, 3)])
+
+    tape = QuantumTape(
+        ops=[qml.CNOT([0, 1]), qml.RZ(0.5, 2)], measurements=[qml.counts(wires=[0, 1])]
+    )
+    tape2 = Sabre("yamaska").execute(tape)
+    assert tape2.operations == tape.operations
+    assert tape2.measurements[0].wires == tape.measurements[0].wires
+
+
+def test_sabre_layout_evolves(mock_machine_graph):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 2), (2, 3)])
+
+    tape = QuantumTape(
+        ops=[qml.CNOT([0, 2]), qml.CNOT([0, 2]), qml.RZ(0.5, 2)],
+        measurements=[qml.counts(wires=[0, 1, 2])],
+    )
+    tape2 = Sabre("yamaska", False).execute(tape)
+
+    # one swap, which is not undone
+    swaps = [op for op in tape2.operations if op.name == "SWAP"]
+    assert len(swaps) == 1
+    assert all(
+        mock_machine_graph.return_value.has_edge(*op.wires)
+        for op in tape2.operations
+        if op.num_wires == 2
+    )
+
+    # the routed circuit measures the same state
+    dev = qml.device("default.qubit", wires=4)
+    prep = [qml.Hadamard(0), qml.RX(0.7, 1), qml.RY(0.4, 2)]
+    expected = qml.execute(
+        [QuantumTape(prep + tape.operations, [qml.probs(wires=[0, 1, 2])])], dev
+    )[0]
+    results = qml.execute(
+        [
+            QuantumTape(
+                prep + tape2.operations, [qml.probs(wires=tape2.measurements[0].wires)]
+            )
+        ],
+        dev,
+    )[0]
+    assert np.allclose(expected, results)
+
+
+def test_sabre_fewer_swaps(mock_machine_graph):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 2), (2, 3), (3, 4)])
+
+    tape = QuantumTape(ops=[qml.CNOT([0, 4]), qml.CNOT([4, 0]), qml.CNOT([1, 4])])
+    sabre = Sabre("yamaska", False).execute(tape)
+    swaps = Swaps("yamaska", False).execute(tape)
+
+    def count(tape):
+        return len([op for op in tape.operations if op.name == "SWAP"])
+
+    assert count(sabre) < count(swaps)
+
+
+def test_sabre_wireless_operations(mock_machine_graph):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 2)])
+
+    tape = QuantumTape(
+        ops=[
+            qml.CNOT([0, 2]),
+            qml.GlobalPhase(0.1),
+            qml.CNOT([2, 0]),
+            qml.GlobalPhase(0.2),
+        ]
+    )
+    routed = Sabre("yamaska", False).execute(tape)
+
+    wireless = [op for op in routed.operations if len(op.wires) == 0]
+    assert wireless == [qml.GlobalPhase(0.1), qml.GlobalPhase(0.2)]
+    assert len([op for op in routed.operations if op.name == "CNOT"]) == 2
+
+
+def test_sabre_inexistant_wire(mock_machine_graph):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (2, 3)])
+
+    tape = QuantumTape(ops=[qml.CNOT([0, 2])])
+    with pytest.raises(RoutingException):
+        Sabre("yamaska", False).execute(tape)
+
+
+def test_noise_aware_swaps(mock_machine_graph, mock_r1_cz_fidelities):
+    # 0 - 1 - 3 has the best readouts, 0 - 2 - 3 has the best cz
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 3), (0, 2), (2, 3)])
+    fidelities = {
+        "readoutState1Fidelity": {"0": 1, "1": 1, "2": 0.7, "3": 1},
+        "czGateFidelity": {(0, 1): 0.8, (1, 3): 0.8, (0, 2): 0.99, (2, 3): 0.99},
+    }
+    mock_r1_cz_fidelities.return_value = fidelities
+    tape = QuantumTape(ops=[qml.CNOT([0, 3])], measurements=[qml.counts(wires=[0, 3])])
+
+    swaps = Swaps("yamaska").execute(tape)
+    assert swaps.operations[0] == qml.SWAP([1, 3])
+
+    step = NoiseAwareSwaps("yamaska")
+    with patch(
+        "pennylane_calculquebec.processing.steps.routing.get_readout1_and_cz_fidelities"
+    ) as mock_readout:
+        mock_readout.return_value = fidelities
+        routed, success_probability = step.route(tape)
+
+        # the estimate is cached with the plan
+        assert step.route(tape)[1] == success_probability
+        assert mock_readout.call_count == 1
+
+    expected = [qml.SWAP([2, 3]), qml.CNOT([0, 2]), qml.SWAP([2, 3])]
+    assert routed.operations == expected
+    assert step.execute(tape).operations == expected
+
+    # 2 swaps of 3 cz, 1 cz, and qubits 0 and 3 are measured
+    assert np.isclose(success_probability, 0.99**7)
+
+    # without benchmarks, there is no estimate
+    step = NoiseAwareSwaps("yamaska", False)
+    assert step.route(tape)[1] is None
+
+
+@pytest.mark.parametrize("step_type", [Swaps, Sabre])
+def test_plan_cache(
+    step_type, mock_machine_graph, mock_r1_cz_fidelities, mock_calibration_version
+):
+    mock_machine_graph.return_value = nx.Graph([(0, 1), (1, 2), (2, 3)])
+    mock_r1_cz_fidelities.return_value = {
+        "readoutState1Fidelity": {"0": 1, "1": 1, "2": 1, "3": 1},
+        "czGateFidelity": {(0, 1): 1, (1, 2): 1, (2, 3): 1},
+    }
+
+    def circuit(angle):
+        return QuantumTape(
+            ops=[qml.RZ(angle, 0), qml.CNOT([0, 2]), qml.RX(angle, 2)],
+            measurements=[qml.counts(wires=[0, 1, 2])],
+        )
+
+    step = step_type("yamaska", False)
+    expected = step.execute(circuit(0.1))
+    assert mock_machine_graph.call_count == 1
+
+    # same structure, other parameters : the plan is reused
+    tape = step.execute(circuit(0.2))
+    assert mock_machine_graph.call_count == 1
+    assert [op.name for op in tape.operations] == [
+        op.name for op in expected.operations
+    ]
+    assert [op.wires for op in tape.operations] == [
+        op.wires for op in expected.operations
+    ]
+    assert tape.operations[0].parameters == [0.2]
+    assert tape.measurements[0].wires == expected.measurements[0].wires
+
+    # other structure
+    step.execute(QuantumTape(ops=[qml.CNOT([0, 3])]))
+    assert mock_machine_graph.call_count == 2
+
+    # other parameters for the step
+    step_type("yamaska", False, excluded_qubits=[3]).execute(circuit(0.3))
+    assert mock_machine_graph.call_count == 3
+
+    # other calibration
+    step = step_type("yamaska")
+    step.execute(circuit(0.4))
+    mock_calibration_version.return_value = "new calibration"
+    step.execute(circuit(0.5))
+    assert mock_machine_graph.call_count == 5
@@ -0,0 +1,160 @@
+import pytest
+import numpy as np
+import pennylane as qml
+from unittest.mock import patch
+from pennylane.tape import QuantumTape
+from pennylane_calculquebec.processing import PreProcessor
+from pennylane_calculquebec.processing.config import MonarqDefaultConfig
+from pennylane_calculquebec.processing.custom_gates import ParameterSlot
+from pennylane_calculquebec.processing.compiled_template import (
+    CompiledTemplate,
+    TemplateException,
+    _affine_rotations,
+    operator_key,
+)
+from pennylane_calculquebec.processing.steps import placement, routing
+from pennylane_calculquebec.utility.cache import LRUCache
+from pennylane_calculquebec.monarq_data import Cache, cache
+
+
+@pytest.fixture
+def mock_connectivity():
+    with patch("pennylane_calculquebec.utility.graph.get_connectivity") as mock:
+        mock.side_effect = lambda machine_name, use_benchmark=True: cache["yamaska"][
+            Cache.OFFLINE_CONNECTIVITY
+        ]
+        placement._placements.clear()
+        routing._plans.clear()
+        yield mock
+
+
+def circuit(parameters):
+    return QuantumTape(
+        [
+            qml.RY(parameters[0], 0),
+            qml.RZ(parameters[1], 1),
+            qml.CNOT([0, 1]),
+            qml.CRX(parameters[2], [1, 2]),
+            qml.Rot(parameters[3], parameters[4], parameters[5], 2),
+            qml.Hadamard(0),
+            qml.RX(0.3, 0),
+        ],
+        [qml.probs(wires=[0, 1, 2])],
+    )
+
+
+def probabilities(tape):
+    tape = QuantumTape(tape.operations, tape.measurements)
+    return qml.execute([tape], qml.device("default.qubit"))[0]
+
+
+def test_affine_rotations():
+    assert _affine_rotations(qml.RX(0.5, 0)) == [
+        ("RX", qml.wires.Wires(0), 0.0, (1.0,))
+    ]
+
+    # crx(a) = rx(a / 2), cz, rx(-a / 2), cz, with basis changes
+    rotations = [
+        rotation
+        for rotation in _affine_rotations(qml.CRX(0.5, [0, 1]))
+        if isinstance(rotation, tuple)
+    ]
+    assert [np.round(slopes, 8).tolist() for _, _, _, slopes in rotations] == [
+        [0.5],
+        [-0.5],
+    ]
+
+    with pytest.raises(TemplateException):
+        _affine_rotations(qml.QubitUnitary(np.eye(2), 0))
+
+
+def test_compile_and_bind(mock_connectivity):
+    steps = MonarqDefaultConfig("yamaska", False).steps
+
+    def transpile(tape):
+        for step in steps:
+            tape = step.execute(tape)
+        return tape
+
+    tape = circuit([0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+    template = CompiledTemplate.compile(tape, transpile)
+    # ry, rz, 2 for crx, 3 for rot, rx
+    assert len(template.slots) == 8
+
+    # only trainable parameters are turned into slots
+    tape.trainable_params = [0, 1, 2, 3, 4, 5]
+    template = CompiledTemplate.compile(tape, transpile)
+    assert len(template.slots) == 7
+    assert any(isinstance(op, ParameterSlot) for op in template.operations)
+
+    for parameters in np.random.default_rng(0).uniform(-7, 7, (3, 6)).tolist() + [
+        [0] * 6
+    ]:
+        tape = circuit(parameters)
+        bound = template.bind(tape)
+        assert not any(isinstance(op, ParameterSlot) for op in bound.operations)
+        assert np.allclose(probabilities(bound), probabilities(tape))
+
+
+def test_key(mock_connectivity):
+    fingerprint = MonarqDefaultConfig("yamaska", False).fingerprint()
+    key = CompiledTemplate.key(circuit([0.1] * 6), fingerprint)
+
+    # trainable parameters are not part of the key
+    assert CompiledTemplate.key(circuit([0.2] * 6), fingerprint) == key
+
+    # other parameters are
+    tape = circuit([0.1] * 6)
+    tape.trainable_params = [0]
+    assert CompiledTemplate.key(tape, fingerprint) != key
+
+    # even when they only differ by less than the rounding of their hash
+    other = circuit([0.1, 0.1 + 1e-12] + [0.1] * 4)
+    other.trainable_params = [0]
+    assert other.operations[1].hash == tape.operations[1].hash
+    assert CompiledTemplate.key(other, fingerprint) != CompiledTemplate.key(
+        tape, fingerprint
+    )
+
+
+def test_operator_key():
+    assert operator_key(qml.RX(0.5, 0)) == operator_key(qml.RX(0.5, 0))
+    assert operator_key(qml.RX(0.5, 0)) != operator_key(qml.RX(0.5 + 1e-12, 0))
+    assert operator_key(qml.RX(0.5, 0)) != operator_key(qml.RY(0.5, 0))
+    assert operator_key(qml.RX(0.5, 0)) != operator_key(qml.RX(0.5, 1))
+
+    # measurements, and their observables
+    assert operator_key(qml.probs(wires=[0, 1])) == operator_key(
+        qml.probs(wires=[0, 1])
+    )
+    assert operator_key(qml.probs(wires=[0, 1])) != operator_key(
+        qml.counts(wires=[0, 1])
+    )
+    first = qml.expval(qml.Hermitian(np.diag([1.0, 0.5]), 0))
+    second = qml.expval(qml.Hermitian(np.diag([1.0, 0.5 + 1e-12]), 0))
+    assert operator_key(first) != operator_key(second)
+
+
+def test_get_processor_with_templates(mock_connectivity):
+    config = MonarqDefaultConfig("yamaska", False)
+    templates = LRUCache()
+    processor = PreProcessor.get_processor(config, None, templates)
+
+    with patch(
+        "pennylane_calculquebec.processing.compiled_template.CompiledTemplate.compile",
+        wraps=CompiledTemplate.compile,
+    ) as compile:
+        for parameters in [[0.1] * 6, [0.2] * 6, [1, 2, 3, 4, 5, 6]]:
+            tape = circuit(parameters)
+            new_tape = processor(tape)[0][0]
+            assert np.allclose(probabilities(new_tape), probabilities(tape))
+        assert compile.call_count == 1
+        assert len(templates) == 1
+
+    # a circuit that can't be compiled as a template is transpiled as usual
+    tape = QuantumTape(
+        [qml.QubitUnitary(qml.matrix(qml.Hadamard(0)), 0)], [qml.probs(wires=[0])]
+    )
+    new_tape = processor(tape)[0][0]
+    assert np.allclose(probabilities(new_tape), [0.5, 0.5])
+    assert len(templates) == 1
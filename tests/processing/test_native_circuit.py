@@ -0,0 +1,56 @@
+import numpy as np
+import pennylane as qml
+from pennylane.tape import QuantumTape
+import pytest
+from pennylane_calculquebec.processing.native_circuit import (
+    NativeCircuit,
+    NATIVE_GATES,
+    CODES,
+)
+import pennylane_calculquebec.processing.custom_gates as custom
+
+
+def test_round_trip():
+    ops = [
+        qml.T("a"),
+        custom.TDagger(1),
+        qml.PauliX(1),
+        custom.X90("a"),
+        custom.ZM90(2),
+        qml.CZ([1, "a"]),
+        qml.RZ(0.5, 2),
+        qml.PhaseShift(-0.25, 1),
+        qml.Identity(2),
+        custom.ParameterSlot(3, "a"),
+    ]
+    tape = QuantumTape(ops, [qml.counts(wires=[1, 2])], shots=100)
+    circuit = NativeCircuit.from_tape(tape)
+
+    assert len(circuit) == len(ops)
+    assert circuit.labels == ["a", 1, 2]
+    assert [NATIVE_GATES[code] for code in circuit.codes] == [op.name for op in ops]
+    assert circuit.wires[5].tolist() == [1, 0]
+    assert circuit.wires[6].tolist() == [2, -1]
+    assert circuit.angles[6] == 0.5 and circuit.angles[9] == 3
+
+    new_tape = circuit.to_tape()
+    assert new_tape.operations == ops
+    assert new_tape.operations[-1].slot == 3
+    assert new_tape.measurements == tape.measurements
+    assert new_tape.shots == tape.shots
+
+
+def test_not_native():
+    with pytest.raises(ValueError):
+        NativeCircuit.from_tape(QuantumTape([qml.Hadamard(0)]))
+
+
+def test_select():
+    ops = [qml.RZ(0.1, 0), qml.CZ([0, 1]), qml.T(1)]
+    circuit = NativeCircuit.from_tape(QuantumTape(ops))
+
+    selected = circuit.select(circuit.codes != CODES["CZ"])
+    assert selected.to_operations() == [qml.RZ(0.1, 0), qml.T(1)]
+    assert selected.labels is circuit.labels
+
+    assert len(NativeCircuit.from_operations([])) == 0
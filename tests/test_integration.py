@@ -42,9 +42,9 @@ def test_monarq_default(mock_get_connectivity):
     assert dev._client.machine_name == dev.machine_name
     qnode = qml.QNode(circuit, dev)
     qml.set_shots(qnode, 1000)
-    with patch("requests.post") as post:
+    with patch("requests.Session.post") as post:
         post.return_value = Response('{"job" : {"id" : 1}}')
-        with patch("requests.get") as get:
+        with patch("requests.Session.get") as get:
             get.return_value = Response(
                 '{"items" : [{"id" : 0}], "job" : {"status" : {"type" : "SUCCEEDED"}}, "result":{"histogram": {"0":500, "1":500}}}'
             )
@@ -83,7 +83,7 @@ def test_preprocess(mock_PreProcessor_get_processor, mock_api_initialize):
 
 def test_execute(mock_measure):
     mock_measure.return_value = ["a", "b", "c"]
-    dev = MonarqBackup(client=client)
+    dev = MonarqBackup(client=client, max_concurrent_jobs=1)
 
     # ran 1 time
     quantum_tape = QuantumTape([], [], 1000)
@@ -117,6 +117,8 @@ def test_measure(mock_PostProcessor_get_processor):
             self.job_started = None
             self.job_status_changed = None
             self.job_completed = None
+            self.polling_strategy = None
+            self._adapter = None
 
     dev = MockDevice()
     expected_counts = Job().run()
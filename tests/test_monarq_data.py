@@ -1,4 +1,6 @@
+import copy
 import pytest
+import numpy as np
 from unittest.mock import patch
 from pennylane_calculquebec.utility.api import keys
 import pennylane_calculquebec.monarq_data as data
@@ -68,6 +70,8 @@ def mock_is_last_update_expired():
 
 
 def set_benchmark(qubits_and_couplers, **kwargs):
+    # like the adapter, a new benchmark is a new object
+    qubits_and_couplers.return_value = copy.deepcopy(qubits_and_couplers.return_value)
     for key in kwargs:
         k = key[0]
         v = key[1:]
@@ -82,8 +86,9 @@ def set_benchmark(qubits_and_couplers, **kwargs):
 
 
 def test_get_broken_qubits_and_couplers(
-    mock_get_qubits_and_couplers, mock_get_connectivity
+    mock_get_qubits_and_couplers, mock_get_connectivity, mock_is_last_update_expired
 ):
+    mock_is_last_update_expired.return_value = True
     # nothing is broken
     results = data.get_broken_qubits_and_couplers(0.5, 0.5, "yamaska")
     assert len(results[keys.QUBITS]) == 0
@@ -144,12 +149,17 @@ def test_get_coupler_noise(
     mock_get_qubits_and_couplers.assert_not_called()
     assert results is results2
 
-    # cache is expired
+    # cache is expired, but the benchmark didn't change
     mock_get_qubits_and_couplers.reset_mock()
     mock_is_last_update_expired.return_value = True
     results3 = data.get_coupler_noise("yamaska")
     mock_get_qubits_and_couplers.assert_called_once()
-    assert results is not results3
+    assert results is results3
+
+    # a refresh brought a new benchmark
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.5)
+    results4 = data.get_coupler_noise("yamaska")
+    assert results is not results4
 
 
 def test_get_qubit_noise(mock_is_last_update_expired, mock_get_qubits_and_couplers):
@@ -165,12 +175,17 @@ def test_get_qubit_noise(mock_is_last_update_expired, mock_get_qubits_and_couple
     mock_get_qubits_and_couplers.assert_not_called()
     assert results is results2
 
-    # cache is expired
+    # cache is expired, but the benchmark didn't change
     mock_get_qubits_and_couplers.reset_mock()
     mock_is_last_update_expired.return_value = True
     results3 = data.get_qubit_noise("yamaska")
     mock_get_qubits_and_couplers.assert_called_once()
-    assert results is not results3
+    assert results is results3
+
+    # a refresh brought a new benchmark
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.5)
+    results4 = data.get_qubit_noise("yamaska")
+    assert results is not results4
 
 
 def test_get_phase_damping(mock_is_last_update_expired, mock_get_qubits_and_couplers):
@@ -186,12 +201,17 @@ def test_get_phase_damping(mock_is_last_update_expired, mock_get_qubits_and_coup
     mock_get_qubits_and_couplers.assert_not_called()
     assert results is results2
 
-    # cache is expired
+    # cache is expired, but the benchmark didn't change
     mock_get_qubits_and_couplers.reset_mock()
     mock_is_last_update_expired.return_value = True
     results3 = data.get_phase_damping("yamaska")
     mock_get_qubits_and_couplers.assert_called_once()
-    assert results is not results3
+    assert results is results3
+
+    # a refresh brought a new benchmark
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.5)
+    results4 = data.get_phase_damping("yamaska")
+    assert results is not results4
 
 
 def test_get_amplitude_damping(
@@ -209,12 +229,17 @@ def test_get_amplitude_damping(
     mock_get_qubits_and_couplers.assert_not_called()
     assert results is results2
 
-    # cache is expired
+    # cache is expired, but the benchmark didn't change
     mock_get_qubits_and_couplers.reset_mock()
     mock_is_last_update_expired.return_value = True
     results3 = data.get_amplitude_damping("yamaska")
     mock_get_qubits_and_couplers.assert_called_once()
-    assert results is not results3
+    assert results is results3
+
+    # a refresh brought a new benchmark
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.5)
+    results4 = data.get_amplitude_damping("yamaska")
+    assert results is not results4
 
 
 def test_get_readout_noise_matrices(
@@ -232,9 +257,138 @@ def test_get_readout_noise_matrices(
     mock_get_qubits_and_couplers.assert_not_called()
     assert results is results2
 
-    # cache is expired
+    # cache is expired, but the benchmark didn't change
     mock_get_qubits_and_couplers.reset_mock()
     mock_is_last_update_expired.return_value = True
     results3 = data.get_readout_noise_matrices("yamaska")
     mock_get_qubits_and_couplers.assert_called_once()
-    assert results is not results3
+    assert results is results3
+
+    # a refresh brought a new benchmark
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.5)
+    results4 = data.get_readout_noise_matrices("yamaska")
+    assert results is not results4
+
+
+def test_forget_benchmark(mock_is_last_update_expired, mock_get_qubits_and_couplers):
+    mock_is_last_update_expired.return_value = False
+    results = data.get_qubit_noise("yamaska")
+
+    # a background refresh brought a new benchmark
+    data.forget_benchmark("yamaska")
+    assert data.Cache.OFFLINE_CONNECTIVITY in data.cache["yamaska"]
+
+    mock_get_qubits_and_couplers.reset_mock()
+    results2 = data.get_qubit_noise("yamaska")
+    mock_get_qubits_and_couplers.assert_called_once()
+    assert results is not results2
+
+
+def test_calibration_snapshot(mock_get_qubits_and_couplers):
+    connectivity = data.cache["yamaska"][data.Cache.OFFLINE_CONNECTIVITY]
+    set_benchmark(mock_get_qubits_and_couplers, q4=0.5, c3=0.6)
+    benchmark = mock_get_qubits_and_couplers.return_value
+    del benchmark[keys.QUBITS]["7"][keys.READOUT_STATE_1_FIDELITY]
+
+    snapshot = data.CalibrationSnapshot(benchmark, connectivity)
+    assert snapshot.readout1[4] == 0.5
+    assert snapshot.cz(5, 2) == snapshot.cz(2, 5) == 0.6
+    assert np.isnan(snapshot.cz(0, 23))
+    assert snapshot.readout_matrices.shape == (24, 2, 2)
+
+    # unknown fidelities count as broken
+    broken = snapshot.broken_qubits_and_couplers(0.7, 0.7)
+    assert broken == {keys.QUBITS: [4, 7], keys.COUPLERS: [[5, 2]]}
+
+    # the snapshot does not follow its source, and cannot be changed
+    version = snapshot.version
+    benchmark[keys.QUBITS]["4"][keys.READOUT_STATE_1_FIDELITY] = 0.9
+    assert snapshot.readout1[4] == 0.5
+    assert data.CalibrationSnapshot(benchmark, connectivity).version != version
+    with pytest.raises(AttributeError):
+        snapshot.version = "1"
+    with pytest.raises(ValueError):
+        snapshot.readout1[4] = 1
+
+    # neither can the values it serves
+    fidelities = snapshot.readout1_and_cz_fidelities
+    with pytest.raises(TypeError):
+        fidelities[keys.READOUT_STATE_1_FIDELITY]["4"] = 1
+    with pytest.raises(TypeError):
+        snapshot.coupler_noise[(0, 1)] = 0
+    with pytest.raises(TypeError):
+        snapshot.qubit_noise[0] = 0
+    with pytest.raises(ValueError):
+        snapshot.readout_noise[0][0, 0] = 0
+
+
+def test_out_of_date_calibration(
+    mock_is_last_update_expired, mock_get_qubits_and_couplers
+):
+    mock_is_last_update_expired.return_value = True
+    with patch(
+        "pennylane_calculquebec.API.adapter.ApiAdapter.get_connectivity_for_machine"
+    ) as get_connectivity_for_machine:
+        get_connectivity_for_machine.return_value = data.cache["yamaska"][
+            data.Cache.OFFLINE_CONNECTIVITY
+        ]
+        data.forget_benchmark("yamaska")
+        snapshot = data.get_calibration("yamaska")
+
+        # while the refresh of the benchmark fails, nothing is rebuilt or fetched again
+        assert data.get_calibration("yamaska") is snapshot
+        assert data.get_connectivity("yamaska") is data.get_connectivity("yamaska")
+        get_connectivity_for_machine.assert_called_once()
+
+        # a new benchmark with the same values keeps the snapshot
+        mock_get_qubits_and_couplers.return_value = copy.deepcopy(
+            mock_get_qubits_and_couplers.return_value
+        )
+        assert data.get_calibration("yamaska") is snapshot
+        get_connectivity_for_machine.assert_called_once()
+
+
+def test_calibration_per_adapter(mock_get_qubits_and_couplers):
+    connectivity = data.cache["yamaska"][data.Cache.OFFLINE_CONNECTIVITY]
+
+    class Adapter:
+        def __init__(self, readout):
+            self.refresh_listeners = []
+            self.benchmark = copy.deepcopy(mock_get_qubits_and_couplers.return_value)
+            self.benchmark[keys.QUBITS]["4"][keys.READOUT_STATE_1_FIDELITY] = readout
+
+        def is_last_update_expired(self, machine_name):
+            return False
+
+        def get_qubits_and_couplers(self, machine_name):
+            return self.benchmark
+
+        def get_connectivity_for_machine(self, machine_name):
+            return connectivity
+
+    a, b = Adapter(0.5), Adapter(0.6)
+    snapshot_a = data.get_calibration("yamaska", a)
+    snapshot_b = data.get_calibration("yamaska", b)
+    assert snapshot_a.readout1[4] == 0.5 and snapshot_b.readout1[4] == 0.6
+
+    # calls without an adapter go through the one in use
+    with ApiAdapter.use(b):
+        assert data.get_calibration("yamaska") is snapshot_b
+
+    # a refresh of one adapter's benchmark only drops its own calibration
+    assert len(a.refresh_listeners) == 1
+    a.refresh_listeners[0]("yamaska")
+    assert data.get_calibration("yamaska", b) is snapshot_b
+    assert data.get_calibration("yamaska", a) is not snapshot_a
+
+    # the cached version is read without fetching the benchmark
+    c = Adapter(0.7)
+    with patch.object(c, "get_qubits_and_couplers") as fetch:
+        assert data.get_cached_calibration_version("yamaska", c) is None
+        fetch.assert_not_called()
+    version = data.get_calibration("yamaska", c).version
+    assert data.get_cached_calibration_version("yamaska", c) == version
+
+    # once it is out of date, the version isn't known anymore
+    c.is_last_update_expired = lambda machine_name: True
+    assert data.get_cached_calibration_version("yamaska", c) is None
@@ -14,7 +14,8 @@ from pennylane.exceptions import PennyLaneDeprecationWarning
 import pennylane as qml
 from pennylane_calculquebec.base_device import BaseDevice
 import pennylane_calculquebec.API.job as api_job
-
+from pennylane_calculquebec.API.polling import FixedPolling
+import threading
 
 client = CalculQuebecClient("host", "user", "token", project_id="test_project_id")
 
@@ -65,6 +66,11 @@ def test_constructor(mock_api_initialize):
     mock_api_initialize.assert_called_once()
     assert dev._processing_config is config
 
+    # transpiled circuits are only cached when asked for
+    assert dev.transpile_cache is None
+    dev = MonarqDevice(client=client, cache_transpilation=True)
+    assert dev.transpile_cache is not None
+
 
 def test_constructor_shots_deprecated(mock_api_initialize):
     # Passing shots via constructor should emit a deprecation warning
@@ -90,7 +96,7 @@ def test_preprocess(mock_PreProcessor_get_processor, mock_api_initialize):
 
 def test_execute(mock_measure):
     mock_measure.return_value = ["a", "b", "c"]
-    dev = MonarqDevice(client=client)
+    dev = MonarqDevice(client=client, max_concurrent_jobs=1)
 
     # ran 1 time
     quantum_tape = QuantumTape([], [], 1000)
@@ -125,6 +131,8 @@ def test_measure(mock_PostProcessor_get_processor):
             self.job_started = None
             self.job_status_changed = None
             self.job_completed = None
+            self.polling_strategy = None
+            self._adapter = None
 
     dev = MockDevice()
     expected_counts = Job().run()
@@ -176,3 +184,89 @@ def test_measure(mock_PostProcessor_get_processor):
         quantum_tape.measurements.append(qml.counts())
         with pytest.raises(DeviceException):
             _ = MonarqDevice._measure(dev, quantum_tape)
+
+
+def test_execute_concurrent(mock_measure):
+    # every call waits for the others, which only works if the tapes are measured concurrently
+    barrier = threading.Barrier(3, timeout=5)
+
+    def measure(tape):
+        barrier.wait()
+        return tape.shots.total_shots
+
+    mock_measure.side_effect = measure
+    dev = MonarqDevice(client=client, max_concurrent_jobs=3)
+
+    tapes = [QuantumTape([], [], shots) for shots in [10, 20, 30]]
+    results = BaseDevice._measure_batch(dev, tapes)
+    assert results == [10, 20, 30]
+    assert mock_measure.call_count == 3
+
+
+def test_execute_sequential(mock_measure):
+    thread_ids = []
+
+    def measure(tape):
+        thread_ids.append(threading.get_ident())
+        return tape.shots.total_shots
+
+    mock_measure.side_effect = measure
+    dev = MonarqDevice(client=client, max_concurrent_jobs=1)
+
+    tapes = [QuantumTape([], [], shots) for shots in [10, 20, 30]]
+    assert dev.execute(tapes) == [10, 20, 30]
+    assert all(thread_id == threading.get_ident() for thread_id in thread_ids)
+
+
+def test_measure_batch(mock_PostProcessor_get_processor):
+    mock_PostProcessor_get_processor.return_value = lambda tape, results: results
+    posted = []
+
+    class Job:
+        def __init__(self, tape, polling_strategy, adapter):
+            self.shots = tape.shots.total_shots
+            self.polling_strategy = polling_strategy
+            self.adapter = adapter
+
+        def post(self):
+            posted.append(self)
+            return str(len(posted))
+
+        def poll(self, job_id):
+            return {}, None
+
+        def update(self, job_id, current_status, content):
+            # every job must have been posted before the first one is completed
+            if len(posted) < 3:
+                return "RUNNING", None
+            return "SUCCEEDED", {"0": self.shots}
+
+    dev = MonarqDevice(client=client, polling_strategy=FixedPolling(0.01))
+    tapes = [QuantumTape([], [qml.counts(wires=[0])], shots) for shots in [10, 20, 30]]
+
+    # jobs that are due together are refreshed in bulk : no content makes them check themselves
+    with (
+        patch("pennylane_calculquebec.monarq_device.Job", Job),
+        patch.object(dev._adapter, "jobs_by_ids", return_value={}) as jobs_by_ids,
+    ):
+        results = dev.execute(tapes)
+
+        assert results == [{"0": 10}, {"0": 20}, {"0": 30}]
+        for call in jobs_by_ids.call_args_list:
+            assert set(call.args[0]) <= {"1", "2", "3"}
+        assert all(job.polling_strategy is dev.polling_strategy for job in posted)
+        assert dev._job_manager.outstanding == 0
+
+        # unsupported measurements are rejected before any job is posted
+        posted.clear()
+        with pytest.raises(DeviceException):
+            dev.execute([tapes[0], QuantumTape([], [qml.sample()], 10)])
+        assert len(posted) == 0
+
+
+def test_max_concurrent_jobs():
+    dev = MonarqDevice(client=client)
+    assert dev.max_concurrent_jobs == 8
+
+    with pytest.raises(DeviceException):
+        MonarqDevice(client=client, max_concurrent_jobs=0)
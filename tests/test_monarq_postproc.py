@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch
 from pennylane_calculquebec.processing import PostProcessor
 from pennylane_calculquebec.processing.interfaces import PostProcStep, PreProcStep
+from pennylane_calculquebec.API.adapter import ApiAdapter
 
 
 @pytest.fixture
@@ -66,6 +67,17 @@ def test_get_processor(mock_expand_full_measurements):
         assert solution[i] == r
 
 
+def test_get_processor_adapter(mock_expand_full_measurements):
+    class adapter_step(PostProcStep):
+        def execute(self, tape, results):
+            return results + [ApiAdapter.instance()]
+
+    adapter = object()
+    process = PostProcessor.get_processor(config(adapter_step()), [0], adapter)
+    assert process(Tape(), []) == [adapter]
+    assert ApiAdapter.instance() is not adapter
+
+
 def test_expand_full_measurements():
     tape = Tape(mps=[op([])])
     result: Tape = PostProcessor.expand_full_measurements(tape, [4, 1, 2])
@@ -117,3 +117,100 @@ def test_unroll_array_boxes():
     assert tape.operations[0].num_params == 0
     assert tape.operations[1].data[0] == 0.5
     assert tape.operations[2].data[0] == 1.5
+
+
+def test_transpile_cache():
+    import pennylane as qml
+    from pennylane.tape import QuantumTape
+
+    call_counter = step_call_counter()
+
+    class counting_step(PreProcStep):
+        def execute(self, tape):
+            call_counter.i += 1
+            return tape
+
+    conf = config(counting_step())
+    transpiled = PreProcessor.transpile_cache()
+    process = PreProcessor.get_processor(conf, [0, 1], transpiled=transpiled)
+
+    tape = QuantumTape([qml.RX(0.5, 0), qml.CZ([0, 1])], [qml.counts()], shots=10)
+    assert process(tape)[0][0].operations == tape.operations
+
+    # same tape, other shots
+    tape2 = process(
+        QuantumTape([qml.RX(0.5, 0), qml.CZ([0, 1])], [qml.counts()], shots=20)
+    )[0][0]
+    assert call_counter.i == 1
+    assert tape2.shots.total_shots == 20
+    assert tape2.operations == tape.operations
+    assert tape2.measurements[0].wires == qml.wires.Wires([0, 1])
+
+    # other parameters, even if they only differ by less than the rounding of their hash
+    process(QuantumTape([qml.RX(0.6, 0), qml.CZ([0, 1])], [qml.counts()], shots=10))
+    assert call_counter.i == 2
+    process(
+        QuantumTape([qml.RX(0.6 + 1e-12, 0), qml.CZ([0, 1])], [qml.counts()], shots=10)
+    )
+    assert call_counter.i == 3
+
+    # other configuration
+    conf.steps.append(counting_step())
+    PreProcessor.get_processor(conf, [0, 1], transpiled=transpiled)(tape)
+    assert call_counter.i == 5
+
+    stats = transpiled.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4 and stats["entries"] == 4
+    assert stats["bytes"] > 0
+
+    # steps whose calibration version isn't known yet aren't cached
+    class calibrated_step(counting_step):
+        def fingerprint(self):
+            return None
+
+    transpiled = PreProcessor.transpile_cache()
+    process = PreProcessor.get_processor(
+        config(calibrated_step()), [0, 1], transpiled=transpiled
+    )
+    process(tape)
+    process(tape)
+    assert call_counter.i == 7
+    assert transpiled.stats()["entries"] == 0
+
+
+def test_native_steps():
+    import pennylane as qml
+    from pennylane.tape import QuantumTape
+    from pennylane_calculquebec.processing.interfaces import NativeStep
+
+    calls = []
+
+    class native_step(NativeStep):
+        def __init__(self, name):
+            self.name = name
+
+        def execute_native(self, circuit):
+            calls.append(("execute_native", self.name))
+            return circuit
+
+        def execute(self, tape):
+            calls.append(("execute", self.name))
+            return tape
+
+    tape = QuantumTape([qml.T(0)], [qml.counts(wires=[0])], shots=10)
+
+    # consecutive native steps share a native circuit
+    transpile = PreProcessor.get_processor(
+        config(native_step("a"), native_step("b")), [0]
+    )
+    result = transpile(tape)[0][0]
+    assert calls == [
+        ("execute_native", "a"),
+        ("execute_native", "b"),
+    ]
+    assert result.operations == tape.operations
+
+    # a single native step acts on the tape
+    calls.clear()
+    PreProcessor.get_processor(config(native_step("a")), [0])(tape)
+    assert calls == [("execute", "a")]
@@ -0,0 +1,76 @@
+from pennylane_calculquebec.utility.cache import LRUCache
+import pytest
+
+
+def test_get_and_put():
+    cache = LRUCache(2)
+    assert cache.get("a") is None
+    assert cache.get("a", 3) == 3
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    assert "b" in cache
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_eviction():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    # a is used, so b is the least recently used entry
+    cache.get("a")
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    # overwriting an entry doesn't grow the cache
+    cache.put("c", 4)
+    assert len(cache) == 2
+    assert cache.get("c") == 4
+
+
+def test_max_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_max_bytes():
+    with pytest.raises(ValueError):
+        LRUCache(2, max_bytes=10)
+
+    cache = LRUCache(10, max_bytes=10, sizeof=len)
+    cache.put("a", "1234")
+    cache.put("b", "1234")
+    assert cache.bytes == 8
+
+    # a is evicted to make room for c
+    cache.put("c", "123")
+    assert "a" not in cache
+    assert cache.bytes == 7
+
+    # overwriting an entry replaces its size
+    cache.put("c", "1")
+    assert cache.bytes == 5
+
+    # entries larger than the limit are not written
+    cache.put("d", "12345678901")
+    assert "d" not in cache
+    assert cache.bytes == 5
+
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_stats():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 1, "bytes": 0}
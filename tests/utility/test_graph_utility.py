@@ -97,6 +97,12 @@ def test_circuit_graph():
     assert len(expected) == results.number_of_edges()
     assert all(edge in expected for edge in results.edges)
 
+    # links are weighted by their number of operations
+    tape = QuantumTape(ops=[qml.CNOT([0, 1]), qml.CZ([1, 0]), qml.CZ([1, 2])])
+    results = g.circuit_graph(tape)
+    assert results[0][1]["weight"] == 2
+    assert results[1][2]["weight"] == 1
+
     # no ops, 3 measurements
     tape = QuantumTape(ops=[], measurements=[qml.counts(wires=[0, 1, 2])])
     expected = [0, 1, 2]
@@ -192,6 +198,30 @@ def test_find_largest_common_subgraph_vf2():
     assert len(expected.items()) == len(results.items())
     assert all(a == b for a, b in zip(expected.items(), results.items()))
 
+    # the time budget runs out : the subgraph is built greedily
+    subgraph = nx.complete_graph(6)
+    graph = nx.grid_2d_graph(5, 5)
+    results = g.find_largest_common_subgraph_vf2(subgraph, graph, time_budget=0)
+    assert len(results) == 6
+    assert len(set(results.values())) == 6
+    assert all(qubit in graph for qubit in results.values())
+
+
+def test_greedy_common_subgraph():
+    # the most used links are kept, the triangle can't fit in a path
+    subgraph = nx.Graph()
+    subgraph.add_edge(0, 1, weight=2)
+    subgraph.add_edge(1, 2, weight=1)
+    subgraph.add_edge(0, 2, weight=3)
+    graph = nx.Graph([(0, 1), (1, 2)])
+
+    results = g._greedy_common_subgraph(subgraph, graph)
+    assert results[0] == 1
+    assert sorted(results.values()) == [0, 1, 2]
+
+    # nothing fits
+    assert g._greedy_common_subgraph(subgraph, nx.empty_graph(3)) is None
+
 
 def test_find_largest_common_subgraph_ismags():
     subgraph = nx.Graph([(0, 1), (1, 2), (0, 3)])
@@ -258,6 +288,65 @@ def test_shortest_path(mock_readout1_cz_fidelities):
     assert results == None
 
 
+def test_coupler_tables(mock_readout1_cz_fidelities):
+    mock_readout1_cz_fidelities.return_value = {
+        keys.READOUT_STATE_1_FIDELITY: {"0": 0.9, "1": 0.8, "2": 0.7},
+        keys.CZ_GATE_FIDELITY: {(0, 1): 0.5, (2, 1): 0.6, (2, 3): 0.7},
+    }
+
+    cz_fidelities, costs = g.coupler_tables("yamaska")
+    assert cz_fidelities[(1, 0)] == cz_fidelities[(0, 1)] == 0.5
+    assert cz_fidelities[(1, 2)] == 0.6
+    assert abs(costs[(1, 0)] - (4 - 2.2)) < 1e-5
+    assert costs[(1, 2)] == costs[(2, 1)]
+    # qubit 3 has no readout fidelity
+    assert (2, 3) in cz_fidelities and (2, 3) not in costs
+
+    # the tables are built once per set of fidelities
+    assert g.coupler_tables("yamaska")[1] is costs
+    mock_readout1_cz_fidelities.return_value = {
+        keys.READOUT_STATE_1_FIDELITY: {"0": 1, "1": 1},
+        keys.CZ_GATE_FIDELITY: {(0, 1): 1},
+    }
+    cz_fidelities, costs = g.coupler_tables("yamaska")
+    assert costs == {(0, 1): 1, (1, 0): 1}
+
+
+def test_shortest_path_cache(mock_readout1_cz_fidelities):
+    mock_readout1_cz_fidelities.return_value = {
+        keys.READOUT_STATE_1_FIDELITY: {"0": 1, "1": 1, "2": 1, "3": 1},
+        keys.CZ_GATE_FIDELITY: {(0, 1): 1, (1, 2): 1, (2, 3): 1, (0, 3): 0.5},
+    }
+    graph = nx.Graph([(0, 1), (1, 2), (2, 3), (0, 3)])
+
+    with patch(
+        "pennylane_calculquebec.utility.graph.nx.single_source_dijkstra_path",
+        wraps=nx.single_source_dijkstra_path,
+    ) as dijkstra:
+        assert g.shortest_path(0, 2, graph, "yamaska") == [0, 1, 2]
+        assert g.shortest_path(3, 1, nx.Graph(graph), "yamaska") in [
+            [3, 0, 1],
+            [3, 2, 1],
+        ]
+        # one search from each node
+        assert dijkstra.call_count == 4
+
+        # other exclusions have their own paths
+        assert g.shortest_path(0, 2, graph, "yamaska", excluding=[1]) == [0, 3, 2]
+        assert dijkstra.call_count == 7
+
+        # paths are recomputed when the fidelities change
+        mock_readout1_cz_fidelities.return_value = {
+            keys.READOUT_STATE_1_FIDELITY: {"0": 1, "1": 1, "2": 1, "3": 1},
+            keys.CZ_GATE_FIDELITY: {(0, 1): 0.1, (1, 2): 1, (2, 3): 1, (0, 3): 1},
+        }
+        assert g.shortest_path(0, 2, graph, "yamaska") == [0, 3, 2]
+        assert dijkstra.call_count == 11
+
+    with pytest.raises(nx.NodeNotFound):
+        g.shortest_path(0, 2, graph, "yamaska", excluding=[2])
+
+
 def test_find_best_neighbour(mock_calculate_score):
     # return the number of the node as cost (for test)
     mock_calculate_score.side_effect = lambda a, b, c, d: a
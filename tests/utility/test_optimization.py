@@ -4,18 +4,21 @@ from pennylane_calculquebec.processing.steps.base_decomposition import (
 )
 from pennylane_calculquebec.processing.steps.optimization import (
     IterativeCommuteAndMerge,
+    PeepholeOptimization,
 )
+import pennylane_calculquebec.processing.custom_gates as custom
 import pennylane as qml
 from pennylane.tape import QuantumTape
 import pytest
 from unittest.mock import patch
 from functools import reduce
+from pennylane_calculquebec.utility.optimization import wire_bounds
 
 
 @pytest.fixture
 def mock_commute_and_merge():
     with patch(
-        "pennylane_calculquebec.processing.steps.optimization.commute_and_merge"
+        "pennylane_calculquebec.processing.steps.optimization.linear_commute_and_merge"
     ) as mock:
         yield mock
 
@@ -108,7 +111,7 @@ def test_optimize_cu():
     new_tape = CliffordTDecomposition().execute(tape)
     new_tape = IterativeCommuteAndMerge().execute(new_tape)
 
-    assert len(new_tape.operations) == 63
+    assert len(new_tape.operations) == 55
 
     mat1 = reduce(
         lambda i, s: i @ s.matrix(wire_order=tape.wires),
@@ -214,3 +217,96 @@ def test_get_rid_of_Y_rotations():
         qml.RX(np.pi / 5, 0),
         qml.RZ(np.pi / 2, 0),
     ]
+
+
+def test_wire_bounds():
+    ops = [qml.Hadamard(0), qml.CNOT([0, 1]), qml.RZ(0.1, 1), qml.PauliX(2)]
+    first, last = wire_bounds(ops)
+    assert first == {0: 0, 1: 1, 2: 3}
+    assert last == {0: 1, 1: 2, 2: 3}
+
+    assert wire_bounds([]) == ({}, {})
+
+
+def native_matrix(operations, wires):
+    """the matrix of a circuit, on wires 0 to wires - 1"""
+    operations = operations + [qml.Identity(wire) for wire in range(wires)]
+    return qml.matrix(qml.tape.QuantumScript(operations), wire_order=range(wires))
+
+
+def same_up_to_phase(first, second):
+    return np.isclose(np.abs(np.trace(first.conj().T @ second)), len(first))
+
+
+@pytest.mark.parametrize(
+    "operations, expected",
+    [
+        # two hadamards cancel
+        (
+            [
+                custom.Z90(0),
+                custom.X90(0),
+                custom.Z90(0),
+                custom.Z90(0),
+                custom.X90(0),
+                custom.Z90(0),
+            ],
+            [],
+        ),
+        (
+            [custom.Z90(0), custom.ZM90(0), custom.Y90(0)],
+            [custom.Y90(0)],
+        ),
+        # runs end at two qubit gates and at parameter slots
+        (
+            [custom.X90(0), qml.CZ([0, 1]), custom.X90(0), qml.PauliZ(1)],
+            [custom.X90(0), qml.CZ([0, 1]), custom.X90(0), qml.PauliZ(1)],
+        ),
+        (
+            [qml.T(0), custom.ParameterSlot(0, 0), qml.T(0)],
+            [qml.T(0), custom.ParameterSlot(0, 0), qml.T(0)],
+        ),
+        # runs are only replaced by shorter sequences
+        (
+            [custom.X90(0), qml.T(0), custom.YM90(0)],
+            [custom.X90(0), qml.T(0), custom.YM90(0)],
+        ),
+    ],
+)
+def test_peephole_optimization(operations, expected):
+    tape = QuantumTape(operations, [qml.probs()])
+    result = PeepholeOptimization().execute(tape)
+    assert result.operations == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_peephole_optimization_random(seed):
+    rng = np.random.default_rng(seed)
+    single_qubit = [
+        qml.T,
+        custom.TDagger,
+        qml.PauliX,
+        qml.PauliY,
+        qml.PauliZ,
+        custom.X90,
+        custom.Y90,
+        custom.Z90,
+        custom.XM90,
+        custom.YM90,
+        custom.ZM90,
+        lambda wire: qml.RZ(rng.uniform(-7, 7), wire),
+    ]
+    operations = []
+    for _ in range(60):
+        if rng.random() < 0.2:
+            operations.append(qml.CZ([int(wire) for wire in rng.permutation(3)[:2]]))
+        else:
+            gate = single_qubit[rng.integers(len(single_qubit))]
+            operations.append(gate(int(rng.integers(3))))
+
+    tape = QuantumTape(operations, [qml.probs()])
+    result = PeepholeOptimization().execute(tape)
+    assert len(result.operations) < len(operations)
+    assert same_up_to_phase(
+        native_matrix(result.operations, 3), native_matrix(operations, 3)
+    )